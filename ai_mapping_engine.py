@@ -5,9 +5,19 @@ Provides the GenAIMappingEngine class which uses GenAI models to
 generate intelligent mappings between source and target schemas.
 """
 
+import asyncio
 import json
-from typing import List
-from models import TableSchema, FieldMapping, TableMapping, MigrationMapping
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional, Set
+from models import TableSchema, TableMapping, MigrationMapping
+from mapping_cache import MappingCache, schema_fingerprint
+from mapping_io import mapping_from_dict, mapping_to_dict, table_mapping_from_dict, table_mapping_to_dict
+from prompt_codec import decode_mapping_response, encode_mapping_prompt, estimate_tokens
+from instrumentation import metrics_or_null
 
 
 class GenAIMappingEngine:
@@ -16,6 +26,55 @@ class GenAIMappingEngine:
     based on schema context and business logic.
     """
 
+    def __init__(self, cache: Optional[MappingCache] = None, endpoint: Optional[str] = None,
+                 partition_size: Optional[int] = None, candidate_targets: int = 5,
+                 max_concurrency: int = 8, requests_per_second: Optional[float] = None,
+                 max_retries: int = 3, backoff_seconds: float = 0.5, timeout: float = 120.0,
+                 prematcher=None, metrics=None, prompt_format: str = "json",
+                 max_prompt_tokens: Optional[int] = None):
+        """
+        Args:
+            cache: Optional MappingCache; when set, results are reused for
+                identical inputs and per source table when only some changed.
+            endpoint: HTTP URL of the model service; the built-in simulation is
+                used when None.
+            partition_size: When set, source tables are split into requests of
+                at most this many related tables, sent concurrently.
+            candidate_targets: Number of candidate target tables sent along with
+                each source table in a partitioned request.
+            max_concurrency: Maximum number of requests in flight.
+            requests_per_second: Optional cap on the request start rate.
+            max_retries: Retries per request after the first attempt fails.
+            backoff_seconds: Base delay of the exponential retry backoff.
+            timeout: Seconds to wait for one model response.
+            prematcher: Optional SchemaMatcher that accepts obvious table
+                mappings and narrows candidate targets before the model runs.
+            metrics: Optional RunMetrics receiving prompt sizes, model
+                latency, retry and cache counters.
+            prompt_format: "json" (default) sends the schemas as JSON;
+                "compact" sends the tabular encoding of prompt_codec and asks
+                for the compact response format.
+            max_prompt_tokens: Optional token budget per request. Larger
+                requests are split into several requests; a single source
+                table that still does not fit has its low-signal content
+                truncated (compact format only).
+        """
+        if prompt_format not in ("json", "compact"):
+            raise ValueError(f"Unknown prompt format: {prompt_format!r}")
+        self.cache = cache
+        self.endpoint = endpoint
+        self.partition_size = partition_size
+        self.candidate_targets = candidate_targets
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.prematcher = prematcher
+        self.metrics = metrics_or_null(metrics)
+        self.prompt_format = prompt_format
+        self.max_prompt_tokens = max_prompt_tokens
+
     def generate_mappings(
         self,
         source_schema: List[TableSchema],
@@ -33,43 +92,468 @@ class GenAIMappingEngine:
         Returns:
             A fully populated MigrationMapping object.
         """
-        prompt = self._prepare_mapping_context(source_schema, target_schema, business_context)
-        response = self._call_ai_for_mappings(prompt)
-        return self._parse_ai_mapping_response(response)
+        self.metrics.count("source_tables_mapped", len(source_schema))
+        if self.cache is None:
+            return self._request_mappings(source_schema, target_schema, business_context)
+
+        key = self.cache.mapping_key(source_schema, target_schema, business_context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.metrics.count("mapping_cache_hits")
+            return self._mapping_from_dict(cached)
+
+        target_fingerprint = schema_fingerprint(target_schema)
+        table_keys = {t.table_name: self.cache.table_key(t, target_fingerprint, business_context)
+                      for t in source_schema}
+        reused: Dict[str, Dict] = {}
+        missing = []
+        for table in source_schema:
+            entry = self.cache.get(table_keys[table.table_name])
+            if entry is None:
+                missing.append(table)
+            else:
+                reused[table.table_name] = entry
+        self.metrics.count("table_cache_hits", len(reused))
+
+        fresh = None
+        if missing or not source_schema:
+            fresh = self._request_mappings(missing, target_schema, business_context)
+            meta = self._mapping_meta(fresh)
+            for table in missing:
+                table_mappings = [table_mapping_to_dict(t) for t in fresh.table_mappings
+                                  if t.source_table == table.table_name]
+                self.cache.put(table_keys[table.table_name], dict(meta, table_mappings=table_mappings))
+
+        mapping = self._merge_table_results(source_schema, reused, fresh)
+        self.cache.put(key, mapping_to_dict(mapping))
+        return mapping
+
+    def _request_mappings(
+        self,
+        source_schema: List[TableSchema],
+        target_schema: List[TableSchema],
+        business_context: str
+    ) -> MigrationMapping:
+        """
+        Runs one prompt → model → parse round trip, or a set of concurrent
+        partitioned round trips when partition_size is configured.
+
+        When a pre-matcher is configured, confidently matched tables are
+        accepted without the model and the remaining tables are sent with only
+        their candidate target tables.
+
+        Args:
+            source_schema: Source tables to map.
+            target_schema: Candidate target tables.
+            business_context: Business use case driving the migration.
+
+        Returns:
+            MigrationMapping parsed from the model response.
+        """
+        order = {t.table_name: i for i, t in enumerate(source_schema)}
+        partials = []
+        candidates = None
+        if self.prematcher is not None:
+            with self.metrics.span("prematch"):
+                prematch = self.prematcher.match(source_schema, target_schema)
+            self.metrics.count("prematched_tables", len(prematch.accepted))
+            candidates = prematch.candidates
+            source_schema = [t for t in source_schema if t.table_name in candidates]
+            if prematch.accepted or not source_schema:
+                partials.append(MigrationMapping(
+                    source_system="SourceSystem",
+                    target_system="TargetSystem",
+                    confidence_score=1.0,
+                    table_mappings=prematch.accepted,
+                    notes="Pre-matched deterministically"
+                ))
+            if not source_schema:
+                return partials[0]
+
+        budget_partitions = self._budget_partitions(source_schema, target_schema, business_context, candidates)
+        if budget_partitions is not None or (self.partition_size and len(source_schema) > self.partition_size):
+            with self.metrics.span("model_requests"):
+                model_mapping = asyncio.run(self._request_partitioned(
+                    source_schema, target_schema, business_context, candidates, budget_partitions))
+        else:
+            if candidates is not None:
+                names = {name for t in source_schema for name in candidates[t.table_name]}
+                target_schema = [t for t in target_schema if t.table_name in names]
+            with self.metrics.span("build_prompt"):
+                prompt = self._prepare_mapping_context(source_schema, target_schema, business_context)
+            with self.metrics.span("model_requests"):
+                response = self._timed_call(prompt)
+            with self.metrics.span("parse_response"):
+                model_mapping = self._parse_ai_mapping_response(response)
+        if not partials:
+            return model_mapping
+
+        mapping = self._merge_partial_mappings([model_mapping] + partials)
+        mapping.table_mappings.sort(key=lambda t: order.get(t.source_table, len(order)))
+        return mapping
+
+    async def _request_partitioned(
+        self,
+        source_schema: List[TableSchema],
+        target_schema: List[TableSchema],
+        business_context: str,
+        candidates: Optional[Dict[str, List[str]]] = None,
+        partitions: Optional[List[List[TableSchema]]] = None
+    ) -> MigrationMapping:
+        """
+        Sends one request per partition of related source tables concurrently
+        and merges the partial results.
+
+        Args:
+            source_schema: Source tables to map.
+            target_schema: Full target schema.
+            business_context: Business use case driving the migration.
+            candidates: Candidate target tables per source table; computed
+                from name overlap when None.
+            partitions: Source table partitions; foreign-key clusters of at
+                most partition_size tables when None.
+
+        Returns:
+            Merged MigrationMapping.
+        """
+        if partitions is None:
+            partitions = self._partition_source_tables(source_schema)
+        if candidates is None:
+            candidates = self._candidate_target_tables(source_schema, target_schema)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = _RateLimiter(self.requests_per_second)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            async def request(partition: List[TableSchema]) -> str:
+                names: Set[str] = set()
+                for table in partition:
+                    names.update(candidates[table.table_name])
+                targets = [t for t in target_schema if t.table_name in names]
+                prompt = self._prepare_mapping_context(partition, targets, business_context)
+                async with semaphore:
+                    return await self._call_with_retries(prompt, pool, limiter)
+
+            responses = await asyncio.gather(*(request(p) for p in partitions))
+        return self._merge_partial_mappings([self._parse_ai_mapping_response(r) for r in responses])
+
+    async def _call_with_retries(self, prompt: str, pool: ThreadPoolExecutor, limiter: "_RateLimiter") -> str:
+        """
+        Calls the model off the event loop, retrying failures with exponential
+        backoff and jitter. Responses that cannot be parsed count as failures.
+
+        Args:
+            prompt: AI input string.
+            pool: Thread pool running the blocking model call.
+            limiter: Shared request rate limiter.
+
+        Returns:
+            Raw JSON response.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await limiter.wait()
+            try:
+                response = await loop.run_in_executor(pool, self._timed_call, prompt)
+                self._decode_response(response)
+                return response
+            except Exception:
+                if attempt == self.max_retries:
+                    self.metrics.count("model_failures")
+                    raise
+                self.metrics.count("model_retries")
+                delay = self.backoff_seconds * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+
+    def _budget_partitions(
+        self,
+        source_schema: List[TableSchema],
+        target_schema: List[TableSchema],
+        business_context: str,
+        candidates: Optional[Dict[str, List[str]]] = None
+    ) -> Optional[List[List[TableSchema]]]:
+        """
+        Splits the source tables into requests that fit max_prompt_tokens
+        when a single prompt with all tables would not.
+
+        Every request carries only the candidate target tables of its source
+        tables. Sizes are estimated from the prompts of the individual tables,
+        so a request may exceed the budget slightly; a single table larger
+        than the budget becomes a request of its own.
+
+        Args:
+            source_schema: Source tables to map.
+            target_schema: Candidate target tables.
+            business_context: Business use case driving the migration.
+            candidates: Candidate target tables per source table; computed
+                from name overlap when None.
+
+        Returns:
+            List of source table partitions, or None when no split is needed.
+        """
+        if not self.max_prompt_tokens or len(source_schema) < 2:
+            return None
+        prompt = self._prepare_mapping_context(source_schema, target_schema, business_context, truncate=False)
+        if estimate_tokens(prompt) <= self.max_prompt_tokens:
+            return None
+        if candidates is None:
+            candidates = self._candidate_target_tables(source_schema, target_schema)
+        base = estimate_tokens(self._prepare_mapping_context([], [], business_context, truncate=False))
+        empty = estimate_tokens(self._prepare_mapping_context([], [], "", truncate=False))
+        cost = {id(t): estimate_tokens(self._prepare_mapping_context([t], [], "", truncate=False)) - empty
+                for t in source_schema + target_schema}
+        targets = {t.table_name: t for t in target_schema}
+        partitions: List[List[TableSchema]] = []
+        current: List[TableSchema] = []
+        used = base
+        seen: Set[str] = set()
+        for table in source_schema:
+            new_targets = [targets[n] for n in candidates[table.table_name] if n in targets and n not in seen]
+            needed = cost[id(table)] + sum(cost[id(t)] for t in new_targets)
+            if current and used + needed > self.max_prompt_tokens:
+                partitions.append(current)
+                current, used, seen = [], base, set()
+                new_targets = [targets[n] for n in candidates[table.table_name] if n in targets]
+                needed = cost[id(table)] + sum(cost[id(t)] for t in new_targets)
+            current.append(table)
+            used += needed
+            seen.update(t.table_name for t in new_targets)
+        partitions.append(current)
+        self.metrics.count("budget_split_requests", len(partitions))
+        return partitions
+
+    def _partition_source_tables(self, source_schema: List[TableSchema]) -> List[List[TableSchema]]:
+        """
+        Groups source tables into clusters connected by foreign keys, then
+        splits clusters into partitions of at most partition_size tables.
+
+        Args:
+            source_schema: Source tables to map.
+
+        Returns:
+            List of partitions in source schema order.
+        """
+        parent = {t.table_name: t.table_name for t in source_schema}
+
+        def find(name: str) -> str:
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for table in source_schema:
+            for reference in (table.relationships or {}).values():
+                referenced = reference.split("(", 1)[0]
+                if referenced in parent:
+                    parent[find(table.table_name)] = find(referenced)
+
+        clusters: Dict[str, List[TableSchema]] = {}
+        for table in source_schema:
+            clusters.setdefault(find(table.table_name), []).append(table)
+        size = self.partition_size or len(source_schema) or 1
+        partitions = []
+        current: List[TableSchema] = []
+        for cluster in clusters.values():
+            for start in range(0, len(cluster), size):
+                piece = cluster[start:start + size]
+                if len(current) + len(piece) > size:
+                    partitions.append(current)
+                    current = []
+                current.extend(piece)
+        if current:
+            partitions.append(current)
+        return partitions
+
+    def _candidate_target_tables(
+        self,
+        source_schema: List[TableSchema],
+        target_schema: List[TableSchema]
+    ) -> Dict[str, List[str]]:
+        """
+        Picks the most similar target tables for every source table, scoring
+        character trigram overlap of table and field names.
+
+        Args:
+            source_schema: Source tables.
+            target_schema: Target tables.
+
+        Returns:
+            Dict of source table name -> candidate target table names.
+        """
+        target_grams = [(t.table_name, _trigrams(t.table_name), {f.name.lower() for f in t.fields})
+                        for t in target_schema]
+        candidates = {}
+        for table in source_schema:
+            grams = _trigrams(table.table_name)
+            fields = {f.name.lower() for f in table.fields}
+            scored = []
+            for name, target_table_grams, target_fields in target_grams:
+                name_score = len(grams & target_table_grams) / (len(grams | target_table_grams) or 1)
+                field_score = len(fields & target_fields) / (len(fields | target_fields) or 1)
+                scored.append((name_score + field_score, name))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            candidates[table.table_name] = [name for _, name in scored[:self.candidate_targets]]
+        return candidates
+
+    def _merge_partial_mappings(self, partials: List[MigrationMapping]) -> MigrationMapping:
+        """
+        Merges the results of partitioned requests into one MigrationMapping.
+
+        The confidence score is the lowest partial score; duplicate table
+        mappings are kept once.
+
+        Args:
+            partials: Parsed MigrationMapping per partition.
+
+        Returns:
+            Merged MigrationMapping.
+        """
+        seen = set()
+        table_mappings = []
+        for partial in partials:
+            for t in partial.table_mappings:
+                if (t.source_table, t.target_table) not in seen:
+                    seen.add((t.source_table, t.target_table))
+                    table_mappings.append(t)
+        scores = [p.confidence_score for p in partials if p.confidence_score is not None]
+        notes = []
+        for p in partials:
+            if p.notes and p.notes not in notes:
+                notes.append(p.notes)
+        return MigrationMapping(
+            source_system=partials[0].source_system,
+            target_system=partials[0].target_system,
+            confidence_score=min(scores) if scores else None,
+            table_mappings=table_mappings,
+            notes="\n".join(notes)
+        )
+
+    def _merge_table_results(
+        self,
+        source_schema: List[TableSchema],
+        reused: Dict[str, Dict],
+        fresh: Optional[MigrationMapping]
+    ) -> MigrationMapping:
+        """
+        Combines cached per-table entries with a fresh model result.
+
+        Table mappings follow the order of the source schema; fresh mappings
+        for tables outside the source schema are appended at the end.
+
+        Args:
+            source_schema: Full source schema.
+            reused: Cached per-table entries keyed by source table name.
+            fresh: MigrationMapping from the model for the uncached tables.
+
+        Returns:
+            Merged MigrationMapping.
+        """
+        meta = self._mapping_meta(fresh) if fresh else next(iter(reused.values()))
+        fresh_tables = fresh.table_mappings if fresh else []
+        table_mappings = []
+        for table in source_schema:
+            if table.table_name in reused:
+                table_mappings.extend(self._table_mapping_from_dict(t) for t in reused[table.table_name]["table_mappings"])
+            else:
+                table_mappings.extend(t for t in fresh_tables if t.source_table == table.table_name)
+        known = {t.table_name for t in source_schema}
+        table_mappings.extend(t for t in fresh_tables if t.source_table not in known)
+        return MigrationMapping(
+            source_system=meta["source_system"],
+            target_system=meta["target_system"],
+            confidence_score=meta.get("confidence_score"),
+            table_mappings=table_mappings,
+            notes=meta.get("notes", "")
+        )
+
+    def _mapping_meta(self, mapping: MigrationMapping) -> Dict:
+        """
+        Extracts the run-level attributes of a mapping for caching.
+
+        Args:
+            mapping: MigrationMapping object.
+
+        Returns:
+            Dict with system names, confidence score and notes.
+        """
+        return {
+            "source_system": mapping.source_system,
+            "target_system": mapping.target_system,
+            "confidence_score": mapping.confidence_score,
+            "notes": mapping.notes,
+        }
 
     def _prepare_mapping_context(
         self,
         source: List[TableSchema],
         target: List[TableSchema],
-        context: str
+        context: str,
+        truncate: bool = True
     ) -> str:
         """
-        Prepares AI prompt string.
+        Prepares AI prompt string in the configured prompt format.
 
         Args:
             source: Source schema.
             target: Target schema.
             context: Business context string.
+            truncate: When False, compact prompts are not truncated to
+                max_prompt_tokens (used to measure them).
 
         Returns:
             Prompt string.
         """
+        if self.prompt_format == "compact":
+            return encode_mapping_prompt(source, target, context, self.max_prompt_tokens if truncate else None)
         return json.dumps({
-            "source": [t.__dict__ for t in source],
-            "target": [t.__dict__ for t in target],
+            "source": [asdict(t) for t in source],
+            "target": [asdict(t) for t in target],
             "business_context": context
         })
 
+    def _timed_call(self, prompt: str) -> str:
+        """
+        Calls the model and records the prompt size, estimated prompt tokens
+        and response latency.
+
+        Args:
+            prompt: AI input string.
+
+        Returns:
+            JSON response.
+        """
+        if not self.metrics.enabled:
+            return self._call_ai_for_mappings(prompt)
+        self.metrics.count("model_requests")
+        self.metrics.count("prompt_bytes", len(prompt.encode("utf-8")))
+        tokens = estimate_tokens(prompt)
+        self.metrics.count("prompt_tokens", tokens)
+        self.metrics.observe("prompt_tokens_per_request", tokens)
+        start = time.perf_counter()
+        try:
+            return self._call_ai_for_mappings(prompt)
+        finally:
+            self.metrics.observe("model_latency_seconds", time.perf_counter() - start)
+
     def _call_ai_for_mappings(self, prompt: str) -> str:
         """
-        Placeholder function to simulate AI response.
+        Sends the prompt to the configured model endpoint, or simulates an AI
+        response when no endpoint is configured.
 
         Args:
             prompt: AI input string.
 
         Returns:
-            Simulated JSON response.
+            JSON response.
         """
+        if self.endpoint:
+            request = urllib.request.Request(
+                self.endpoint,
+                data=json.dumps({"prompt": prompt}).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read().decode("utf-8")
+
         # Simulated AI output
         return json.dumps({
             "source_system": "SourceSystem",
@@ -92,31 +576,84 @@ class GenAIMappingEngine:
 
     def _parse_ai_mapping_response(self, response: str) -> MigrationMapping:
         """
-        Parses the AI JSON response into data model objects.
+        Parses the AI response into data model objects.
 
         Args:
-            response: Raw JSON string from GenAI.
+            response: Raw JSON or compact-format string from GenAI.
 
         Returns:
             MigrationMapping instance.
         """
-        data = json.loads(response)
-        table_mappings = []
-        for t in data.get("table_mappings", []):
-            field_mappings = [
-                FieldMapping(**f) for f in t.get("field_mappings", [])
-            ]
-            table_mappings.append(TableMapping(
-                source_table=t["source_table"],
-                target_table=t["target_table"],
-                field_mappings=field_mappings,
-                strategy=t.get("strategy"),
-                complexity=t.get("complexity")
-            ))
-        return MigrationMapping(
-            source_system=data["source_system"],
-            target_system=data["target_system"],
-            confidence_score=data.get("confidence_score"),
-            table_mappings=table_mappings,
-            notes=data.get("notes", "")
-        )
+        return self._mapping_from_dict(self._decode_response(response))
+
+    def _decode_response(self, response: str) -> Dict:
+        """
+        Decodes a JSON response, or a compact-format response when the
+        compact prompt format is configured.
+
+        Args:
+            response: Raw response string.
+
+        Returns:
+            Mapping dict.
+        """
+        if self.prompt_format == "compact" and not response.lstrip().startswith("{"):
+            return decode_mapping_response(response)
+        return json.loads(response)
+
+    def _mapping_from_dict(self, data: Dict) -> MigrationMapping:
+        """
+        Builds a MigrationMapping from its dict form (model response or cache entry).
+
+        Args:
+            data: Dict with the MigrationMapping attributes.
+
+        Returns:
+            MigrationMapping instance.
+        """
+        return mapping_from_dict(data)
+
+    def _table_mapping_from_dict(self, t: Dict) -> TableMapping:
+        """
+        Builds a TableMapping from its dict form.
+
+        Args:
+            t: Dict with the TableMapping attributes.
+
+        Returns:
+            TableMapping instance.
+        """
+        return table_mapping_from_dict(t)
+
+
+class _RateLimiter:
+    """
+    Spaces request starts so that at most ``rate`` requests begin per second.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """
+        Sleeps until the next request slot is available.
+        """
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _trigrams(name: str) -> Set[str]:
+    """
+    Returns the character trigrams of a padded, lower-cased name.
+    """
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -1,35 +1,230 @@
-import streamlit as st
+"""
+app.py
+
+Streamlit tester that loads a saved migration mapping (migration_mapping.json,
+or the binary .mmap/.bin format) and generates its SQL scripts.
+
+Streamlit reruns the script on every widget change, so the parsed mapping and
+the generated scripts are cached by the SHA-256 of the upload. Tables are
+searched and paginated instead of rendered all at once. The scripts are
+generated table by table on a background thread into files that are offered
+as downloads, with only a short preview rendered inline.
+
+Run with:  streamlit run app.py
+"""
+
+import hashlib
+import io
 import json
+import os
+import tempfile
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+import streamlit as st
+from mapping_io import BINARY_MAGIC, mapping_from_dict, read_mapping_binary
+from models import MigrationMapping, TableMapping
+from run_manifest import table_key
+from sql_dialects import DIALECTS, get_dialect
 from sql_generator import SQLGenerator
-from models import TableSchema
+from sql_writer import SQLArtifactWriter
 
-st.title("SQL Generation Tester")
+SQL_SCRIPTS = ("migration.sql", "validation.sql", "rollback.sql")
+PAGE_SIZES = (25, 50, 100, 250)
+PREVIEW_LINES = 100
+POLL_SECONDS = 0.5
+CACHED_UPLOADS = 4
 
-# Upload JSON
-uploaded_file = st.file_uploader("Upload JSON Mapping File", type=["json"])
 
-if uploaded_file:
-    try:
-        raw_json = json.load(uploaded_file)
-        st.subheader("Parsed JSON Input")
-        st.json(raw_json)
+class GenerationJob:
+    """
+    Generates the SQL scripts of a mapping on a background thread.
+
+    Every table mapping is generated on its own, so the progress (done/total
+    table sections) can be shown while the job runs and the scripts never have
+    to be held in memory as a whole.
+    """
+
+    def __init__(self, mapping: MigrationMapping, dialect: str):
+        """
+        Args:
+            mapping: MigrationMapping to generate the scripts of.
+            dialect: Name of the SQL dialect.
+        """
+        self.mapping = mapping
+        self.generator = SQLGenerator(dialect=get_dialect(dialect))
+        self.directory = tempfile.mkdtemp(prefix="sql_tester_")
+        self.total = len(mapping.table_mappings) * len(SQL_SCRIPTS)
+        self.done = 0
+        self.error: Optional[str] = None
+        self.finished = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def path(self, name: str) -> str:
+        """
+        Returns the path of a generated script.
+        """
+        return os.path.join(self.directory, name)
+
+    def _run(self):
+        """
+        Writes the scripts section by section, counting finished sections.
+        """
+        try:
+            for name in SQL_SCRIPTS:
+                with SQLArtifactWriter(self.directory, name) as writer:
+                    for table_map in self.mapping.table_mappings:
+                        writer.begin_table(table_key(table_map.source_table, table_map.target_table))
+                        for statement in self._statements(name, table_map):
+                            writer.write(statement)
+                        self.done += 1
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.finished = True
+
+    def _statements(self, name: str, table_map: TableMapping) -> Iterator[str]:
+        """
+        Yields the statements of one script for a single table mapping.
+        """
+        mapping = MigrationMapping(self.mapping.source_system, self.mapping.target_system,
+                                   self.mapping.confidence_score, [table_map], self.mapping.notes)
+        if name == "validation.sql":
+            return self.generator.iter_validation_sql(mapping)
+        if name == "rollback.sql":
+            return self.generator.iter_rollback_sql(mapping)
+        return self.generator.iter_migration_sql(mapping)
+
+
+@st.cache_resource(max_entries=CACHED_UPLOADS, show_spinner="Parsing mapping...")
+def load_upload(digest: str, _data: bytes) -> Dict:
+    """
+    Parses an uploaded mapping once per upload hash.
 
-        # Validate schema using Pydantic
-        schema = TableSchema(**raw_json)
+    Args:
+        digest: SHA-256 of the upload, used as the cache key.
+        _data: Uploaded bytes (not hashed by Streamlit).
 
-        # Generate SQL using class
-        sql_gen = SQLGenerator()
-        sql_script = sql_gen.generate_migration_sql(schema)
+    Returns:
+        Dict with the MigrationMapping and the lower-case search text of
+        every table mapping (table and field names).
+    """
+    if _data[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        mapping = read_mapping_binary(io.BytesIO(_data))
+    else:
+        mapping = mapping_from_dict(json.loads(_data))
+    search_text = [
+        " ".join([t.source_table, t.target_table] +
+                 [f"{f.source_field} {f.target_field}" for f in t.field_mappings]).lower()
+        for t in mapping.table_mappings
+    ]
+    return {"mapping": mapping, "search_text": search_text}
 
-        st.subheader("🔧 Generated SQL Script")
-        st.code(sql_script, language="sql")
 
-        st.subheader("🧠 Explanation")
-        st.markdown(f"- This script creates a table named **`{schema.table_name}`**.")
-        st.markdown("- It includes the following columns:")
+@st.cache_resource(max_entries=CACHED_UPLOADS, show_spinner=False)
+def generation_job(digest: str, dialect: str, _mapping: MigrationMapping) -> GenerationJob:
+    """
+    Starts (once per upload hash and dialect) the background SQL generation.
 
-        for col in schema.columns:
-            st.markdown(f"  - **{col.name}**: `{col.type}`")
+    Args:
+        digest: SHA-256 of the upload, used as the cache key.
+        dialect: Name of the SQL dialect.
+        _mapping: Parsed mapping (not hashed by Streamlit).
 
+    Returns:
+        Running or finished GenerationJob.
+    """
+    return GenerationJob(_mapping, dialect)
+
+
+def render_tables(mapping: MigrationMapping, search_text: List[str]):
+    """
+    Shows one page of the table mappings matching the search, and the field
+    mappings of a selected table.
+    """
+    st.subheader("Table mappings")
+    query = st.text_input("Search tables and columns").strip().lower()
+    matches = [i for i, text in enumerate(search_text) if query in text] if query else \
+        list(range(len(search_text)))
+    left, right = st.columns(2)
+    page_size = left.selectbox("Tables per page", PAGE_SIZES, index=1)
+    pages = max(1, -(-len(matches) // page_size))
+    page = right.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    shown = matches[(page - 1) * page_size:page * page_size]
+    st.caption(f"{len(matches)} of {len(search_text)} table mappings match")
+    if not shown:
+        return
+
+    tables = mapping.table_mappings
+    st.dataframe([{
+        "source_table": tables[i].source_table,
+        "target_table": tables[i].target_table,
+        "strategy": tables[i].strategy,
+        "complexity": tables[i].complexity,
+        "fields": len(tables[i].field_mappings),
+    } for i in shown], use_container_width=True, hide_index=True)
+
+    selected = st.selectbox("Field mappings of", shown,
+                            format_func=lambda i: f"{tables[i].source_table} → {tables[i].target_table}")
+    st.dataframe([{
+        "source_field": f.source_field,
+        "target_field": f.target_field,
+        "transformation": f.transformation or "",
+    } for f in tables[selected].field_mappings], use_container_width=True, hide_index=True)
+
+
+def render_sql(digest: str, mapping: MigrationMapping, dialect: str):
+    """
+    Shows the progress of the background generation, then download buttons
+    and short previews of the generated scripts.
+    """
+    st.subheader("Generated SQL")
+    job = generation_job(digest, dialect, mapping)
+    if not job.finished:
+        fraction = job.done / job.total if job.total else 1.0
+        st.progress(fraction, text=f"Generating SQL: {job.done} of {job.total} table sections")
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+    if job.error:
+        st.error(f"❌ SQL generation failed: {job.error}")
+        return
+
+    for name in SQL_SCRIPTS:
+        path = job.path(name)
+        with open(path, "rb") as f:
+            st.download_button(f"Download {name} ({os.path.getsize(path):,} bytes)", f,
+                               file_name=name, mime="application/sql", key=f"download_{name}")
+        with st.expander(f"Preview of {name} (first {PREVIEW_LINES} lines)"):
+            with open(path, "r", encoding="utf-8") as f:
+                st.code("".join(islice(f, PREVIEW_LINES)), language="sql")
+
+
+st.title("SQL Generation Tester")
+
+dialect = st.sidebar.selectbox("SQL dialect", sorted(DIALECTS))
+uploaded_file = st.file_uploader("Upload Mapping File", type=["json", "mmap", "bin"])
+
+if uploaded_file:
+    data = uploaded_file.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        loaded = load_upload(digest, data)
     except Exception as e:
         st.error(f"❌ Error processing file: {e}")
+        st.stop()
+
+    mapping = loaded["mapping"]
+    tables, fields, confidence = st.columns(3)
+    tables.metric("Table mappings", f"{len(mapping.table_mappings):,}")
+    fields.metric("Field mappings", f"{sum(len(t.field_mappings) for t in mapping.table_mappings):,}")
+    confidence.metric("Confidence", "n/a" if mapping.confidence_score is None else f"{mapping.confidence_score:.2f}")
+    st.caption(f"{mapping.source_system} → {mapping.target_system}")
+    if mapping.notes:
+        with st.expander("Notes"):
+            st.text(mapping.notes)
+
+    render_tables(mapping, loaded["search_text"])
+    render_sql(digest, mapping, dialect)
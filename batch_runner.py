@@ -0,0 +1,246 @@
+"""
+batch_runner.py
+
+Runs the migration workflow for many source/target pairs listed in a JSON or
+YAML manifest, on a pool of worker processes inside one invocation.
+
+Every worker process keeps one MappingCache and one parsed-schema cache for
+all the jobs it runs, so a target schema shared by hundreds of jobs is parsed
+once per worker. The mapping cache also has an on-disk tier shared by all
+workers. A failing job is recorded in the summary report and does not stop
+the others.
+
+Manifest format (paths are relative to the manifest file)::
+
+    defaults:
+      target: target_schema.csv
+      context: Divestiture of the billing applications
+      dialect: postgresql
+    jobs:
+      - name: billing_eu
+        source: billing_eu.sql
+        output: out/billing_eu
+      - source: billing_us.sql        # name defaults to "billing_us",
+                                      # output to "<name>"
+"""
+
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+from mapping_cache import MappingCache
+from models import BatchJob, BatchJobResult
+
+SUMMARY_FILE = "batch_summary.json"
+CACHE_DIR = ".mapping_cache"
+JOB_KEYS = ("name", "source", "target", "context", "output")
+JOB_OPTIONS = ("batch_size", "prematch", "split_bytes", "split_by_table", "compress", "dialect", "run_id")
+MANIFEST_KEYS = ("defaults", "jobs", "summary", "cache_dir", "workers")
+
+# Per-process state set up by _init_worker and reused by every job of the worker.
+_worker: Dict = {}
+
+
+def load_manifest(manifest_file: str, options: Optional[Dict] = None) -> Tuple[List[BatchJob], Dict]:
+    """
+    Reads a batch manifest.
+
+    The manifest is either a list of jobs or a mapping with "jobs", optional
+    "defaults" merged into every job, and optional "summary", "cache_dir" and
+    "workers" settings. YAML manifests (.yaml, .yml) need PyYAML.
+
+    Args:
+        manifest_file: Path to the .json, .yaml or .yml manifest.
+        options: Orchestrator options applied to every job unless the
+            manifest sets them (e.g. from command-line flags).
+
+    Returns:
+        Tuple of the jobs and the manifest settings, with paths resolved.
+
+    Raises:
+        ValueError: When the manifest is malformed.
+    """
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    if manifest_file.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML manifests need PyYAML (pip install pyyaml); use a .json manifest instead")
+        data = yaml.safe_load(content)
+    else:
+        data = json.loads(content)
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ValueError(f"{manifest_file}: expected a list of jobs or a mapping with a 'jobs' list")
+    _check_keys(manifest_file, data, MANIFEST_KEYS)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    defaults = dict(data.get("defaults") or {})
+    _check_keys(manifest_file, defaults, JOB_KEYS + JOB_OPTIONS)
+    jobs = []
+    for index, entry in enumerate(data["jobs"]):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{manifest_file}: job {index + 1} is not a mapping")
+        _check_keys(f"{manifest_file} job {index + 1}", entry, JOB_KEYS + JOB_OPTIONS)
+        spec = dict(defaults, **entry)
+        missing = [key for key in ("source", "target", "context") if not spec.get(key)]
+        if missing:
+            raise ValueError(f"{manifest_file}: job {index + 1} has no {', '.join(missing)}")
+        name = str(spec.get("name") or os.path.splitext(os.path.basename(spec["source"]))[0])
+        job_options = {k: v for k, v in (options or {}).items() if v is not None and v is not False}
+        job_options.update({k: spec[k] for k in JOB_OPTIONS if k in spec})
+        jobs.append(BatchJob(
+            name=name,
+            source_file=os.path.join(base_dir, spec["source"]),
+            target_file=os.path.join(base_dir, spec["target"]),
+            business_context=spec["context"],
+            output_dir=os.path.join(base_dir, spec.get("output") or name),
+            options=job_options,
+        ))
+
+    seen: Dict[str, str] = {}
+    for job in jobs:
+        output_dir = os.path.normpath(job.output_dir)
+        if output_dir in seen:
+            raise ValueError(f"{manifest_file}: jobs {seen[output_dir]!r} and {job.name!r} share {job.output_dir}")
+        seen[output_dir] = job.name
+
+    settings = {
+        "summary": os.path.join(base_dir, data.get("summary") or SUMMARY_FILE),
+        "cache_dir": os.path.join(base_dir, data.get("cache_dir") or CACHE_DIR),
+        "workers": data.get("workers"),
+    }
+    return jobs, settings
+
+
+def run_job(job: BatchJob) -> BatchJobResult:
+    """
+    Runs the workflow of one job, catching its errors.
+
+    Args:
+        job: BatchJob to run.
+
+    Returns:
+        BatchJobResult with status "ok" or "failed".
+    """
+    from orchestrator import MigrationOrchestrator
+    if not _worker:
+        _init_worker(None)
+    metrics = None
+    if _worker["metrics"]:
+        from instrumentation import RunMetrics
+        metrics = RunMetrics(trace_memory=_worker["trace_memory"])
+    started = time.perf_counter()
+    try:
+        orchestrator = MigrationOrchestrator(metrics=metrics, mapping_cache=_worker["mapping_cache"],
+                                             schema_cache=_worker["schema_cache"], **job.options)
+        mapping = orchestrator.execute_migration_workflow(
+            source_file=job.source_file,
+            target_file=job.target_file,
+            business_context=job.business_context,
+            output_dir=job.output_dir
+        )
+        return BatchJobResult(job.name, job.output_dir, "ok", time.perf_counter() - started,
+                              table_mappings=len(mapping.table_mappings), worker=os.getpid())
+    except Exception:
+        return BatchJobResult(job.name, job.output_dir, "failed", time.perf_counter() - started,
+                              error=traceback.format_exc(), worker=os.getpid())
+    finally:
+        if metrics is not None:
+            metrics.stop()
+
+
+def run_batch(jobs: List[BatchJob], workers: Optional[int] = None, cache_dir: Optional[str] = None,
+              summary_file: Optional[str] = None, metrics: bool = False, trace_memory: bool = False,
+              on_result: Optional[Callable[[BatchJobResult], None]] = None) -> Dict:
+    """
+    Runs batch jobs on a process pool and builds the summary report.
+
+    Args:
+        jobs: Jobs to run.
+        workers: Number of worker processes; defaults to the CPU count. With
+            one worker the jobs run in the calling process.
+        cache_dir: On-disk tier of the mapping cache shared by all workers;
+            memory only (per worker) when None.
+        summary_file: When set, the summary is written to this JSON file.
+        metrics: When True, every job writes its own run_metrics.json.
+        trace_memory: Record peak memory per stage in the job metrics.
+        on_result: Called with every result as soon as its job finishes.
+
+    Returns:
+        Summary dict with job counts, timings and the per-job results in
+        manifest order.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    started = time.perf_counter()
+    results: List[Optional[BatchJobResult]] = [None] * len(jobs)
+    if workers == 1:
+        _init_worker(cache_dir, metrics, trace_memory)
+        try:
+            for index, job in enumerate(jobs):
+                results[index] = run_job(job)
+                if on_result:
+                    on_result(results[index])
+        finally:
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(cache_dir, metrics, trace_memory)) as pool:
+            futures = {pool.submit(run_job, job): index for index, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:  # the worker process died (BrokenProcessPool)
+                    job = jobs[index]
+                    result = BatchJobResult(job.name, job.output_dir, "failed", 0.0, error=repr(exc))
+                results[index] = result
+                if on_result:
+                    on_result(result)
+
+    job_seconds = [r.seconds for r in results]
+    summary = {
+        "jobs": len(results),
+        "succeeded": sum(r.status == "ok" for r in results),
+        "failed": sum(r.status != "ok" for r in results),
+        "workers": workers,
+        "seconds": time.perf_counter() - started,
+        "job_seconds": {
+            "total": sum(job_seconds),
+            "max": max(job_seconds, default=0.0),
+            "mean": sum(job_seconds) / len(job_seconds) if job_seconds else 0.0,
+        },
+        "results": [asdict(r) for r in results],
+    }
+    if summary_file:
+        os.makedirs(os.path.dirname(os.path.abspath(summary_file)), exist_ok=True)
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+def _init_worker(cache_dir: Optional[str], metrics: bool = False, trace_memory: bool = False):
+    """
+    Sets up the caches shared by every job of this process.
+    """
+    _worker.clear()
+    _worker.update(
+        mapping_cache=MappingCache(cache_dir),
+        schema_cache={},
+        metrics=metrics or trace_memory,
+        trace_memory=trace_memory,
+    )
+
+
+def _check_keys(where: str, entry: Dict, allowed: Tuple[str, ...]):
+    """
+    Rejects unknown manifest keys, which are most likely typos.
+    """
+    unknown = sorted(set(entry) - set(allowed))
+    if unknown:
+        raise ValueError(f"{where}: unknown key(s) {', '.join(unknown)}")
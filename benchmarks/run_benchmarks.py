@@ -0,0 +1,216 @@
+"""
+benchmarks/run_benchmarks.py
+
+Times and measures peak memory of the parser, mapping engine, SQL generator
+and full orchestrator on synthetic workloads of increasing size, writes the
+results as JSON and flags regressions against a stored baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks --tiers small medium
+    python -m benchmarks.run_benchmarks --tiers small --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+from ai_mapping_engine import GenAIMappingEngine
+from mapping_io import load_mapping
+from orchestrator import MigrationOrchestrator
+from schema_parser import SchemaAnalyzer
+from sql_generator import SQLGenerator
+from benchmarks.synthetic import WorkloadSpec, write_workload
+
+TIERS = {
+    "small": WorkloadSpec(tables=50, columns=10, foreign_keys=1, csv_rows=1000),
+    "medium": WorkloadSpec(tables=500, columns=20, foreign_keys=2, csv_rows=10000),
+    "large": WorkloadSpec(tables=3000, columns=30, foreign_keys=3, csv_rows=100000),
+}
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+
+
+def measure(fn: Callable[[], object], repeat: int = 3, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Times a callable and measures its peak traced memory.
+
+    Timing runs are separate from the traced run, so tracemalloc overhead
+    does not distort the reported seconds.
+
+    Args:
+        fn: Code under test.
+        repeat: Number of timed runs.
+        setup: Optional untimed callable run before every call of fn.
+
+    Returns:
+        Dict with "seconds" (best run), "mean_seconds" and "peak_bytes".
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings), "peak_bytes": peak}
+
+
+def run_tier(spec: WorkloadSpec, workdir: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Runs every benchmark on one workload tier.
+
+    Args:
+        spec: Workload size.
+        workdir: Scratch directory for inputs and outputs.
+        repeat: Timed runs per benchmark.
+
+    Returns:
+        Dict of benchmark name -> measurements.
+    """
+    paths = write_workload(os.path.join(workdir, "input"), spec)
+    parser = SchemaAnalyzer()
+    generator = SQLGenerator()
+    with open(paths["source_sql"], encoding="utf-8") as f:
+        ddl = f.read()
+    with open(paths["source_json"], encoding="utf-8") as f:
+        json_text = f.read()
+    with open(paths["source_csv"], encoding="utf-8") as f:
+        csv_text = f.read()
+    source = parser.parse_sql_file(paths["source_sql"])
+    target = parser.parse_sql_file(paths["target_sql"])
+    mapping = load_mapping(paths["mapping"])
+    output_dir = os.path.join(workdir, "output")
+
+    def fresh_output():
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    def run_workflow():
+        MigrationOrchestrator().execute_migration_workflow(
+            paths["source_sql"], paths["target_sql"], "Synthetic benchmark migration", output_dir)
+
+    results = {
+        "parse_sql_schema": measure(lambda: parser.parse_sql_schema(ddl), repeat),
+        "parse_sql_file": measure(lambda: parser.parse_sql_file(paths["source_sql"]), repeat),
+        "parse_json_schema": measure(lambda: parser.parse_json_schema(json_text), repeat),
+        "parse_json_file": measure(lambda: parser.parse_json_file(paths["source_json"]), repeat),
+        "parse_json_file_mmap": measure(lambda: parser.parse_json_file(paths["source_json"], use_mmap=True), repeat),
+        "parse_csv_schema": measure(lambda: parser.parse_csv_schema(csv_text), repeat),
+        "generate_mappings": measure(
+            lambda: GenAIMappingEngine().generate_mappings(source, target, "Synthetic benchmark migration"), repeat),
+        "generate_migration_sql": measure(lambda: generator.generate_migration_sql(mapping, source), repeat),
+        "generate_validation_sql": measure(lambda: generator.generate_validation_sql(mapping, source), repeat),
+        "generate_rollback_sql": measure(lambda: generator.generate_rollback_sql(mapping), repeat),
+        "orchestrator": measure(run_workflow, repeat, setup=fresh_output),
+    }
+    # Re-runs into the same output directory reuse the manifest of the previous run.
+    results["orchestrator_rerun"] = measure(run_workflow, repeat)
+    return results
+
+
+def run(tiers: List[str], repeat: int = 3) -> Dict:
+    """
+    Runs the benchmark suite.
+
+    Args:
+        tiers: Names of the tiers in TIERS to run.
+        repeat: Timed runs per benchmark.
+
+    Returns:
+        Results document with environment metadata and per-tier measurements.
+    """
+    results = {}
+    for tier in tiers:
+        workdir = tempfile.mkdtemp(prefix=f"bench_{tier}_")
+        try:
+            results[tier] = run_tier(TIERS[tier], workdir, repeat)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.25,
+            min_seconds: float = 0.005) -> List[str]:
+    """
+    Lists benchmarks that got slower or use more memory than the baseline.
+
+    Args:
+        current: Results document of this run.
+        baseline: Stored results document.
+        tolerance: Allowed relative increase (0.25 = 25%).
+        min_seconds: Timings below this are too noisy to compare.
+
+    Returns:
+        Human-readable regression descriptions; empty when none.
+    """
+    regressions = []
+    for tier, benchmarks in current.get("results", {}).items():
+        for name, now in benchmarks.items():
+            before = baseline.get("results", {}).get(tier, {}).get(name)
+            if not before:
+                continue
+            if max(now["seconds"], before["seconds"]) >= min_seconds and \
+                    now["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append(f"{tier}/{name}: {before['seconds']:.4f}s -> {now['seconds']:.4f}s")
+            if before["peak_bytes"] and now["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+                regressions.append(f"{tier}/{name}: peak {before['peak_bytes']} -> {now['peak_bytes']} bytes")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the migration benchmark suite.")
+    parser.add_argument("--tiers", nargs="+", choices=sorted(TIERS), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    args = parser.parse_args(argv)
+
+    current = run(args.tiers, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    for tier, benchmarks in current["results"].items():
+        for name, m in benchmarks.items():
+            print(f"{tier:8} {name:26} {m['seconds']:9.4f}s {m['peak_bytes'] / 1e6:10.2f} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(current, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
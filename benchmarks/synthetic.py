@@ -0,0 +1,192 @@
+"""
+benchmarks/synthetic.py
+
+Deterministic synthetic workload generator for the benchmark suite. Produces
+source/target schemas with configurable numbers of tables, columns and
+foreign keys, rendered as SQL DDL, JSON and CSV, plus a matching mapping.
+"""
+
+import csv
+import io
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+from mapping_io import mapping_to_dict, table_schema_to_dict
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+
+_DATATYPES = ("INT", "BIGINT", "VARCHAR(100)", "VARCHAR(255)", "DECIMAL(12,2)", "DATE", "TIMESTAMP", "BOOLEAN")
+_CSV_SAMPLES = {
+    "INT": lambda r, i: str(r.randint(0, 10 ** 6)),
+    "BIGINT": lambda r, i: str(r.randint(2 ** 40, 2 ** 50)),
+    "VARCHAR(100)": lambda r, i: f"name {i}",
+    "VARCHAR(255)": lambda r, i: f"a somewhat longer description {r.random():.6f}",
+    "DECIMAL(12,2)": lambda r, i: f"{r.uniform(0, 10000):.2f}",
+    "DATE": lambda r, i: f"2024-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}",
+    "TIMESTAMP": lambda r, i: f"2024-{r.randint(1, 12):02d}-{r.randint(1, 28):02d} 10:{r.randint(0, 59):02d}:00",
+    "BOOLEAN": lambda r, i: r.choice(("true", "false")),
+}
+
+
+@dataclass
+class WorkloadSpec:
+    """
+    Size of a synthetic workload.
+
+    Attributes:
+        tables: Number of tables per schema.
+        columns: Columns per table, including the primary key.
+        foreign_keys: Foreign keys per table (to earlier tables).
+        csv_rows: Data rows in the generated CSV sample.
+        seed: Random seed; the same spec always produces the same workload.
+    """
+    tables: int
+    columns: int
+    foreign_keys: int = 1
+    csv_rows: int = 1000
+    seed: int = 42
+
+
+def generate_schema(spec: WorkloadSpec, prefix: str = "src") -> List[TableSchema]:
+    """
+    Generates a schema of ``spec.tables`` tables.
+
+    Every table has an integer ``id`` primary key; foreign key columns
+    reference the ``id`` of earlier tables, so the schema forms a DAG.
+
+    Args:
+        spec: Workload size.
+        prefix: Prefix of table and column names (e.g. "src" or "tgt").
+
+    Returns:
+        List of TableSchema objects.
+    """
+    rng = random.Random(f"{spec.seed}:{prefix}")
+    tables = []
+    for t in range(spec.tables):
+        fields = [SchemaField("id", "INT", nullable=False, primary_key=True)]
+        relationships = {}
+        for k in range(min(spec.foreign_keys, t, spec.columns - 1)):
+            column = f"{prefix}_ref_{k}_id"
+            fields.append(SchemaField(column, "INT"))
+            relationships[column] = f"{prefix}_table_{rng.randrange(t)}(id)"
+        while len(fields) < spec.columns:
+            fields.append(SchemaField(f"{prefix}_col_{len(fields)}", rng.choice(_DATATYPES), nullable=rng.random() < 0.7))
+        tables.append(TableSchema(f"{prefix}_table_{t}", fields, relationships))
+    return tables
+
+
+def generate_mapping(source: List[TableSchema], target: List[TableSchema]) -> MigrationMapping:
+    """
+    Maps source tables to target tables position by position.
+
+    Args:
+        source: Source schema.
+        target: Target schema of the same shape.
+
+    Returns:
+        MigrationMapping with a few transformations and incremental tables.
+    """
+    table_mappings = []
+    for i, (s, t) in enumerate(zip(source, target)):
+        field_mappings = [
+            FieldMapping(sf.name, tf.name, f"TRIM({sf.name})" if sf.datatype.startswith("VARCHAR") and j % 3 == 0 else None)
+            for j, (sf, tf) in enumerate(zip(s.fields, t.fields))
+        ]
+        table_mappings.append(TableMapping(s.table_name, t.table_name, field_mappings,
+                                           strategy="incremental" if i % 10 == 0 else "full_load",
+                                           complexity="low"))
+    return MigrationMapping("SyntheticSource", "SyntheticTarget", 0.9, table_mappings, "synthetic workload")
+
+
+def to_sql_ddl(tables: List[TableSchema]) -> str:
+    """
+    Renders tables as CREATE TABLE statements with inline constraints.
+
+    Args:
+        tables: Schema to render.
+
+    Returns:
+        SQL DDL script.
+    """
+    statements = []
+    for table in tables:
+        lines = []
+        for f in table.fields:
+            line = f"    {f.name} {f.datatype}"
+            if not f.nullable:
+                line += " NOT NULL"
+            if f.primary_key:
+                line += " PRIMARY KEY"
+            if f.name in table.relationships:
+                line += f" REFERENCES {table.relationships[f.name]}"
+            lines.append(line)
+        statements.append(f"CREATE TABLE {table.table_name} (\n" + ",\n".join(lines) + "\n);")
+    return "\n\n".join(statements) + "\n"
+
+
+def to_json_schema(tables: List[TableSchema]) -> str:
+    """
+    Renders tables in the JSON format read by parse_json_schema.
+
+    Args:
+        tables: Schema to render.
+
+    Returns:
+        JSON text.
+    """
+    return json.dumps([table_schema_to_dict(t) for t in tables])
+
+
+def to_csv(table: TableSchema, rows: int, seed: int = 42) -> str:
+    """
+    Renders sample data for one table as CSV with a header row.
+
+    Args:
+        table: Table whose columns are written.
+        rows: Number of data rows.
+        seed: Random seed.
+
+    Returns:
+        CSV text.
+    """
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow([f.name for f in table.fields])
+    for i in range(rows):
+        writer.writerow([str(i) if f.primary_key else
+                         ("" if f.nullable and rng.random() < 0.05 else _CSV_SAMPLES.get(f.datatype, _CSV_SAMPLES["INT"])(rng, i))
+                         for f in table.fields])
+    return out.getvalue()
+
+
+def write_workload(directory: str, spec: WorkloadSpec) -> Dict[str, str]:
+    """
+    Writes a complete workload to disk.
+
+    Args:
+        directory: Destination directory, created if needed.
+        spec: Workload size.
+
+    Returns:
+        Dict of artifact name -> file path: "source_sql", "target_sql",
+        "source_json", "source_csv" and "mapping".
+    """
+    os.makedirs(directory, exist_ok=True)
+    source = generate_schema(spec, "src")
+    target = generate_schema(spec, "tgt")
+    contents = {
+        "source_sql": ("source.sql", to_sql_ddl(source)),
+        "target_sql": ("target.sql", to_sql_ddl(target)),
+        "source_json": ("source.json", to_json_schema(source)),
+        "source_csv": (f"{source[0].table_name}.csv", to_csv(source[0], spec.csv_rows, spec.seed)),
+        "mapping": ("mapping.json", json.dumps(mapping_to_dict(generate_mapping(source, target)))),
+    }
+    paths = {}
+    for key, (name, text) in contents.items():
+        paths[key] = os.path.join(directory, name)
+        with open(paths[key], "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    return paths
@@ -0,0 +1,465 @@
+"""
+data_loader.py
+
+Moves rows from a source database into a separate target database in
+process. Rows are streamed from the source, written with executemany in
+batches, and every batch is committed together with a per-table checkpoint
+in the target database, so an interrupted load resumes from the last
+committed batch instead of starting over.
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from instrumentation import metrics_or_null
+from migration_executor import (ConnectionFactory, build_dependency_graph, dependency_levels, mappings_by_key,
+                                prepare_run_tracking)
+from models import LoadProgress, MigrationMapping, TableLoadResult, TableMapping, TableSchema
+from run_manifest import table_key
+from sql_generator import RUN_ID_COLUMN, SQLGenerator
+from transformations import compile_transformation
+
+DEFAULT_LOAD_BATCH_SIZE = 10000
+CHECKPOINT_TABLE = "migration_checkpoints"
+
+# Durable enough for a bulk load that can be resumed from its checkpoints:
+# WAL with NORMAL sync only loses the last commits on power failure.
+SQLITE_TARGET_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -262144),
+    ("mmap_size", 268435456),
+)
+SQLITE_SOURCE_PRAGMAS = (
+    ("cache_size", -262144),
+    ("mmap_size", 268435456),
+)
+
+
+def tune_sqlite(connection, pragmas=SQLITE_TARGET_PRAGMAS):
+    """
+    Applies bulk-load PRAGMAs to a SQLite connection; other drivers are left untouched.
+
+    Args:
+        connection: DB-API connection.
+        pragmas: (name, value) pairs to set.
+
+    Returns:
+        True when the connection is a SQLite connection.
+    """
+    if not isinstance(connection, sqlite3.Connection):
+        return False
+    for name, value in pragmas:
+        connection.execute(f"PRAGMA {name} = {value}")
+    return True
+
+
+class CheckpointTable:
+    """
+    Per-table load checkpoints stored in the target database.
+
+    A checkpoint is written by the same transaction as the batch it
+    describes, so it never claims rows that were rolled back. It records the
+    run ID the loaded rows are tagged with, so a restart can remove exactly
+    those rows.
+    """
+
+    def __init__(self, sql_generator: SQLGenerator, name: str = CHECKPOINT_TABLE):
+        """
+        Args:
+            sql_generator: SQLGenerator whose dialect quotes the statements
+                and whose run ID tags the loaded rows.
+            name: Checkpoint table name.
+        """
+        self.dialect = sql_generator.dialect
+        self.run_id = sql_generator.run_id
+        self.name = name
+
+    def ensure(self, connection):
+        """
+        Creates the checkpoint table when it does not exist, and adds the
+        run_id column to tables created before it was recorded.
+
+        Args:
+            connection: Target DB-API connection.
+        """
+        table = self.dialect.quote(self.name)
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ("
+                       "table_key VARCHAR(512) PRIMARY KEY, key_column VARCHAR(255), last_key TEXT, "
+                       "rows_loaded BIGINT NOT NULL, completed INTEGER NOT NULL, run_id VARCHAR(64))")
+        cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+        if "run_id" not in {d[0].lower() for d in cursor.description}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN run_id VARCHAR(64)")
+        connection.commit()
+
+    def get(self, connection, key: str) -> Optional[Dict]:
+        """
+        Returns the checkpoint of a table mapping.
+
+        Args:
+            connection: Target DB-API connection.
+            key: Table key, e.g. "users->customers".
+
+        Returns:
+            Dict with "key_column", "last_key", "rows", "completed" and
+            "run_id", or None when the table was never loaded.
+        """
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT key_column, last_key, rows_loaded, completed, run_id "
+                       f"FROM {self.dialect.quote(self.name)} WHERE table_key = {self.dialect.placeholder}", (key,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return {
+            "key_column": row[0],
+            "last_key": json.loads(row[1]) if row[1] is not None else None,
+            "rows": row[2],
+            "completed": bool(row[3]),
+            "run_id": row[4],
+        }
+
+    def save(self, cursor, key: str, key_column: Optional[str], last_key, rows: int, completed: bool = False):
+        """
+        Records a checkpoint, with the run ID of the loaded rows, inside
+        the caller's open transaction.
+
+        Args:
+            cursor: Cursor of the target connection running the batch.
+            key: Table key.
+            key_column: Source column the load is ordered by, or None.
+            last_key: Key of the last row of the batch (kept as JSON to
+                preserve its type).
+            rows: Rows loaded so far.
+            completed: Whether the table is completely loaded.
+        """
+        table = self.dialect.quote(self.name)
+        p = self.dialect.placeholder
+        encoded = json.dumps(last_key, default=str) if last_key is not None else None
+        cursor.execute(f"UPDATE {table} SET key_column = {p}, last_key = {p}, rows_loaded = {p}, completed = {p}, "
+                       f"run_id = {p} WHERE table_key = {p}", (key_column, encoded, rows, int(completed), self.run_id, key))
+        if cursor.rowcount == 0:
+            cursor.execute(f"INSERT INTO {table} (table_key, key_column, last_key, rows_loaded, completed, run_id) "
+                           f"VALUES ({p}, {p}, {p}, {p}, {p}, {p})",
+                           (key, key_column, encoded, rows, int(completed), self.run_id))
+
+    def clear(self, connection, key: str):
+        """
+        Forgets the checkpoint of a table mapping, so its next load starts over.
+
+        Args:
+            connection: Target DB-API connection.
+            key: Table key.
+        """
+        connection.cursor().execute(f"DELETE FROM {self.dialect.quote(self.name)} "
+                                    f"WHERE table_key = {self.dialect.placeholder}", (key,))
+        connection.commit()
+
+
+class ConsoleProgress:
+    """
+    Progress callback printing one live status line per table.
+    """
+
+    def __init__(self, stream=None, interval: float = 1.0):
+        """
+        Args:
+            stream: Text stream to write to; sys.stderr when None.
+            interval: Minimum seconds between two updates of a line.
+        """
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, progress: LoadProgress):
+        now = time.perf_counter()
+        if not progress.done and now - self._last < self.interval:
+            return
+        self._last = now
+        line = f"{progress.source_table} -> {progress.target_table}: {progress.rows:,} rows"
+        if progress.total_rows:
+            line += f" ({100.0 * progress.rows / progress.total_rows:.1f}%)"
+        line += f", {progress.rows_per_second:,.0f} rows/s"
+        self.stream.write("\r" + line + ("\n" if progress.done else ""))
+        self.stream.flush()
+
+
+class DataLoader:
+    """
+    Copies the tables of a MigrationMapping between two databases, in
+    foreign-key order, one table at a time.
+
+    Tables whose source has a single-column primary key are read in key
+    order, and an interrupted load of the same run ID continues after the
+    last committed key. Other interrupted loads start over once the rows they
+    tagged with their run ID are deleted; rows loaded without a run ID cannot
+    be told apart from rows that were in the target before, so such a load
+    fails instead of restarting. Completely loaded tables are skipped on
+    later runs until their checkpoint is cleared.
+    """
+
+    def __init__(self, source_factory: ConnectionFactory, target_factory: ConnectionFactory,
+                 batch_size: int = DEFAULT_LOAD_BATCH_SIZE, sql_generator: Optional[SQLGenerator] = None,
+                 progress: Optional[Callable[[LoadProgress], None]] = None, count_rows: bool = False,
+                 tune: bool = True, transform: str = "sql", metrics=None):
+        """
+        Args:
+            source_factory: Factory opening the source connection.
+            target_factory: Factory opening the target connection.
+            batch_size: Rows fetched, inserted and committed per batch.
+            sql_generator: SQLGenerator providing the field expressions, the
+                dialect of the target and the run ID tagging loaded rows; by
+                default one in the dialect of the target factory.
+            progress: Callback receiving a LoadProgress after every batch,
+                e.g. ConsoleProgress().
+            count_rows: Count the source rows first, so progress reports
+                carry a total.
+            tune: Apply the SQLite bulk-load PRAGMAs to SQLite connections.
+            transform: "sql" pushes FieldMapping.transformation into the
+                source SELECT; "python" reads the raw columns and applies the
+                compiled transformations column-wise to every batch (it
+                rejects hand-written SQL transformations).
+            metrics: Optional RunMetrics receiving load spans and counters.
+        """
+        self.source_factory = source_factory
+        self.target_factory = target_factory
+        self.batch_size = batch_size
+        self.sql_generator = sql_generator or SQLGenerator(dialect=target_factory.dialect())
+        self.checkpoints = CheckpointTable(self.sql_generator)
+        self.progress = progress
+        self.count_rows = count_rows
+        if transform not in ("sql", "python"):
+            raise ValueError(f"Unsupported transform mode: {transform}")
+        self.tune = tune
+        self.transform = transform
+        self.metrics = metrics_or_null(metrics)
+
+    def load(self, mapping: MigrationMapping, source_schema: Optional[List[TableSchema]] = None,
+             target_schema: Optional[List[TableSchema]] = None) -> List[TableLoadResult]:
+        """
+        Loads every table mapping, parents before children.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables (primary and foreign keys).
+            target_schema: Parsed target tables (foreign keys).
+
+        Returns:
+            TableLoadResult per table mapping, in mapping order. rows counts
+            the rows copied by this run only.
+        """
+        graph = build_dependency_graph(mapping, list(source_schema or []) + list(target_schema or []))
+        tables = mappings_by_key(mapping)
+        keys = self._key_columns(source_schema or [])
+        results: Dict[str, TableLoadResult] = {}
+        source = self.source_factory.connect()
+        target = self.target_factory.connect()
+        try:
+            if self.tune:
+                tune_sqlite(source, SQLITE_SOURCE_PRAGMAS)
+                tune_sqlite(target)
+            self.checkpoints.ensure(target)
+            if self.sql_generator.run_id is not None:
+                prepare_run_tracking(target, mapping, self.sql_generator)
+            for level in dependency_levels(graph):
+                for key in level:
+                    table_map = tables[key]
+                    blocked = [p for p in sorted(graph[key]) if results[p].status != "completed"]
+                    if blocked:
+                        parent = tables[blocked[0]].target_table
+                        results[key] = TableLoadResult(table_map.source_table, table_map.target_table, status="skipped",
+                                                       error=f"Parent table {parent} was not loaded")
+                        continue
+                    with self.metrics.span("load_table"):
+                        results[key] = self.load_table(source, target, table_map,
+                                                       keys.get(table_map.source_table))
+        finally:
+            source.close()
+            target.close()
+        return [results[table_key(t.source_table, t.target_table)] for t in mapping.table_mappings]
+
+    def load_table(self, source, target, table_map: TableMapping,
+                   key_column: Optional[str] = None) -> TableLoadResult:
+        """
+        Copies one table, resuming from its checkpoint.
+
+        Args:
+            source: Open source connection.
+            target: Open target connection holding the checkpoint table.
+            table_map: TableMapping to copy.
+            key_column: Source primary key column ordering the rows, or None.
+
+        Returns:
+            TableLoadResult describing the outcome.
+        """
+        result = TableLoadResult(table_map.source_table, table_map.target_table, status="completed")
+        if not table_map.field_mappings:
+            return result
+        started = time.perf_counter()
+        key = table_key(table_map.source_table, table_map.target_table)
+        dialect = self.sql_generator.dialect
+        reader = None
+        try:
+            state = self.checkpoints.get(target, key)
+            if state and state["completed"]:
+                return result
+            if state and (key_column is None or state["key_column"] != key_column
+                          or state["run_id"] != self.sql_generator.run_id):
+                self._remove_interrupted_rows(target, table_map, state)
+                state = None
+            last_key = state["last_key"] if state else None
+            loaded = state["rows"] if state else 0
+            total = self._count(source, table_map) if self.count_rows else None
+
+            table_map = self.sql_generator.load_mapping(table_map)
+            compiled = None
+            if self.transform == "python":
+                compiled = [(f.source_field, compile_transformation(f.transformation) if f.transformation else None)
+                            for f in table_map.field_mappings]
+                read = list(dict.fromkeys(c for field, t in compiled for c in (t.columns if t else [field])))
+                expressions = [dialect.quote(c) for c in read]
+            else:
+                expressions = self.sql_generator.source_expressions(table_map)
+            params = ()
+            if key_column is None:
+                query = dialect.select_sql(table_map, expressions, dialect.quote(table_map.source_table))
+            else:
+                quoted = dialect.quote(key_column)
+                query = dialect.select_sql(table_map, expressions + [quoted], dialect.quote(table_map.source_table))
+                if last_key is not None:
+                    query += f" WHERE {quoted} > {dialect.placeholder}"
+                    params = (last_key,)
+                query += f" ORDER BY {quoted}"
+            insert = dialect.insert_values_sql(table_map, 1)
+
+            reader = _stream_cursor(source, self.batch_size)
+            reader.execute(query, params)
+            writer = target.cursor()
+            while True:
+                rows = reader.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                if key_column is not None:
+                    last_key = rows[-1][-1]
+                    rows = [row[:-1] for row in rows]
+                if compiled is not None:
+                    rows = _transform_batch(compiled, read, rows)
+                writer.executemany(insert, rows)
+                loaded += len(rows)
+                result.rows += len(rows)
+                result.batches += 1
+                self.checkpoints.save(writer, key, key_column, last_key, loaded)
+                target.commit()
+                self.metrics.count("rows_loaded", len(rows))
+                self.metrics.count("load_batches")
+                self._report(table_map, loaded, result, started, total)
+            self.checkpoints.save(writer, key, key_column, last_key, loaded, completed=True)
+            target.commit()
+            self._report(table_map, loaded, result, started, total, done=True)
+        except Exception as e:
+            target.rollback()
+            result.status = "failed"
+            result.error = str(e)
+        finally:
+            if reader is not None:
+                reader.close()
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _remove_interrupted_rows(self, target, table_map: TableMapping, state: Dict):
+        """
+        Deletes the rows an interrupted load of a table committed, so the
+        table can be loaded again from the start.
+
+        Args:
+            target: Open target connection; the delete commits with the
+                first batch of the new load.
+            table_map: TableMapping being restarted.
+            state: Checkpoint of the interrupted load.
+
+        Raises:
+            ValueError: If the interrupted load did not tag its rows with a
+                run ID.
+        """
+        if state["run_id"] is None:
+            raise ValueError(f"Cannot restart the interrupted load of {table_map.target_table}: its "
+                             f"{state['rows']} rows carry no run ID and cannot be told apart from rows that "
+                             f"were in the table before. Load with a run ID, or remove them and clear the "
+                             f"checkpoint of {table_key(table_map.source_table, table_map.target_table)}.")
+        dialect = self.sql_generator.dialect
+        target.cursor().execute(f"DELETE FROM {dialect.quote(table_map.target_table)} "
+                                f"WHERE {dialect.quote(RUN_ID_COLUMN)} = {dialect.placeholder}", (state["run_id"],))
+
+    def _key_columns(self, source_schema: List[TableSchema]) -> Dict[str, str]:
+        """
+        Maps every source table with a single-column primary key to that column.
+        """
+        keys = {}
+        for table in source_schema:
+            pk_columns = [f.name for f in table.fields if f.primary_key]
+            if len(pk_columns) == 1:
+                keys[table.table_name] = pk_columns[0]
+        return keys
+
+    def _count(self, source, table_map: TableMapping) -> int:
+        """
+        Counts the rows of a source table.
+        """
+        cursor = source.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {self.sql_generator.dialect.quote(table_map.source_table)}")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+    def _report(self, table_map: TableMapping, loaded: int, result: TableLoadResult, started: float,
+                total: Optional[int], done: bool = False):
+        """
+        Sends a LoadProgress to the progress callback.
+        """
+        if self.progress is None:
+            return
+        seconds = time.perf_counter() - started
+        self.progress(LoadProgress(
+            source_table=table_map.source_table,
+            target_table=table_map.target_table,
+            rows=loaded,
+            batches=result.batches,
+            seconds=seconds,
+            rows_per_second=result.rows / seconds if seconds > 0 else 0.0,
+            total_rows=total,
+            done=done,
+        ))
+
+
+def _stream_cursor(connection, batch_size: int):
+    """
+    Opens a cursor that streams a large result set.
+
+    psycopg connections get a named (server-side) cursor so rows are not
+    buffered client-side; other drivers already stream through fetchmany.
+    """
+    if type(connection).__module__.split(".")[0] in ("psycopg2", "psycopg"):
+        cursor = connection.cursor(name="migration_loader")
+        cursor.itersize = batch_size
+        return cursor
+    return connection.cursor()
+
+
+def _transform_batch(compiled, read: List[str], rows: List) -> List:
+    """
+    Applies compiled transformations to a batch column by column.
+
+    Args:
+        compiled: (source field, Transformation or None) per field mapping.
+        read: Source columns selected, in row order.
+        rows: Source rows of the batch.
+
+    Returns:
+        Target rows of the batch.
+    """
+    columns = dict(zip(read, zip(*rows)))
+    outputs = [t.apply(columns, len(rows)) if t else columns[field] for field, t in compiled]
+    return list(zip(*outputs))
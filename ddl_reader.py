@@ -0,0 +1,249 @@
+"""
+ddl_reader.py
+
+Incremental SQL tokenizer used to split very large DDL dumps into individual
+statements without loading the whole file into memory.
+"""
+
+import re
+from typing import IO, Iterator, List, Optional
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_NORMAL, _SQUOTE, _DQUOTE, _LINE_COMMENT, _BLOCK_COMMENT, _DOLLAR = range(6)
+
+_SPECIAL_CHARS = re.compile(r"[;'\"\-/$]")
+_BLOCK_COMMENT_MARKERS = re.compile(r"/\*|\*/")
+_DOLLAR_TAG = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+_PARTIAL_DOLLAR_TAG = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\Z")
+_WORD_CHAR = re.compile(r"\w")
+_IDENTIFIER_PART = re.compile(r'"((?:[^"]|"")*)"|`([^`]*)`|\[([^\]]*)\]|([^.\s]+)')
+
+
+class SQLStatementSplitter:
+    """
+    Splits a SQL script into statements as text is fed to it chunk by chunk.
+
+    Semicolons inside single-quoted strings, quoted identifiers, comments and
+    PostgreSQL dollar-quoted bodies do not terminate a statement. Comments are
+    dropped from the emitted statements. Memory use is bounded by the largest
+    single statement, not by the size of the script.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._parts: List[str] = []
+        self._state = _NORMAL
+        self._delimiter = ""
+        self._depth = 0
+
+    def feed(self, chunk: str) -> Iterator[str]:
+        """
+        Adds a chunk of script text and yields every statement it completes.
+
+        Args:
+            chunk: Next piece of the SQL script.
+
+        Returns:
+            Iterator of complete statements (without the trailing semicolon).
+        """
+        self._pending += chunk
+        return self._scan(final=False)
+
+    def close(self) -> Iterator[str]:
+        """
+        Flushes the last statement when the script does not end with a semicolon.
+
+        Returns:
+            Iterator with the remaining statement, if any.
+        """
+        yield from self._scan(final=True)
+        statement = "".join(self._parts).strip()
+        self._parts = []
+        if statement and self._state not in (_SQUOTE, _DQUOTE, _DOLLAR):
+            yield statement
+
+    def _scan(self, final: bool) -> Iterator[str]:
+        text = self._pending
+        end = len(text)
+        pos = 0
+        parts = self._parts
+        while pos < end:
+            state = self._state
+            if state == _NORMAL:
+                match = _SPECIAL_CHARS.search(text, pos)
+                if not match:
+                    parts.append(text[pos:])
+                    pos = end
+                    break
+                i = match.start()
+                char = text[i]
+                if char == ";":
+                    parts.append(text[pos:i])
+                    statement = "".join(parts).strip()
+                    parts.clear()
+                    pos = i + 1
+                    if statement:
+                        yield statement
+                elif char == "'" or char == '"':
+                    parts.append(text[pos:i + 1])
+                    self._state = _SQUOTE if char == "'" else _DQUOTE
+                    pos = i + 1
+                elif char == "-" or char == "/":
+                    if i + 1 >= end and not final:
+                        parts.append(text[pos:i])
+                        pos = i
+                        break
+                    follower = "-" if char == "-" else "*"
+                    if text[i + 1:i + 2] == follower:
+                        parts.append(text[pos:i])
+                        parts.append(" ")
+                        self._state = _LINE_COMMENT if char == "-" else _BLOCK_COMMENT
+                        self._depth = 1
+                        pos = i + 2
+                    else:
+                        parts.append(text[pos:i + 1])
+                        pos = i + 1
+                else:
+                    tag = _DOLLAR_TAG.match(text, i)
+                    if not tag and not final and _PARTIAL_DOLLAR_TAG.match(text, i):
+                        parts.append(text[pos:i])
+                        pos = i
+                        break
+                    if tag and not self._follows_word(text, pos, i):
+                        parts.append(text[pos:tag.end()])
+                        self._delimiter = tag.group(0)
+                        self._state = _DOLLAR
+                        pos = tag.end()
+                    else:
+                        parts.append(text[pos:i + 1])
+                        pos = i + 1
+            elif state == _SQUOTE or state == _DQUOTE:
+                quote = "'" if state == _SQUOTE else '"'
+                i = text.find(quote, pos)
+                if i < 0:
+                    parts.append(text[pos:])
+                    pos = end
+                    break
+                if i + 1 >= end and not final:
+                    parts.append(text[pos:i])
+                    pos = i
+                    break
+                if text[i + 1:i + 2] == quote:
+                    parts.append(text[pos:i + 2])
+                    pos = i + 2
+                else:
+                    parts.append(text[pos:i + 1])
+                    self._state = _NORMAL
+                    pos = i + 1
+            elif state == _LINE_COMMENT:
+                i = text.find("\n", pos)
+                if i < 0:
+                    pos = end
+                    break
+                self._state = _NORMAL
+                pos = i
+            elif state == _BLOCK_COMMENT:
+                match = _BLOCK_COMMENT_MARKERS.search(text, pos)
+                if not match:
+                    pos = end if final or text[-1] not in "/*" else end - 1
+                    break
+                self._depth += 1 if match.group(0) == "/*" else -1
+                pos = match.end()
+                if self._depth == 0:
+                    self._state = _NORMAL
+            else:
+                delimiter = self._delimiter
+                i = text.find(delimiter, pos)
+                if i < 0:
+                    keep = 0 if final else len(delimiter) - 1
+                    cut = max(pos, end - keep)
+                    parts.append(text[pos:cut])
+                    pos = cut
+                    break
+                parts.append(text[pos:i + len(delimiter)])
+                self._state = _NORMAL
+                pos = i + len(delimiter)
+        self._pending = text[pos:]
+
+    def _follows_word(self, text: str, pos: int, i: int) -> bool:
+        """
+        Checks whether a '$' continues an identifier such as ``price$usd``.
+        """
+        if i > pos:
+            previous = text[i - 1]
+        else:
+            previous = self._parts[-1][-1:] if self._parts and self._parts[-1] else ""
+        return bool(previous) and bool(_WORD_CHAR.match(previous))
+
+
+def iter_sql_statements(stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Reads a SQL script from a text stream and yields its statements one by one.
+
+    Args:
+        stream: Readable text stream (open file, io.StringIO, ...).
+        chunk_size: Number of characters read per call.
+
+    Returns:
+        Iterator of statements with comments removed.
+    """
+    splitter = SQLStatementSplitter()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+def split_top_level(text: str, separator: str = ",") -> List[str]:
+    """
+    Splits text on a separator that is not nested in parentheses or quotes.
+
+    Args:
+        text: Text to split, e.g. the column list of a CREATE TABLE.
+        separator: Single separator character.
+
+    Returns:
+        List of stripped, non-empty items.
+    """
+    items = []
+    depth = 0
+    quote: Optional[str] = None
+    start = 0
+    for match in re.finditer("[()'\"" + re.escape(separator) + "]", text):
+        char = match.group(0)
+        if quote:
+            if char == quote:
+                quote = None
+        elif char == "'" or char == '"':
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            items.append(text[start:match.start()].strip())
+            start = match.end()
+    items.append(text[start:].strip())
+    return [item for item in items if item]
+
+
+def unquote_identifier(name: str) -> str:
+    """
+    Removes SQL identifier quoting from a (possibly schema-qualified) name.
+
+    Args:
+        name: Identifier such as ``"Order Items"``, ``"public"."users"`` or ``[dbo].[t]``.
+
+    Returns:
+        The identifier with quotes removed and doubled quotes collapsed.
+    """
+    parts = []
+    for match in _IDENTIFIER_PART.finditer(name.strip()):
+        if match.group(1) is not None:
+            parts.append(match.group(1).replace('""', '"'))
+        else:
+            parts.append(match.group(2) or match.group(3) or match.group(4))
+    return ".".join(parts) if parts else name
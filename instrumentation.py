@@ -0,0 +1,282 @@
+"""
+instrumentation.py
+
+Lightweight run metrics: nested timing spans with peak memory, counters and
+latency observations, collected across the orchestrator, parser, mapping
+engine and SQL generator and written as ``run_metrics.json``.
+
+Components default to NULL_METRICS, whose methods do nothing, so
+instrumentation costs a no-op call per span when it is disabled.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_FILE = "run_metrics.json"
+
+
+class _Span:
+    """
+    Aggregated measurements of every call of one named span under one parent.
+    """
+
+    __slots__ = ("name", "calls", "seconds", "peak_bytes", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.children: Dict[str, "_Span"] = {}
+
+    def to_dict(self) -> Dict:
+        data = {"name": self.name, "calls": self.calls, "seconds": round(self.seconds, 6)}
+        if self.peak_bytes:
+            data["peak_bytes"] = self.peak_bytes
+        if self.children:
+            data["children"] = [c.to_dict() for c in self.children.values()]
+        return data
+
+
+class _ActiveSpan:
+    """
+    Context manager timing one call of a span.
+    """
+
+    __slots__ = ("_metrics", "_name", "_span", "_start", "_child_peak")
+
+    def __init__(self, metrics: "RunMetrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._metrics._enter(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics._exit(self, time.perf_counter() - self._start)
+        return False
+
+
+class RunMetrics:
+    """
+    Collects nested timing spans, counters and latency observations.
+
+    Spans nest per thread; spans opened on worker threads become roots of
+    their own. Peak memory per span is recorded while tracemalloc is tracing
+    (see trace_memory), using tracemalloc.reset_peak so nested spans each get
+    their own peak.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory: Start tracemalloc so every span records its peak
+                allocated bytes. Slows the run down noticeably.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root = _Span("run")
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+        self._started = time.perf_counter()
+        self._traced = trace_memory and hasattr(tracemalloc, "reset_peak")
+        if self._traced and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def span(self, name: str) -> _ActiveSpan:
+        """
+        Opens a timing span; use as ``with metrics.span("parse"):``.
+
+        Args:
+            name: Span name, unique among its siblings.
+
+        Returns:
+            Context manager.
+        """
+        return _ActiveSpan(self, name)
+
+    def count(self, name: str, value: float = 1):
+        """
+        Adds to a counter.
+
+        Args:
+            name: Counter name, e.g. "tables" or "prompt_bytes".
+            value: Amount to add.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """
+        Records one observation of a distribution, e.g. a request latency.
+
+        Args:
+            name: Distribution name.
+            value: Observed value.
+        """
+        with self._lock:
+            stats = self._observations.get(name)
+            if stats is None:
+                self._observations[name] = {"count": 1, "total": value, "min": value, "max": value}
+            else:
+                stats["count"] += 1
+                stats["total"] += value
+                stats["min"] = min(stats["min"], value)
+                stats["max"] = max(stats["max"], value)
+
+    def to_dict(self) -> Dict:
+        """
+        Returns all collected metrics.
+
+        Returns:
+            Dict with "seconds", "spans", "counters", "observations" and,
+            when available, the process "max_rss_bytes".
+        """
+        with self._lock:
+            observations = {
+                name: dict(stats, mean=stats["total"] / stats["count"])
+                for name, stats in self._observations.items()
+            }
+            data = {
+                "seconds": round(time.perf_counter() - self._started, 6),
+                "spans": [c.to_dict() for c in self._root.children.values()],
+                "counters": dict(self._counters),
+                "observations": observations,
+            }
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            data["max_rss_bytes"] = rss if sys.platform == "darwin" else rss * 1024
+        return data
+
+    def write(self, output_dir: str) -> str:
+        """
+        Writes the metrics as run_metrics.json.
+
+        Args:
+            output_dir: Directory to write to.
+
+        Returns:
+            Path of the written file.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, METRICS_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def stop(self):
+        """
+        Stops tracemalloc if this instance started it.
+        """
+        if self._traced and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, active: _ActiveSpan):
+        stack = self._stack()
+        parent = stack[-1]._span if stack else self._root
+        with self._lock:
+            span = parent.children.get(active._name)
+            if span is None:
+                span = parent.children[active._name] = _Span(active._name)
+        active._span = span
+        active._child_peak = 0
+        if self._traced and tracemalloc.is_tracing():
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(active)
+
+    def _exit(self, active: _ActiveSpan, seconds: float):
+        stack = self._stack()
+        if stack and stack[-1] is active:
+            stack.pop()
+        peak = 0
+        if self._traced and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], active._child_peak)
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        with self._lock:
+            span = active._span
+            span.calls += 1
+            span.seconds += seconds
+            span.peak_bytes = max(span.peak_bytes, peak)
+
+
+class TimedReader:
+    """
+    Wraps a readable stream and accumulates the time spent in read() calls
+    in the "file_read_seconds" counter, separating I/O from parsing time.
+    """
+
+    def __init__(self, stream, metrics: RunMetrics):
+        self._stream = stream
+        self._metrics = metrics
+
+    def read(self, size: int = -1):
+        start = time.perf_counter()
+        data = self._stream.read(size)
+        self._metrics.count("file_read_seconds", time.perf_counter() - start)
+        return data
+
+
+class _NullSpan:
+    """
+    Reusable context manager that does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullMetrics:
+    """
+    RunMetrics stand-in used when instrumentation is disabled.
+    """
+
+    enabled = False
+    _SPAN = _NullSpan()
+
+    def span(self, name: str) -> _NullSpan:
+        return self._SPAN
+
+    def count(self, name: str, value: float = 1):
+        pass
+
+    def observe(self, name: str, value: float):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def metrics_or_null(metrics: Optional[RunMetrics]):
+    """
+    Returns the given metrics, or NULL_METRICS when None.
+    """
+    return metrics if metrics is not None else NULL_METRICS
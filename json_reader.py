@@ -0,0 +1,173 @@
+"""
+json_reader.py
+
+Incremental JSON reader used to walk very large JSON arrays (catalog exports
+of data-dictionary tools) element by element without loading the whole
+document into memory.
+"""
+
+import codecs
+import json
+import mmap
+import os
+import re
+from typing import IO, Any, Iterator
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_START, _FIRST, _VALUE, _SEPARATOR, _DONE = range(5)
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+class JSONArrayReader:
+    """
+    Decodes the elements of a JSON document's top-level array as the document
+    is fed to it chunk by chunk.
+
+    Each element is decoded on its own by the C JSON decoder (raw_decode), so
+    memory use is bounded by the largest single element plus one chunk. A
+    top-level object is returned as the only element. An element that is not
+    complete yet is retried once the buffered text has doubled, which keeps
+    elements larger than the chunk size linear to decode.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._pending = ""
+        self._pos = 0
+        self._state = _START
+        self._array = False
+        self._retry_length = 0
+
+    def feed(self, chunk: str) -> Iterator[Any]:
+        """
+        Adds a chunk of the document and yields every element it completes.
+
+        Args:
+            chunk: Next piece of the document text.
+
+        Returns:
+            Iterator of decoded elements.
+        """
+        self._pending = self._pending[self._pos:] + chunk
+        self._pos = 0
+        return self._scan(final=False)
+
+    def close(self) -> Iterator[Any]:
+        """
+        Decodes the last element and checks that the document is complete.
+
+        Returns:
+            Iterator with the remaining element, if any.
+
+        Raises:
+            ValueError: When the document is truncated, malformed or is not
+                an array or object.
+        """
+        yield from self._scan(final=True)
+        if self._state != _DONE:
+            raise ValueError("Unexpected end of JSON document")
+
+    def _scan(self, final: bool) -> Iterator[Any]:
+        """
+        Decodes elements from the pending text; at the end of a chunk an
+        incomplete element waits for more text unless final is set.
+        """
+        text = self._pending
+        i = self._pos
+        while True:
+            i = _WHITESPACE.match(text, i).end()
+            self._pos = i
+            if i == len(text):
+                return
+            char = text[i]
+            if self._state == _START:
+                if char == "\ufeff":
+                    self._pos = i + 1
+                elif char == "[":
+                    self._array = True
+                    self._state = _FIRST
+                    self._pos = i + 1
+                elif char == "{":
+                    self._state = _VALUE
+                else:
+                    raise ValueError("Expected a JSON array or object at the top level")
+            elif self._state == _FIRST and char == "]":
+                self._state = _DONE
+                self._pos = i + 1
+            elif self._state in (_FIRST, _VALUE):
+                if not final and len(text) - i < self._retry_length:
+                    return
+                try:
+                    value, end = self._decoder.raw_decode(text, i)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self._retry_length = 2 * (len(text) - i)
+                    return
+                if end == len(text) and not final:
+                    # A number or literal may continue in the next chunk.
+                    self._retry_length = len(text) - i + 1
+                    return
+                self._retry_length = 0
+                self._state = _SEPARATOR if self._array else _DONE
+                self._pos = end
+                yield value
+            elif self._state == _SEPARATOR and char in ",]":
+                self._state = _VALUE if char == "," else _DONE
+                self._pos = i + 1
+            else:
+                raise ValueError(f"Unexpected {char!r} in JSON document")
+            i = self._pos
+
+
+def iter_json_array(stream: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Reads a JSON document from a stream and yields the decoded elements of its
+    top-level array one by one (or the top-level object as the only element).
+
+    Args:
+        stream: Readable binary (UTF-8) or text stream.
+        chunk_size: Number of bytes (characters for text streams) read per call.
+
+    Returns:
+        Iterator of decoded elements.
+    """
+    return _iter_chunks(iter(lambda: stream.read(chunk_size), stream.read(0)))
+
+
+def iter_json_file(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False) -> Iterator[Any]:
+    """
+    Yields the decoded elements of the top-level array of a JSON file.
+
+    Args:
+        file_path: Path to the UTF-8 encoded JSON file.
+        chunk_size: Number of bytes decoded at a time.
+        use_mmap: When True, the chunks are sliced from a read-only memory
+            map of the file instead of being read with read() calls.
+
+    Returns:
+        Iterator of decoded elements.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not use_mmap or size == 0:
+            yield from iter_json_array(f, chunk_size)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from _iter_chunks(mapped[offset:offset + chunk_size] for offset in range(0, size, chunk_size))
+
+
+def _iter_chunks(chunks: Iterator) -> Iterator[Any]:
+    """
+    Feeds text or UTF-8 byte chunks to a JSONArrayReader.
+    """
+    reader = JSONArrayReader()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        yield from reader.feed(chunk)
+    yield from reader.feed(decoder.decode(b"", final=True))
+    yield from reader.close()
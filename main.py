@@ -2,22 +2,74 @@
 main.py
 
 Entry point to run the full MA Migration workflow from command line.
+
+Optional flags (before the positional arguments):
+    --metrics        write per-stage timings and counters to run_metrics.json
+    --trace-memory   also record peak memory per stage with tracemalloc
+    --profile        write a cProfile dump (profile.pstats) and print the hottest functions
+    --gzip           gzip-compress the SQL scripts as they are written
+    --split-by-table write every table mapping to its own numbered SQL file
+    --split-mb=N     split SQL scripts into numbered files of about N megabytes
+    --dialect=NAME   generic (default), sqlite or postgresql bulk-load statements
+    --run-id=ID      tag loaded rows with a run ID so rollback.sql only deletes
+                     this run's rows ("auto" generates one)
+    --workers=N      batch mode: number of worker processes (default: CPU count)
+    --cache-dir=DIR  batch mode: mapping cache directory shared by the workers
+
+The source and target files may also be directories or quoted glob patterns of
+schema files, which are parsed on a process pool.
+
+Batch mode runs every source/target pair of a JSON or YAML manifest in one
+invocation (see batch_runner.py) and writes batch_summary.json:
+    python main.py [options] --batch <manifest_file>
 """
 
+import os
 import sys
 from orchestrator import MigrationOrchestrator
 
-if __name__ == "__main__":
-    if len(sys.argv) < 5:
-        print("Usage: python main.py <source_file> <target_file> <business_context> <output_dir>")
-        sys.exit(1)
+FLAGS = ("--metrics", "--trace-memory", "--profile", "--gzip", "--split-by-table")
+VALUE_OPTIONS = ("--split-mb=", "--dialect=", "--run-id=", "--workers=", "--cache-dir=")
+
+
+def usage(error=None):
+    """
+    Prints the command line usage, preceded by the error when given, and
+    exits with status 1.
 
-    source_file = sys.argv[1]
-    target_file = sys.argv[2]
-    business_context = sys.argv[3]
-    output_dir = sys.argv[4]
+    Args:
+        error: Optional description of what was wrong with the arguments.
+    """
+    if error:
+        print(f"Error: {error}", file=sys.stderr)
+    print("Usage: python main.py [options] <source_file> <target_file> <business_context> <output_dir>")
+    print("       python main.py [options] --from-mapping <mapping_file> <output_dir> [source_file]")
+    print("       python main.py [options] --batch <manifest_file>")
+    print("Options: --metrics --trace-memory --profile --gzip --split-by-table --split-mb=N --dialect=NAME --run-id=ID")
+    print("Batch options: --workers=N --cache-dir=DIR")
+    sys.exit(1)
 
-    orchestrator = MigrationOrchestrator()
+
+def run(argv, metrics=None, **writer_options):
+    if len(argv) >= 3 and argv[0] == "--from-mapping":
+        orchestrator = MigrationOrchestrator(metrics=metrics, **writer_options)
+        orchestrator.execute_from_saved_mapping(
+            mapping_file=argv[1],
+            output_dir=argv[2],
+            source_file=argv[3] if len(argv) > 3 else None
+        )
+        print("SQL scripts regenerated from saved mapping.")
+        return argv[2]
+
+    if len(argv) < 4:
+        usage(f"expected 4 arguments, got {len(argv)}" if argv else None)
+
+    source_file = argv[0]
+    target_file = argv[1]
+    business_context = argv[2]
+    output_dir = argv[3]
+
+    orchestrator = MigrationOrchestrator(metrics=metrics, **writer_options)
     mapping = orchestrator.execute_migration_workflow(
         source_file=source_file,
         target_file=target_file,
@@ -26,3 +78,87 @@ if __name__ == "__main__":
     )
 
     print("Migration mapping and SQL scripts generated successfully.")
+    return output_dir
+
+
+def run_batch_manifest(manifest_file, workers=None, cache_dir=None, metrics=False, trace_memory=False,
+                       **writer_options):
+    """
+    Runs every job of a batch manifest and prints one line per finished job.
+
+    Returns:
+        Summary dict of batch_runner.run_batch.
+    """
+    from batch_runner import load_manifest, run_batch
+    jobs, settings = load_manifest(manifest_file, writer_options)
+
+    def report(result):
+        print(f"[{result.status:>6}] {result.name} ({result.seconds:.1f}s) -> {result.output_dir}")
+
+    summary = run_batch(jobs, workers=workers or settings["workers"], cache_dir=cache_dir or settings["cache_dir"],
+                        summary_file=settings["summary"], metrics=metrics, trace_memory=trace_memory,
+                        on_result=report)
+    print(f"{summary['succeeded']}/{summary['jobs']} jobs succeeded in {summary['seconds']:.1f}s "
+          f"on {summary['workers']} workers. Summary written to {settings['summary']}")
+    return summary
+
+
+if __name__ == "__main__":
+    flags = {arg for arg in sys.argv[1:] if arg in FLAGS}
+    values = {}
+    for arg in sys.argv[1:]:
+        for option in VALUE_OPTIONS:
+            if arg.startswith(option):
+                values[option] = arg[len(option):]
+    args = [arg for arg in sys.argv[1:] if arg not in FLAGS and not arg.startswith(VALUE_OPTIONS)]
+    run_id = values.get("--run-id=")
+    if run_id == "auto":
+        from sql_generator import new_run_id
+        run_id = new_run_id()
+        print(f"Run ID: {run_id}")
+    writer_options = {
+        "compress": "--gzip" in flags,
+        "split_by_table": "--split-by-table" in flags,
+        "split_bytes": int(float(values["--split-mb="]) * 1024 * 1024) if "--split-mb=" in values else None,
+        "dialect": values.get("--dialect="),
+        "run_id": run_id,
+    }
+
+    if args and args[0] == "--batch":
+        if len(args) == 1:
+            usage("--batch needs a manifest file")
+        if len(args) > 2:
+            usage(f"--batch takes a single manifest file, got extra arguments: {' '.join(args[2:])}")
+        workers = values.get("--workers=")
+        if workers is not None and not (workers.isdigit() and int(workers) > 0):
+            usage(f"--workers must be a positive whole number, got {workers!r}")
+        summary = run_batch_manifest(
+            args[1],
+            workers=int(workers) if workers is not None else None,
+            cache_dir=values.get("--cache-dir="),
+            metrics="--metrics" in flags,
+            trace_memory="--trace-memory" in flags,
+            **writer_options
+        )
+        sys.exit(1 if summary["failed"] else 0)
+
+    metrics = None
+    if "--metrics" in flags or "--trace-memory" in flags:
+        from instrumentation import RunMetrics
+        metrics = RunMetrics(trace_memory="--trace-memory" in flags)
+
+    if "--profile" in flags:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        output_dir = profiler.runcall(run, args, metrics, **writer_options)
+        profile_path = os.path.join(output_dir, "profile.pstats")
+        profiler.dump_stats(profile_path)
+        pstats.Stats(profile_path).sort_stats("cumulative").print_stats(20)
+        print(f"Profile written to {profile_path}")
+    else:
+        output_dir = run(args, metrics, **writer_options)
+
+    if metrics is not None:
+        metrics.stop()
+        print(f"Run metrics written to {os.path.join(output_dir, 'run_metrics.json')}")
@@ -0,0 +1,317 @@
+"""
+mapping_cache.py
+
+Provides the MappingCache class which stores GenAI mapping results keyed by a
+canonical fingerprint of the schemas and business context, so identical
+re-runs do not call the model again.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from models import TableSchema
+
+# Eviction frees the disk tier down to this fraction of max_disk_bytes, so a
+# full cache is not rescanned on every write.
+EVICT_TO_FRACTION = 0.9
+
+
+def table_fingerprint(table: TableSchema) -> str:
+    """
+    Computes a canonical hash of a single table definition.
+
+    Field order, datatype case and whitespace do not affect the hash.
+
+    Args:
+        table: TableSchema object.
+
+    Returns:
+        Hex digest string.
+    """
+    fields = sorted(
+        (f.name, " ".join(str(f.datatype).upper().split()), bool(f.nullable), bool(f.primary_key))
+        for f in table.fields
+    )
+    relationships = sorted((table.relationships or {}).items())
+    canonical = json.dumps([table.table_name, fields, relationships], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def schema_fingerprint(tables: List[TableSchema]) -> str:
+    """
+    Computes a canonical hash of a full schema, independent of table order.
+
+    Args:
+        tables: List of TableSchema objects.
+
+    Returns:
+        Hex digest string.
+    """
+    digest = hashlib.sha256()
+    for fingerprint in sorted(table_fingerprint(t) for t in tables):
+        digest.update(fingerprint.encode("ascii"))
+    return digest.hexdigest()
+
+
+def context_fingerprint(context: str) -> str:
+    """
+    Hashes the business context with surrounding and repeated whitespace removed.
+
+    Args:
+        context: Business context string.
+
+    Returns:
+        Hex digest string.
+    """
+    return hashlib.sha256(" ".join((context or "").split()).encode("utf-8")).hexdigest()
+
+
+class MappingCache:
+    """
+    Two-tier cache for mapping results: an in-memory LRU in front of an
+    optional on-disk store with size and age limits.
+
+    Values are JSON-serialisable dicts. Keys are hex digests built with the
+    ``mapping_key`` and ``table_key`` helpers.
+
+    The size of the disk tier is tracked as a running total, so the cache
+    directory is only listed on the first write and when the total passes
+    max_disk_bytes. Entries written by other processes sharing the directory
+    are counted at those scans.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 256,
+                 max_disk_bytes: int = 512 * 1024 * 1024, ttl_seconds: Optional[float] = 30 * 24 * 3600):
+        """
+        Args:
+            cache_dir: Directory of the on-disk tier; memory only when None.
+            max_entries: Maximum number of entries kept in memory.
+            max_disk_bytes: Maximum total size of the on-disk tier.
+            ttl_seconds: Age after which entries expire; never when None.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._disk_bytes: Optional[int] = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def mapping_key(self, source: List[TableSchema], target: List[TableSchema], context: str) -> str:
+        """
+        Builds the key of a complete mapping run.
+
+        Args:
+            source: Source schema.
+            target: Target schema.
+            context: Business context string.
+
+        Returns:
+            Cache key.
+        """
+        return self._combine("mapping", schema_fingerprint(source), schema_fingerprint(target),
+                             context_fingerprint(context))
+
+    def table_key(self, source_table: TableSchema, target_fingerprint: str, context: str) -> str:
+        """
+        Builds the key of the mappings produced for a single source table.
+
+        Args:
+            source_table: Source TableSchema.
+            target_fingerprint: schema_fingerprint of the full target schema.
+            context: Business context string.
+
+        Returns:
+            Cache key.
+        """
+        return self._combine("table", table_fingerprint(source_table), target_fingerprint,
+                             context_fingerprint(context))
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Looks up a value, promoting disk hits into the memory tier.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            Cached value or None.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._memory[key]
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, value, now)
+        return value
+
+    def put(self, key: str, value: Dict):
+        """
+        Stores a value in both tiers.
+
+        Args:
+            key: Cache key.
+            value: JSON-serialisable dict.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+        if self.cache_dir:
+            growth = self._write_disk(key, value)
+            with self._lock:
+                if self._disk_bytes is not None:
+                    self._disk_bytes += growth
+                scan = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+            if scan:
+                self._evict_disk(now)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss counters and the overall hit ratio.
+
+        Returns:
+            Dict of statistics.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """
+        Removes every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        for path in self._disk_entries():
+            self._remove(path)
+        with self._lock:
+            self._disk_bytes = None
+
+    def _combine(self, kind: str, *parts: str) -> str:
+        """
+        Hashes a key kind and its fingerprints into one cache key.
+        """
+        return hashlib.sha256(":".join((kind,) + parts).encode("ascii")).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        """
+        Checks whether an entry written at ``created`` is past its TTL.
+        """
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _remember(self, key: str, value: Dict, now: float):
+        """
+        Inserts into the memory tier, evicting the least recently used entries.
+        """
+        self._memory[key] = (now, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        """
+        Returns the on-disk file path of a key.
+        """
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Dict]:
+        """
+        Reads a key from the disk tier, dropping it when it has expired.
+        """
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            if self._expired(os.path.getmtime(path), now):
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: Dict) -> int:
+        """
+        Writes a key atomically so concurrent readers never see partial files,
+        and returns by how many bytes the disk tier grew.
+        """
+        data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data) - replaced
+
+    def _disk_entries(self) -> List[str]:
+        """
+        Lists the entry files of the disk tier.
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+
+    def _evict_disk(self, now: float):
+        """
+        Drops expired entries and, when the disk tier exceeds max_disk_bytes,
+        the oldest ones until it fits in EVICT_TO_FRACTION of the limit.
+        Resets the running size total.
+        """
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self._expired(stat.st_mtime, now):
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_disk_bytes if total <= self.max_disk_bytes else self.max_disk_bytes * EVICT_TO_FRACTION
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def _remove(self, path: str):
+        """
+        Deletes an entry file, ignoring files already removed by another process.
+        """
+        try:
+            os.remove(path)
+            with self._lock:
+                self._stats["evictions"] += 1
+        except OSError:
+            pass
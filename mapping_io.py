@@ -0,0 +1,323 @@
+"""
+mapping_io.py
+
+Serializes MigrationMapping objects to and from disk. JSON output is written
+one table mapping at a time, and a compact binary format stores every
+distinct string once for very large mappings. Both round-trip losslessly, so a
+saved mapping can be reused without calling the GenAI engine again.
+"""
+
+import json
+import struct
+import zlib
+from array import array
+from typing import IO, Dict, List, Optional
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+
+BINARY_MAGIC = b"MMAP"
+BINARY_VERSION = 1
+BINARY_EXTENSIONS = (".mmap", ".bin")
+
+
+def mapping_to_dict(mapping: MigrationMapping) -> Dict:
+    """
+    Converts a MigrationMapping to plain dicts and lists.
+
+    Args:
+        mapping: MigrationMapping object.
+
+    Returns:
+        JSON-serialisable dict.
+    """
+    data = _header_dict(mapping)
+    data["table_mappings"] = [table_mapping_to_dict(t) for t in mapping.table_mappings]
+    return data
+
+
+def table_mapping_to_dict(table_map: TableMapping) -> Dict:
+    """
+    Converts a TableMapping to plain dicts and lists.
+
+    Args:
+        table_map: TableMapping object.
+
+    Returns:
+        JSON-serialisable dict.
+    """
+    return {
+        "source_table": table_map.source_table,
+        "target_table": table_map.target_table,
+        "field_mappings": [
+            {"source_field": f.source_field, "target_field": f.target_field, "transformation": f.transformation}
+            for f in table_map.field_mappings
+        ],
+        "strategy": table_map.strategy,
+        "complexity": table_map.complexity,
+    }
+
+
+def mapping_from_dict(data: Dict) -> MigrationMapping:
+    """
+    Builds a MigrationMapping from its dict form.
+
+    Args:
+        data: Dict as produced by mapping_to_dict or the GenAI response.
+
+    Returns:
+        MigrationMapping instance.
+    """
+    return MigrationMapping(
+        source_system=data["source_system"],
+        target_system=data["target_system"],
+        confidence_score=data.get("confidence_score"),
+        table_mappings=[table_mapping_from_dict(t) for t in data.get("table_mappings", [])],
+        notes=data.get("notes", "")
+    )
+
+
+def table_mapping_from_dict(data: Dict) -> TableMapping:
+    """
+    Builds a TableMapping from its dict form.
+
+    Args:
+        data: Dict with the TableMapping attributes.
+
+    Returns:
+        TableMapping instance.
+    """
+    return TableMapping(
+        source_table=data["source_table"],
+        target_table=data["target_table"],
+        field_mappings=[FieldMapping(**f) for f in data.get("field_mappings", [])],
+        strategy=data.get("strategy"),
+        complexity=data.get("complexity")
+    )
+
+
+def table_schema_to_dict(table: TableSchema) -> Dict:
+    """
+    Converts a parsed TableSchema to plain dicts and lists.
+
+    Args:
+        table: TableSchema object.
+
+    Returns:
+        JSON-serialisable dict in the format read by parse_json_schema.
+    """
+    return {
+        "table_name": table.table_name,
+        "fields": [
+            {"name": f.name, "datatype": f.datatype, "nullable": f.nullable, "primary_key": f.primary_key}
+            for f in table.fields
+        ],
+        "relationships": dict(table.relationships or {}),
+    }
+
+
+def table_schema_from_dict(data: Dict) -> TableSchema:
+    """
+    Builds a TableSchema from its dict form.
+
+    Args:
+        data: Dict as produced by table_schema_to_dict.
+
+    Returns:
+        TableSchema instance.
+    """
+    return TableSchema(
+        table_name=data["table_name"],
+        fields=[SchemaField(**f) for f in data.get("fields", [])],
+        relationships=data.get("relationships") or {}
+    )
+
+
+def write_mapping_json(mapping: MigrationMapping, stream: IO[str]):
+    """
+    Streams a mapping as JSON, one table mapping per line.
+
+    Only one table mapping is encoded at a time, so memory does not grow
+    with the size of the mapping.
+
+    Args:
+        mapping: MigrationMapping object.
+        stream: Writable text stream.
+    """
+    header = _header_dict(mapping)
+    stream.write("{\n")
+    for key, value in header.items():
+        stream.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+    stream.write('  "table_mappings": [')
+    separator = "\n    "
+    for table_map in mapping.table_mappings:
+        stream.write(separator)
+        stream.write(json.dumps(table_mapping_to_dict(table_map), separators=(",", ":")))
+        separator = ",\n    "
+    stream.write("\n  ]\n}\n" if mapping.table_mappings else "]\n}\n")
+
+
+def write_mapping_binary(mapping: MigrationMapping, stream: IO[bytes], compress: bool = True):
+    """
+    Writes a mapping in the compact binary format.
+
+    Layout: magic, version, flags, then a (optionally zlib-compressed) payload
+    of a string table (lengths + UTF-8 blob), a uint32 index array describing
+    the mapping structure and the confidence score. Index 0 encodes None.
+
+    Args:
+        mapping: MigrationMapping object.
+        stream: Writable binary stream.
+        compress: Whether to zlib-compress the payload.
+    """
+    strings: Dict[str, int] = {}
+    values = array("I")
+
+    def ref(value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings) + 1
+        return index
+
+    values.extend((ref(mapping.source_system), ref(mapping.target_system), ref(mapping.notes),
+                   len(mapping.table_mappings)))
+    for t in mapping.table_mappings:
+        values.extend((ref(t.source_table), ref(t.target_table), ref(t.strategy), ref(t.complexity),
+                       len(t.field_mappings)))
+        for f in t.field_mappings:
+            values.extend((ref(f.source_field), ref(f.target_field), ref(f.transformation)))
+
+    encoded = [s.encode("utf-8") for s in strings]
+    lengths = array("I", (len(b) for b in encoded))
+    confidence = mapping.confidence_score
+    payload = b"".join((
+        struct.pack("<?dII", confidence is not None, confidence or 0.0, len(lengths), len(values)),
+        _little_endian(lengths),
+        b"".join(encoded),
+        _little_endian(values),
+    ))
+    if compress:
+        payload = zlib.compress(payload, 6)
+    stream.write(BINARY_MAGIC + struct.pack("<BB", BINARY_VERSION, 1 if compress else 0))
+    stream.write(payload)
+
+
+def read_mapping_binary(stream: IO[bytes]) -> MigrationMapping:
+    """
+    Reads a mapping written by write_mapping_binary.
+
+    Args:
+        stream: Readable binary stream.
+
+    Returns:
+        MigrationMapping instance.
+
+    Raises:
+        ValueError: If the data is not in the expected format.
+    """
+    header = stream.read(6)
+    if len(header) != 6 or header[:4] != BINARY_MAGIC:
+        raise ValueError("Not a binary migration mapping file")
+    version, flags = struct.unpack("<BB", header[4:])
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary mapping version: {version}")
+    payload = stream.read()
+    if flags & 1:
+        payload = zlib.decompress(payload)
+
+    has_confidence, confidence, string_count, value_count = struct.unpack_from("<?dII", payload)
+    offset = struct.calcsize("<?dII")
+    lengths = _read_uint32(payload, offset, string_count)
+    offset += 4 * string_count
+    strings: List[Optional[str]] = [None]
+    for length in lengths:
+        strings.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    values = _read_uint32(payload, offset, value_count)
+
+    source_system, target_system, notes, table_count = (strings[values[0]], strings[values[1]],
+                                                        strings[values[2]], values[3])
+    position = 4
+    table_mappings = []
+    for _ in range(table_count):
+        source_table, target_table, strategy, complexity, field_count = values[position:position + 5]
+        position += 5
+        field_mappings = []
+        for _ in range(field_count):
+            source_field, target_field, transformation = values[position:position + 3]
+            position += 3
+            field_mappings.append(FieldMapping(strings[source_field], strings[target_field], strings[transformation]))
+        table_mappings.append(TableMapping(strings[source_table], strings[target_table], field_mappings,
+                                           strings[strategy], strings[complexity]))
+    return MigrationMapping(source_system, target_system, confidence if has_confidence else None,
+                            table_mappings, notes)
+
+
+def save_mapping(mapping: MigrationMapping, path: str):
+    """
+    Saves a mapping, choosing the format from the file extension
+    (.mmap/.bin for binary, anything else for JSON).
+
+    Args:
+        mapping: MigrationMapping object.
+        path: Destination file path.
+    """
+    if path.endswith(BINARY_EXTENSIONS):
+        with open(path, "wb") as f:
+            write_mapping_binary(mapping, f)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            write_mapping_json(mapping, f)
+
+
+def load_mapping(path: str) -> MigrationMapping:
+    """
+    Loads a mapping saved by save_mapping (or the orchestrator).
+
+    Args:
+        path: Mapping file path.
+
+    Returns:
+        MigrationMapping instance.
+    """
+    with open(path, "rb") as f:
+        if f.read(4) == BINARY_MAGIC:
+            f.seek(0)
+            return read_mapping_binary(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return mapping_from_dict(json.load(f))
+
+
+def _header_dict(mapping: MigrationMapping) -> Dict:
+    """
+    Returns the run-level attributes of a mapping in serialization order.
+    """
+    return {
+        "source_system": mapping.source_system,
+        "target_system": mapping.target_system,
+        "confidence_score": mapping.confidence_score,
+        "notes": mapping.notes,
+    }
+
+
+def _little_endian(values: array) -> bytes:
+    """
+    Encodes a uint32 array as little-endian bytes.
+    """
+    if values.itemsize != 4:
+        raise ValueError("array('I') must be 32-bit on this platform")
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_uint32(payload: bytes, offset: int, count: int) -> array:
+    """
+    Decodes ``count`` little-endian uint32 values starting at ``offset``.
+    """
+    values = array("I")
+    values.frombytes(payload[offset:offset + 4 * count])
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        values.byteswap()
+    return values
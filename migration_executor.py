@@ -0,0 +1,524 @@
+"""
+migration_executor.py
+
+Executes generated migration SQL against live databases. Tables are loaded
+concurrently on a worker pool in foreign-key dependency order, so parents are
+always loaded before their children.
+"""
+
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set
+from models import (IncrementalPlan, MigrationMapping, PartitionPlan, StagingPlan, TableLoadResult, TableMapping,
+                    TableSchema)
+from run_manifest import table_key
+from sql_dialects import SQLDialect, SQLiteDialect
+from sql_generator import RUN_ID_COLUMN, SQLGenerator, balanced_boundaries
+from watermark_store import WatermarkStore
+
+
+class ConnectionFactory(ABC):
+    """
+    Creates DB-API connections for migration workers.
+
+    Subclasses open one connection per call; every worker gets its own, so a
+    factory must be safe to call from several threads.
+    """
+
+    @abstractmethod
+    def connect(self):
+        """
+        Opens a new DB-API 2.0 connection.
+
+        Returns:
+            Connection object with cursor(), commit(), rollback() and close().
+        """
+
+    def dialect(self) -> SQLDialect:
+        """
+        Returns the SQL dialect of the databases this factory connects to.
+        """
+        return SQLDialect()
+
+
+class SQLiteConnectionFactory(ConnectionFactory):
+    """
+    Connection factory for local SQLite databases.
+
+    The source database is attached to every connection as ``source``, so the
+    generated ``INSERT INTO target ... SELECT ... FROM "source".table``
+    statements resolve across both files; without one the source tables are
+    read from the target database. ``hashtext`` and ``MOD`` are registered so hash
+    batches and checksum reconciliation queries run unchanged.
+    """
+
+    def __init__(self, target_db: str, source_db: Optional[str] = None, timeout: float = 60.0):
+        """
+        Args:
+            target_db: Path of the SQLite database receiving the data.
+            source_db: Optional path of the SQLite database holding the source tables.
+            timeout: Seconds to wait on a locked database before failing.
+        """
+        self.target_db = target_db
+        self.source_db = source_db
+        self.timeout = timeout
+
+    def connect(self):
+        connection = sqlite3.connect(self.target_db, timeout=self.timeout, check_same_thread=False)
+        connection.create_function("hashtext", 1, _hashtext, deterministic=True)
+        connection.create_function("MOD", 2, _mod, deterministic=True)
+        if self.source_db:
+            connection.execute("ATTACH DATABASE ? AS source", (self.source_db,))
+        return connection
+
+    def dialect(self) -> SQLDialect:
+        return SQLiteDialect(source_database=self.source_db)
+
+
+def _hashtext(value):
+    """
+    Signed 32-bit CRC of a text value, standing in for PostgreSQL's hashtext().
+    """
+    if value is None:
+        return None
+    digest = zlib.crc32(str(value).encode("utf-8"))
+    return digest - (1 << 32) if digest >= (1 << 31) else digest
+
+
+def _mod(value, divisor):
+    """
+    Integer modulo with SQL NULL semantics.
+    """
+    if value is None or not divisor:
+        return None
+    return int(value) % int(divisor)
+
+
+def prepare_run_tracking(connection, mapping: MigrationMapping, sql_generator: SQLGenerator):
+    """
+    Adds the indexed run ID column to every target table missing it, so
+    loads of a run-tracking SQLGenerator can tag their rows.
+
+    Args:
+        connection: Open DB-API connection to the target database.
+        mapping: MigrationMapping object.
+        sql_generator: SQLGenerator with a run ID.
+    """
+    dialect = sql_generator.dialect
+    cursor = connection.cursor()
+    for target in dict.fromkeys(t.target_table for t in mapping.table_mappings if t.field_mappings):
+        cursor.execute(f"SELECT * FROM {dialect.quote(target)} WHERE 1 = 0")
+        columns = {d[0].lower() for d in cursor.description}
+        for statement in dialect.iter_run_column_sql(target, RUN_ID_COLUMN):
+            if columns and RUN_ID_COLUMN in columns and statement.startswith("ALTER TABLE"):
+                continue
+            cursor.execute(statement)
+    connection.commit()
+
+
+def build_dependency_graph(mapping: MigrationMapping,
+                           schemas: Optional[List[TableSchema]] = None) -> Dict[str, Set[str]]:
+    """
+    Builds the load-order DAG between the table mappings of a migration.
+
+    A table mapping depends on another when its source or target table has a
+    foreign key referencing that mapping's source or target table. Mappings
+    are identified by their table_key, so several mappings loading the same
+    target table stay separate nodes.
+
+    Args:
+        mapping: MigrationMapping object.
+        schemas: Parsed source and/or target tables carrying relationships.
+
+    Returns:
+        Dict of table mapping key -> set of keys of the mappings it depends on.
+    """
+    by_source: Dict[str, List[str]] = {}
+    by_target: Dict[str, List[str]] = {}
+    for t in mapping.table_mappings:
+        key = table_key(t.source_table, t.target_table)
+        by_source.setdefault(t.source_table, []).append(key)
+        by_target.setdefault(t.target_table, []).append(key)
+    owner = dict(by_source, **by_target)
+    graph: Dict[str, Set[str]] = {table_key(t.source_table, t.target_table): set() for t in mapping.table_mappings}
+    for schema in schemas or []:
+        children = owner.get(schema.table_name, [])
+        for reference in (schema.relationships or {}).values():
+            parent_table = reference.split("(", 1)[0]
+            if parent_table == schema.table_name:
+                continue
+            for child in children:
+                graph[child].update(parent for parent in owner.get(parent_table, []) if parent != child)
+    return graph
+
+
+def mappings_by_key(mapping: MigrationMapping) -> Dict[str, TableMapping]:
+    """
+    Indexes the table mappings of a migration by their table_key.
+
+    Args:
+        mapping: MigrationMapping object.
+
+    Returns:
+        Dict of table mapping key -> TableMapping, in mapping order.
+    """
+    return {table_key(t.source_table, t.target_table): t for t in mapping.table_mappings}
+
+
+def dependency_levels(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Groups tables into levels that can be loaded concurrently.
+
+    Args:
+        graph: Dependency graph from build_dependency_graph.
+
+    Returns:
+        List of levels; every table only depends on tables in earlier levels.
+
+    Raises:
+        ValueError: If the foreign keys form a cycle.
+    """
+    remaining = {table: set(parents) for table, parents in graph.items()}
+    levels = []
+    while remaining:
+        ready = sorted(table for table, parents in remaining.items() if not parents)
+        if not ready:
+            raise ValueError(f"Circular foreign key dependencies between tables: {sorted(remaining)}")
+        levels.append(ready)
+        for table in ready:
+            del remaining[table]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+    return levels
+
+
+class MigrationExecutor:
+    """
+    Runs the migration of every table mapping on a pool of worker threads.
+    """
+
+    def __init__(self, connection_factory: ConnectionFactory, max_workers: int = 4,
+                 batch_size: Optional[int] = None, sql_generator: Optional[SQLGenerator] = None,
+                 watermarks: Optional[WatermarkStore] = None, partitions: int = 1,
+                 partition_min_rows: int = 1000000, sample_size: int = 10000):
+        """
+        Args:
+            connection_factory: Factory opening one connection per worker task.
+            max_workers: Maximum number of tables loaded concurrently.
+            batch_size: When set, tables are copied in keyset batches of this
+                many rows, each committed on its own.
+            sql_generator: SQLGenerator used to build the statements; by
+                default one in the dialect of the connection factory.
+            watermarks: WatermarkStore of incremental loads; tables with
+                strategy "incremental" only copy rows past their stored mark
+                and advance it after a successful load.
+            partitions: When above 1, tables with at least partition_min_rows
+                rows are split into this many partitions, each loaded on its
+                own worker thread and connection. Takes precedence over
+                batch_size.
+            partition_min_rows: Smallest table that is partitioned.
+            sample_size: Keys sampled to balance range partitions.
+
+        When the SQL generator has a run ID, the target tables get the run ID
+        column before loading and rollback() can undo exactly this run.
+        """
+        self.connection_factory = connection_factory
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.sql_generator = sql_generator or SQLGenerator(dialect=connection_factory.dialect())
+        self.watermarks = watermarks
+        self.partitions = partitions
+        self.partition_min_rows = partition_min_rows
+        self.sample_size = sample_size
+
+    def execute(self, mapping: MigrationMapping, source_schema: Optional[List[TableSchema]] = None,
+                target_schema: Optional[List[TableSchema]] = None) -> List[TableLoadResult]:
+        """
+        Loads all tables, starting each one as soon as its parents are loaded.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables (primary and foreign keys).
+            target_schema: Parsed target tables (foreign keys).
+
+        Returns:
+            TableLoadResult per table mapping, in mapping order.
+        """
+        schemas = list(source_schema or []) + list(target_schema or [])
+        graph = build_dependency_graph(mapping, schemas)
+        dependency_levels(graph)
+        if self.sql_generator.run_id is not None:
+            connection = self.connection_factory.connect()
+            try:
+                prepare_run_tracking(connection, mapping, self.sql_generator)
+            finally:
+                connection.close()
+        plans = {}
+        if self.batch_size:
+            for plan in self.sql_generator.plan_batches(mapping, source_schema or [], self.batch_size):
+                plans[table_key(plan.source_table, plan.target_table)] = plan
+        if self.partitions > 1:
+            for plan in self.sql_generator.plan_partitions(mapping, source_schema or [], self.partitions):
+                plans[table_key(plan.source_table, plan.target_table)] = plan
+        for plan in self.sql_generator.plan_incremental(mapping, source_schema or []):
+            plans[table_key(plan.source_table, plan.target_table)] = plan
+        for plan in self.sql_generator.plan_staging(mapping, target_schema):
+            plans[table_key(plan.source_table, plan.target_table)] = plan
+        tables = mappings_by_key(mapping)
+        waiting = {key: set(parents) for key, parents in graph.items()}
+        results: Dict[str, TableLoadResult] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while waiting or running:
+                for key in sorted(k for k, parents in waiting.items() if not parents):
+                    del waiting[key]
+                    running[pool.submit(self._load_table, tables[key], plans.get(key))] = key
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    results[key] = future.result()
+                    if results[key].status == "completed":
+                        for parents in waiting.values():
+                            parents.discard(key)
+                    else:
+                        self._skip_dependents(key, waiting, tables, results)
+
+        return [results[key] for key in (table_key(t.source_table, t.target_table) for t in mapping.table_mappings)
+                if key in results]
+
+    def rollback(self, mapping: MigrationMapping, run_id: Optional[str] = None,
+                 source_schema: Optional[List[TableSchema]] = None,
+                 target_schema: Optional[List[TableSchema]] = None) -> Dict[str, int]:
+        """
+        Deletes the rows loaded by one run, children before parents, in a
+        single transaction.
+
+        Args:
+            mapping: MigrationMapping object.
+            run_id: Run to roll back; defaults to the SQL generator's run ID.
+                Without any run ID the target tables are emptied.
+            source_schema: Parsed source tables (foreign keys).
+            target_schema: Parsed target tables (foreign keys).
+
+        Returns:
+            Dict of target table -> number of rows deleted.
+        """
+        graph = build_dependency_graph(mapping, list(source_schema or []) + list(target_schema or []))
+        tables = mappings_by_key(mapping)
+        order = [tables[key] for level in reversed(dependency_levels(graph)) for key in level]
+        deleted: Dict[str, int] = {}
+        connection = self.connection_factory.connect()
+        try:
+            cursor = connection.cursor()
+            for table_map in order:
+                table = table_map.target_table
+                if table in deleted:
+                    continue  # another mapping into the same table already removed the run's rows
+                deleted[table] = 0
+                single = MigrationMapping(mapping.source_system, mapping.target_system,
+                                          mapping.confidence_score, [table_map])
+                for statement in self.sql_generator.iter_rollback_sql(single, run_id):
+                    cursor.execute(statement)
+                    deleted[table] += max(cursor.rowcount, 0)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return deleted
+
+    def _skip_dependents(self, failed: str, waiting: Dict[str, Set[str]],
+                         tables: Dict[str, TableMapping], results: Dict[str, TableLoadResult]):
+        """
+        Marks every table mapping that (transitively) depends on a failed one as skipped.
+        """
+        blocked = [failed]
+        while blocked:
+            parent = blocked.pop()
+            for key in [k for k, parents in waiting.items() if parent in parents]:
+                del waiting[key]
+                results[key] = TableLoadResult(
+                    source_table=tables[key].source_table,
+                    target_table=tables[key].target_table,
+                    status="skipped",
+                    error=f"Parent table {tables[parent].target_table} was not loaded",
+                )
+                blocked.append(key)
+
+    def _load_table(self, table_map: TableMapping, plan=None) -> TableLoadResult:
+        """
+        Loads one table on a dedicated connection.
+
+        Args:
+            table_map: TableMapping to load.
+            plan: Optional BatchPlan for chunked loading, PartitionPlan for
+                a parallel partitioned load, IncrementalPlan for a
+                watermark-based delta load or StagingPlan for a load swapped
+                into place.
+
+        Returns:
+            TableLoadResult describing the outcome.
+        """
+        result = TableLoadResult(table_map.source_table, table_map.target_table, status="completed")
+        started = time.perf_counter()
+        connection = self.connection_factory.connect()
+        try:
+            if isinstance(plan, IncrementalPlan):
+                self._load_incremental(connection, plan, result)
+            elif isinstance(plan, StagingPlan):
+                self._load_staged(connection, plan, result)
+            elif isinstance(plan, PartitionPlan):
+                self._load_partitioned(connection, plan, result)
+            elif plan is None:
+                if table_map.field_mappings:
+                    result.rows = self._run_batch(connection, self.sql_generator.generate_table_migration_sql(table_map), {})
+                    result.batches = 1
+            elif plan.mode == "hash":
+                for bucket in range(plan.hash_buckets):
+                    result.rows += self._run_batch(connection, plan.batch_sql, {"bucket": bucket})
+                    result.batches += 1
+            else:
+                cursor = connection.cursor()
+                next_key = cursor.execute(plan.first_boundary_sql).fetchone()[0]
+                params = {"next_key": next_key}
+                sql = plan.first_batch_sql
+                while next_key is not None:
+                    result.rows += self._run_batch(connection, sql, params)
+                    result.batches += 1
+                    last_key = next_key
+                    next_key = cursor.execute(plan.boundary_sql, {"last_key": last_key}).fetchone()[0]
+                    params = {"last_key": last_key, "next_key": next_key}
+                    sql = plan.batch_sql
+        except Exception as e:
+            connection.rollback()
+            result.status = "failed"
+            result.error = str(e)
+        finally:
+            connection.close()
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _load_incremental(self, connection, plan: IncrementalPlan, result: TableLoadResult):
+        """
+        Upserts the rows between the stored and the current high-water mark,
+        then records the new mark.
+
+        Args:
+            connection: Open DB-API connection.
+            plan: IncrementalPlan of the table.
+            result: TableLoadResult updated in place.
+        """
+        high_mark = connection.cursor().execute(plan.high_mark_sql).fetchone()[0]
+        if high_mark is None:
+            return
+        last_mark = None
+        if self.watermarks is not None:
+            last_mark = self.watermarks.get(plan.source_table, plan.target_table, plan.watermark_column)
+        if last_mark is None:
+            result.rows = self._run_batch(connection, plan.full_sql, {"high_mark": high_mark})
+        else:
+            result.rows = self._run_batch(connection, plan.delta_sql, {"last_mark": last_mark, "high_mark": high_mark})
+        result.batches = 1
+        if self.watermarks is not None:
+            self.watermarks.set(plan.source_table, plan.target_table, plan.watermark_column, high_mark)
+
+    def _load_partitioned(self, connection, plan: PartitionPlan, result: TableLoadResult):
+        """
+        Loads a large table as disjoint partitions, each on its own worker
+        thread and connection; small tables are loaded in one statement.
+
+        Range boundaries are taken at the quantiles of a random key sample,
+        so skewed keys still yield partitions of similar size. A failed
+        partition fails the table, while the partitions already committed
+        stay loaded.
+
+        Args:
+            connection: Open DB-API connection used for counting and sampling.
+            plan: PartitionPlan of the table.
+            result: TableLoadResult updated in place.
+        """
+        cursor = connection.cursor()
+        row_count = cursor.execute(plan.count_sql).fetchone()[0]
+        if row_count < max(self.partition_min_rows, 1):
+            statements = [f"{plan.insert_sql};"]
+        elif plan.mode == "hash":
+            statements = self.sql_generator.render_partitions(plan)
+        else:
+            sample_sql = self.sql_generator.sample_keys_sql(plan, row_count, self.sample_size)
+            sample = [row[0] for row in cursor.execute(sample_sql).fetchall()]
+            statements = self.sql_generator.render_partitions(plan, balanced_boundaries(sample, plan.partitions))
+        if len(statements) == 1:
+            result.rows = self._run_batch(connection, statements[0], {})
+        else:
+            with ThreadPoolExecutor(max_workers=len(statements)) as pool:
+                result.rows = sum(pool.map(self._run_partition, statements))
+        result.batches = len(statements)
+
+    def _run_partition(self, sql: str) -> int:
+        """
+        Runs one partition statement on a dedicated connection.
+
+        Returns:
+            Number of rows inserted.
+        """
+        connection = self.connection_factory.connect()
+        try:
+            return self._run_batch(connection, sql, {})
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _load_staged(self, connection, plan: StagingPlan, result: TableLoadResult):
+        """
+        Loads a staging table, builds its keys, checks its row count against
+        the source and swaps it into place.
+
+        Args:
+            connection: Open DB-API connection.
+            plan: StagingPlan of the table.
+            result: TableLoadResult updated in place.
+
+        Raises:
+            ValueError: If the staged row count differs from the source; the
+                target table is left untouched.
+        """
+        cursor = connection.cursor()
+        for statement in plan.create_sql:
+            cursor.execute(statement)
+        connection.commit()
+        result.rows = self._run_batch(connection, plan.load_sql, {})
+        result.batches = 1
+        for statement in plan.index_sql:
+            cursor.execute(statement)
+        connection.commit()
+        source_rows = cursor.execute(plan.source_count_sql).fetchone()[0]
+        staged_rows = cursor.execute(plan.staging_count_sql).fetchone()[0]
+        if source_rows != staged_rows:
+            cursor.execute(plan.create_sql[0])
+            connection.commit()
+            raise ValueError(f"Staging table {plan.staging_table} holds {staged_rows} rows, "
+                             f"source table {plan.source_table} has {source_rows}")
+        for statement in plan.swap_sql:
+            cursor.execute(statement)
+        connection.commit()
+
+    def _run_batch(self, connection, sql: str, params: Dict) -> int:
+        """
+        Executes one statement in its own transaction.
+
+        Returns:
+            Number of rows affected.
+        """
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        connection.commit()
+        return max(cursor.rowcount, 0)
@@ -5,11 +5,23 @@ Contains data model classes used across the MA Migration System.
 Each class represents a structured entity such as a field, table, or full migration mapping.
 """
 
+import sys
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 
+# Schema and mapping objects exist by the hundred thousand for large warehouses,
+# so they drop the per-instance __dict__ where the interpreter supports it.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """
+    Interns repeated identifier strings (field names, datatypes, strategies).
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(**_SLOTS)
 class SchemaField:
     """
     Represents a single column/field in a database table.
@@ -25,8 +37,12 @@ class SchemaField:
     nullable: bool = True
     primary_key: bool = False
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.datatype = _intern(self.datatype)
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class TableSchema:
     """
     Represents a database table schema including its fields and foreign key relationships.
@@ -34,14 +50,15 @@ class TableSchema:
     Attributes:
         table_name: Name of the table.
         fields: List of SchemaField objects.
-        relationships: Foreign key relationships to other tables (optional).
+        relationships: Foreign key relationships to other tables, mapping a local
+            column to the referenced ``table(column)`` (optional).
     """
     table_name: str
     fields: List[SchemaField]
     relationships: Optional[Dict[str, str]] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class FieldMapping:
     """
     Maps a single field from a source to a target system.
@@ -55,8 +72,12 @@ class FieldMapping:
     target_field: str
     transformation: Optional[str] = None
 
+    def __post_init__(self):
+        self.source_field = _intern(self.source_field)
+        self.target_field = _intern(self.target_field)
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class TableMapping:
     """
     Maps a table between source and target systems with associated field mappings.
@@ -65,7 +86,8 @@ class TableMapping:
         source_table: Name of the source table.
         target_table: Name of the target table.
         field_mappings: List of FieldMapping objects.
-        strategy: Migration strategy (e.g., full load, incremental).
+        strategy: Migration strategy (e.g., full load, incremental, or
+            staging to load into a staging table swapped into place).
         complexity: Estimated complexity (e.g., low, medium, high).
     """
     source_table: str
@@ -74,8 +96,14 @@ class TableMapping:
     strategy: Optional[str] = "full_load"
     complexity: Optional[str] = "medium"
 
+    def __post_init__(self):
+        self.source_table = _intern(self.source_table)
+        self.target_table = _intern(self.target_table)
+        self.strategy = _intern(self.strategy)
+        self.complexity = _intern(self.complexity)
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class MigrationMapping:
     """
     Represents the complete migration plan for a system.
@@ -92,3 +120,260 @@ class MigrationMapping:
     confidence_score: Optional[float]
     table_mappings: List[TableMapping]
     notes: Optional[str] = ""
+
+
+@dataclass
+class BatchPlan:
+    """
+    Describes how one table mapping is copied in independently committed batches.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        mode: Batching mode ("keyset", "rowid" or "hash").
+        batch_size: Number of rows per keyset/rowid batch.
+        key_column: Column (or pseudo-column) used to page through the source.
+        first_boundary_sql: Query returning the upper key of the first batch.
+        boundary_sql: Query returning the upper key of the batch after :last_key.
+        first_batch_sql: INSERT for the first batch, bound with :next_key.
+        batch_sql: INSERT for later batches, bound with :last_key and :next_key.
+        hash_buckets: Number of buckets when mode is "hash".
+    """
+    source_table: str
+    target_table: str
+    mode: str
+    batch_size: int
+    key_column: Optional[str] = None
+    first_boundary_sql: Optional[str] = None
+    boundary_sql: Optional[str] = None
+    first_batch_sql: Optional[str] = None
+    batch_sql: Optional[str] = None
+    hash_buckets: int = 0
+
+
+@dataclass
+class TableLoadResult:
+    """
+    Outcome of executing the migration of one table mapping.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        status: "completed", "failed" or "skipped" (a parent table failed).
+        rows: Number of rows inserted.
+        batches: Number of committed batches.
+        seconds: Wall-clock duration of the load.
+        error: Error message when the load failed or was skipped.
+    """
+    source_table: str
+    target_table: str
+    status: str
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class PrematchResult:
+    """
+    Outcome of the deterministic pre-matching pass run before the GenAI model.
+
+    Attributes:
+        accepted: Table mappings accepted with high confidence.
+        candidates: Remaining source table name -> candidate target table names.
+    """
+    accepted: List[TableMapping] = field(default_factory=list)
+    candidates: Dict[str, List[str]] = field(default_factory=dict)
+
+
+@dataclass
+class ReconciliationPlan:
+    """
+    Checksum reconciliation queries for one table mapping.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        key_column: Source key (column or expression) reported for mismatches.
+        bucket_mode: "range" (integer key ranges) or "hash" (key hash buckets).
+        bucket_size: Key range per bucket ("range") or number of buckets ("hash").
+        bucket_sql: Query returning buckets whose row count or checksum differ.
+        drilldown_sql: Query returning the offending keys of one bucket; bound
+            with :low and :high for range buckets or :bucket for hash buckets.
+    """
+    source_table: str
+    target_table: str
+    key_column: str
+    bucket_mode: str
+    bucket_size: int
+    bucket_sql: str
+    drilldown_sql: str
+
+
+@dataclass
+class ReconciliationResult:
+    """
+    Outcome of reconciling one table mapping.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        mismatched_buckets: Buckets whose count or checksum differ.
+        offending_keys: Keys that are missing on one side or hold different values.
+        error: Error message when the reconciliation queries failed.
+    """
+    source_table: str
+    target_table: str
+    mismatched_buckets: List = field(default_factory=list)
+    offending_keys: List = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class IncrementalPlan:
+    """
+    Watermark-based delta load of one table mapping.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        watermark_column: Source column whose values only grow (updated_at, PK).
+        high_mark_sql: Query returning the current highest watermark value.
+        full_sql: Upsert of all rows up to :high_mark (first run).
+        delta_sql: Upsert of rows in (:last_mark, :high_mark].
+        script_sql: Statements of a generated script, run in one
+            transaction, that keep the high-water mark in the target
+            database: record the current maximum as the pending mark, upsert
+            the rows past the stored mark up to it, then advance the stored
+            mark.
+    """
+    source_table: str
+    target_table: str
+    watermark_column: str
+    high_mark_sql: str
+    full_sql: str
+    delta_sql: str
+    script_sql: List[str] = field(default_factory=list)
+
+
+@dataclass
+class LoadProgress:
+    """
+    Live progress of one table copied by the DataLoader.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        rows: Rows loaded so far, including rows committed by earlier runs.
+        batches: Batches committed by this run.
+        seconds: Seconds spent on the table by this run.
+        rows_per_second: Load rate of this run.
+        total_rows: Source row count when counted, else None.
+        done: Whether the table is completely loaded.
+    """
+    source_table: str
+    target_table: str
+    rows: int
+    batches: int
+    seconds: float
+    rows_per_second: float
+    total_rows: Optional[int] = None
+    done: bool = False
+
+
+@dataclass
+class StagingPlan:
+    """
+    Load of one table mapping through a staging table swapped into place.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        staging_table: Unindexed table receiving the rows.
+        create_sql: Statements (re)creating the empty staging table.
+        load_sql: INSERT ... SELECT filling the staging table; the dialect's
+            bulk-load script lines when the target connection cannot read
+            the source (see SQLDialect.select_from_source).
+        index_sql: Statements building keys and indexes after the load.
+        source_count_sql: Query counting the source rows.
+        staging_count_sql: Query counting the staged rows.
+        swap_sql: Statements renaming the staging table into place in one
+            short transaction and dropping the replaced table.
+    """
+    source_table: str
+    target_table: str
+    staging_table: str
+    create_sql: List[str]
+    load_sql: str
+    index_sql: List[str]
+    source_count_sql: str
+    staging_count_sql: str
+    swap_sql: List[str]
+
+
+@dataclass
+class PartitionPlan:
+    """
+    Split of one table mapping into disjoint partitions loaded in parallel.
+
+    Attributes:
+        source_table: Name of the source table.
+        target_table: Name of the target table.
+        mode: "range" (primary key), "rowid" (ROWID ranges) or "hash".
+        key_column: Quoted key column, pseudo-column or hashed key expression.
+        partitions: Requested number of partitions.
+        count_sql: Query counting the source rows.
+        insert_sql: INSERT ... SELECT of the table without WHERE clause.
+    """
+    source_table: str
+    target_table: str
+    mode: str
+    key_column: str
+    partitions: int
+    count_sql: str
+    insert_sql: str
+
+
+@dataclass
+class BatchJob:
+    """
+    One source/target pair of a batch manifest.
+
+    Attributes:
+        name: Job name used in the summary report.
+        source_file: Path to the source schema file.
+        target_file: Path to the target schema file.
+        business_context: Description of the business purpose.
+        output_dir: Directory the job writes its outputs to.
+        options: MigrationOrchestrator keyword arguments of this job.
+    """
+    name: str
+    source_file: str
+    target_file: str
+    business_context: str
+    output_dir: str
+    options: Dict = field(default_factory=dict)
+
+
+@dataclass
+class BatchJobResult:
+    """
+    Outcome of one batch job.
+
+    Attributes:
+        name: Job name.
+        output_dir: Directory the job wrote its outputs to.
+        status: "ok" or "failed".
+        seconds: Wall-clock duration of the job.
+        table_mappings: Number of generated table mappings.
+        error: Error message and traceback of a failed job.
+        worker: Process ID of the worker that ran the job.
+    """
+    name: str
+    output_dir: str
+    status: str
+    seconds: float
+    table_mappings: int = 0
+    error: Optional[str] = None
+    worker: Optional[int] = None
@@ -6,12 +6,21 @@ mappings and creating SQL scripts.
 """
 
 import os
-import json
-from typing import List
-from models import TableSchema, MigrationMapping
-from schema_parser import SchemaAnalyzer
+from typing import Dict, Iterator, List, Optional
+from models import TableSchema, MigrationMapping, TableMapping
+from schema_parser import SchemaAnalyzer, expand_schema_inputs
 from ai_mapping_engine import GenAIMappingEngine
-from sql_generator import SQLGenerator
+from mapping_cache import MappingCache, context_fingerprint, table_fingerprint
+from mapping_io import (load_mapping, save_mapping, table_mapping_to_dict, table_schema_from_dict,
+                        table_schema_to_dict)
+from run_manifest import RunManifest, content_hash, file_sha256, inputs_sha256, table_key
+from sql_writer import ArtifactSections, SQLArtifactWriter
+from sql_generator import STAGING_STRATEGY, SQLGenerator
+from sql_dialects import get_dialect
+from watermark_store import WATERMARK_FILE, WatermarkStore
+from instrumentation import metrics_or_null
+
+SQL_ARTIFACTS = ("migration.sql", "validation.sql", "rollback.sql")
 
 
 class MigrationOrchestrator:
@@ -19,71 +28,411 @@ class MigrationOrchestrator:
     Main driver class to execute the full migration workflow.
     """
 
-    def __init__(self):
-        self.parser = SchemaAnalyzer()
-        self.mapper = GenAIMappingEngine()
-        self.sql_generator = SQLGenerator()
+    def __init__(self, batch_size: Optional[int] = None, cache_dir: Optional[str] = None,
+                 prematch: bool = False, metrics=None, split_bytes: Optional[int] = None,
+                 split_by_table: bool = False, compress: bool = False, dialect=None,
+                 run_id: Optional[str] = None, mapping_cache: Optional[MappingCache] = None,
+                 schema_cache: Optional[Dict[str, List[TableSchema]]] = None,
+                 parse_workers: Optional[int] = None):
+        """
+        Args:
+            batch_size: When set, migration.sql is generated as keyset-chunked
+                batches of this many rows instead of one INSERT per table.
+            cache_dir: When set, GenAI mapping results are cached on disk in
+                this directory and reused across runs.
+            prematch: When True, obvious table/field matches are accepted by
+                the NumPy SchemaMatcher before the GenAI model is called.
+            metrics: Optional RunMetrics; when set, every stage is timed and
+                run_metrics.json is written to the output directory.
+            split_bytes: When set, each SQL script is split into numbered
+                files of about this many characters.
+            split_by_table: When True, each table mapping gets its own
+                numbered SQL file.
+            compress: When True, SQL scripts are gzip-compressed as written.
+            dialect: SQLDialect (or its name: "generic", "sqlite",
+                "postgresql") used for quoting and bulk-load statements.
+            run_id: Tags the loaded rows with this run ID, so the generated
+                rollback only deletes the rows of this run.
+            mapping_cache: MappingCache instance to use instead of creating
+                one from cache_dir, so several orchestrators can share it.
+            schema_cache: Dict of parsed schemas keyed by input file SHA-256,
+                shared between orchestrators that read the same files.
+            parse_workers: Worker processes parsing multi-file schema
+                inputs; defaults to the CPU count.
+        """
+        self.batch_size = batch_size
+        self.split_bytes = split_bytes
+        self.split_by_table = split_by_table
+        self.compress = compress
+        self.metrics = metrics_or_null(metrics)
+        self.parser = SchemaAnalyzer(metrics=metrics)
+        prematcher = None
+        if prematch:
+            from schema_matcher import SchemaMatcher
+            prematcher = SchemaMatcher()
+        if mapping_cache is None and cache_dir:
+            mapping_cache = MappingCache(cache_dir)
+        self.schema_cache = schema_cache
+        self.parse_workers = parse_workers
+        self.mapper = GenAIMappingEngine(cache=mapping_cache,
+                                         prematcher=prematcher, metrics=metrics)
+        if isinstance(dialect, str):
+            dialect = get_dialect(dialect)
+        self.sql_generator = SQLGenerator(metrics=metrics, dialect=dialect, run_id=run_id)
 
     def execute_migration_workflow(self, source_file: str, target_file: str,
-                                   business_context: str, output_dir: str) -> MigrationMapping:
+                                   business_context: str, output_dir: str,
+                                   full_rebuild: bool = False) -> MigrationMapping:
         """
         Full pipeline: parse input → AI mapping → SQL generation → save outputs.
 
+        A manifest of per-table content hashes is kept in the output
+        directory. When a previous run used the same target schema and
+        business context, only source tables whose definition changed are
+        mapped again, and only their sections of the SQL files (or all of
+        them, when SQL settings such as batch_size changed) are regenerated.
+        Input files whose bytes did not change are not parsed again.
+
         Args:
             source_file: Path to source schema file (.sql, .csv, .json)
             target_file: Path to target schema file (.sql, .csv, .json)
             business_context: Description of business purpose.
             output_dir: Directory to write outputs.
+            full_rebuild: When True, the manifest of the previous run is ignored.
 
         Returns:
             MigrationMapping object with all mapping info.
         """
-        source_schema = self._parse_input_file(source_file)
-        target_schema = self._parse_input_file(target_file)
-        mapping = self.mapper.generate_mappings(source_schema, target_schema, business_context)
+        with self.metrics.span("workflow"):
+            previous = RunManifest() if full_rebuild else RunManifest.load(output_dir)
+            manifest = RunManifest()
+            with self.metrics.span("parse_source"):
+                source_schema = self._parse_tracked(source_file, "source", previous, manifest)
+            with self.metrics.span("parse_target"):
+                target_schema = self._parse_tracked(target_file, "target", previous, manifest)
+            self._count_schema("source", source_schema)
+            self._count_schema("target", target_schema)
+            manifest.data["context"] = context_fingerprint(business_context)
+            manifest.data["settings"] = self._settings()
 
-        # Generate and save SQL artifacts
-        migration_sql = self.sql_generator.generate_migration_sql(mapping)
-        validation_sql = self.sql_generator.generate_validation_sql(mapping)
-        rollback_sql = self.sql_generator.generate_rollback_sql(mapping)
+            with self.metrics.span("mapping"):
+                previous_mapping = self._reusable_mapping(previous, manifest, output_dir)
+                if previous_mapping is None:
+                    mapping = self.mapper.generate_mappings(source_schema, target_schema, business_context)
+                else:
+                    mapping = self._remap_changed_tables(previous_mapping, previous, source_schema,
+                                                         target_schema, business_context)
+            self.metrics.count("table_mappings", len(mapping.table_mappings))
+            self._write_artifacts(mapping, source_schema, output_dir, previous if previous_mapping else None, manifest,
+                                  target_schema)
+            manifest.save(output_dir)
+        self._write_metrics(output_dir)
+        return mapping
 
-        os.makedirs(output_dir, exist_ok=True)
-        self._save_file(os.path.join(output_dir, "migration_mapping.json"), json.dumps(mapping, default=lambda o: o.__dict__, indent=2))
-        self._save_file(os.path.join(output_dir, "migration.sql"), migration_sql)
-        self._save_file(os.path.join(output_dir, "validation.sql"), validation_sql)
-        self._save_file(os.path.join(output_dir, "rollback.sql"), rollback_sql)
+    def execute_from_saved_mapping(self, mapping_file: str, output_dir: str,
+                                   source_file: Optional[str] = None) -> MigrationMapping:
+        """
+        Regenerates the SQL artifacts from a previously saved mapping without
+        calling the GenAI engine.
+
+        Args:
+            mapping_file: Saved mapping (.json, or .mmap/.bin binary).
+            output_dir: Directory to write outputs.
+            source_file: Optional source schema file, needed for keyset
+                batching, checksum validation and incremental loads.
 
+        Returns:
+            The loaded MigrationMapping.
+        """
+        with self.metrics.span("workflow"):
+            with self.metrics.span("load_mapping"):
+                mapping = load_mapping(mapping_file)
+            with self.metrics.span("parse_source"):
+                source_schema = self._parse_input_file(source_file) if source_file else []
+            self._count_schema("source", source_schema)
+            self._write_artifacts(mapping, source_schema, output_dir)
+        self._write_metrics(output_dir)
         return mapping
 
-    def _parse_input_file(self, file_path: str) -> List[TableSchema]:
+    def _parse_tracked(self, file_path: str, side: str, previous: RunManifest,
+                       manifest: RunManifest) -> List[TableSchema]:
         """
-        Parses a file based on extension type.
+        Parses an input file unless the previous run recorded identical bytes,
+        and records its hash, table fingerprints and parsed tables.
 
         Args:
-            file_path: File path string.
+            file_path: Schema file path, directory or glob pattern.
+            side: "source" or "target".
+            previous: Manifest of the previous run.
+            manifest: Manifest of the current run.
 
         Returns:
             List of TableSchema objects.
         """
-        with open(file_path, "r") as f:
-            content = f.read()
-
-        if file_path.endswith(".sql"):
-            return self.parser.parse_sql_schema(content)
-        elif file_path.endswith(".csv"):
-            return [self.parser.parse_csv_schema(content)]
-        elif file_path.endswith(".json"):
-            return self.parser.parse_json_schema(content)
+        paths = expand_schema_inputs(file_path)
+        digest = file_sha256(file_path) if paths == [file_path] else inputs_sha256(paths)
+        recorded = previous.input(side)
+        if recorded and recorded.get("sha256") == digest and "schema" in recorded:
+            tables = [table_schema_from_dict(t) for t in recorded["schema"]]
+            self.metrics.count("unchanged_inputs")
+        elif self.schema_cache is not None and digest in self.schema_cache:
+            tables = self.schema_cache[digest]
+            self.metrics.count("schema_cache_hits")
         else:
-            raise ValueError("Unsupported file format")
+            tables = self._parse_input_file(file_path)
+            if self.schema_cache is not None:
+                self.schema_cache[digest] = tables
+        manifest.data["inputs"][side] = {
+            "path": os.path.abspath(file_path),
+            "sha256": digest,
+            "tables": {t.table_name: table_fingerprint(t) for t in tables},
+            "schema": [table_schema_to_dict(t) for t in tables],
+        }
+        return tables
+
+    def _count_schema(self, side: str, tables: List[TableSchema]):
+        """
+        Records the table and field counts of a parsed schema.
+        """
+        self.metrics.count(f"{side}_tables", len(tables))
+        self.metrics.count(f"{side}_fields", sum(len(t.fields) for t in tables))
 
-    def _save_file(self, path: str, content: str):
+    def _write_metrics(self, output_dir: str):
         """
-        Saves a text file.
+        Writes run_metrics.json when instrumentation is enabled.
+        """
+        if self.metrics.enabled:
+            self.metrics.write(output_dir)
+
+    def _settings(self) -> Dict:
+        """
+        Returns the orchestrator settings that influence the generated SQL.
+        """
+        dialect = self.sql_generator.dialect
+        return {"batch_size": self.batch_size, "dialect": dict(vars(dialect), name=dialect.name),
+                "run_id": self.sql_generator.run_id}
+
+    def _reusable_mapping(self, previous: RunManifest, manifest: RunManifest,
+                          output_dir: str) -> Optional[MigrationMapping]:
+        """
+        Loads the previous mapping when its target schema and business
+        context match the current run.
+
+        Args:
+            previous: Manifest of the previous run.
+            manifest: Manifest of the current run.
+            output_dir: Output directory of both runs.
+
+        Returns:
+            The previous MigrationMapping, or None when a full run is needed.
+        """
+        if not previous.input("source") or previous.table_fingerprints("target") != manifest.table_fingerprints("target"):
+            return None
+        if previous.data.get("context") != manifest.data["context"]:
+            return None
+        try:
+            return load_mapping(os.path.join(output_dir, "migration_mapping.json"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _remap_changed_tables(self, previous_mapping: MigrationMapping, previous: RunManifest,
+                              source_schema: List[TableSchema], target_schema: List[TableSchema],
+                              business_context: str) -> MigrationMapping:
+        """
+        Maps only new or changed source tables and merges them with the
+        previous mappings of unchanged tables, in source schema order.
+
+        Mappings of source tables removed from the schema are dropped.
 
         Args:
-            path: File path to write to.
-            content: Content string.
+            previous_mapping: Mapping written by the previous run.
+            previous: Manifest of the previous run.
+            source_schema: Current source tables.
+            target_schema: Current target tables.
+            business_context: Description of business purpose.
+
+        Returns:
+            Merged MigrationMapping.
         """
-        with open(path, "w") as f:
-            f.write(content)
+        old_fingerprints = previous.table_fingerprints("source")
+        current = {t.table_name for t in source_schema}
+        removed = {name for name in old_fingerprints if name not in current}
+        kept = [t for t in previous_mapping.table_mappings if t.source_table not in removed]
+        changed = [t for t in source_schema if old_fingerprints.get(t.table_name) != table_fingerprint(t)]
+        if not changed:
+            if len(kept) == len(previous_mapping.table_mappings):
+                return previous_mapping
+            return MigrationMapping(previous_mapping.source_system, previous_mapping.target_system,
+                                    previous_mapping.confidence_score, kept, previous_mapping.notes)
+        changed_names = {t.table_name for t in changed}
+        fresh = self.mapper.generate_mappings(changed, target_schema, business_context)
+
+        by_source: Dict[str, List[TableMapping]] = {}
+        for table_map in kept:
+            if table_map.source_table not in changed_names:
+                by_source.setdefault(table_map.source_table, []).append(table_map)
+        fresh_by_source: Dict[str, List[TableMapping]] = {}
+        for table_map in fresh.table_mappings:
+            fresh_by_source.setdefault(table_map.source_table, []).append(table_map)
+
+        table_mappings = []
+        for table in source_schema:
+            source = fresh_by_source if table.table_name in changed_names else by_source
+            table_mappings.extend(source.pop(table.table_name, []))
+        for extra in (by_source, fresh_by_source):
+            for maps in extra.values():
+                table_mappings.extend(maps)
+
+        scores = [s for s in (previous_mapping.confidence_score, fresh.confidence_score) if s is not None]
+        return MigrationMapping(
+            source_system=previous_mapping.source_system,
+            target_system=previous_mapping.target_system,
+            confidence_score=min(scores) if scores else None,
+            table_mappings=table_mappings,
+            notes=previous_mapping.notes
+        )
+
+    def _write_artifacts(self, mapping: MigrationMapping, source_schema: List[TableSchema], output_dir: str,
+                         previous: Optional[RunManifest] = None, manifest: Optional[RunManifest] = None,
+                         target_schema: Optional[List[TableSchema]] = None):
+        """
+        Generates the SQL scripts and writes them with the mapping to disk.
+
+        With a manifest, the SQL files are written as per-table sections and
+        only sections whose inputs changed since the previous run are
+        regenerated; the rest are copied from the existing files.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables.
+            output_dir: Directory to write outputs.
+            previous: Manifest of the previous run whose sections may be reused.
+            manifest: Manifest of the current run; enables sectioned output.
+            target_schema: Parsed target tables, used by staging loads.
+        """
+        if manifest is not None:
+            self._write_sectioned_artifacts(mapping, source_schema, output_dir, previous, manifest, target_schema)
+            return
+        os.makedirs(output_dir, exist_ok=True)
+        with self.metrics.span("write_outputs"):
+            save_mapping(mapping, os.path.join(output_dir, "migration_mapping.json"))
+        watermarks = WatermarkStore(os.path.join(output_dir, WATERMARK_FILE))
+        for file_name in SQL_ARTIFACTS:
+            with self.metrics.span(f"write_{file_name.split('.')[0]}_sql"), \
+                    self._artifact_writer(output_dir, file_name) as writer:
+                for statement in self._artifact_statements(file_name, mapping, source_schema, watermarks,
+                                                           target_schema):
+                    writer.write(statement)
+            self.metrics.count("sql_statements", writer.statements)
+
+    def _write_sectioned_artifacts(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                                   output_dir: str, previous: Optional[RunManifest], manifest: RunManifest,
+                                   target_schema: Optional[List[TableSchema]] = None):
+        """
+        Streams the SQL files one table mapping section at a time, reusing
+        unchanged sections of the previous run.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables.
+            output_dir: Directory to write outputs.
+            previous: Manifest of the previous run, or None to regenerate all.
+            manifest: Manifest of the current run, updated with section hashes.
+            target_schema: Parsed target tables, used by staging loads.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with self.metrics.span("write_outputs"):
+            save_mapping(mapping, os.path.join(output_dir, "migration_mapping.json"))
+        watermarks = WatermarkStore(os.path.join(output_dir, WATERMARK_FILE))
+        tables = {t.table_name: t for t in source_schema}
+        fingerprints = manifest.table_fingerprints("source")
+
+        stale = []
+        for table_map in mapping.table_mappings:
+            key = table_key(table_map.source_table, table_map.target_table)
+            digest = content_hash([table_mapping_to_dict(table_map), fingerprints.get(table_map.source_table),
+                                   manifest.data.get("settings")])
+            manifest.data["tables"][key] = digest
+            # Incremental loads depend on the stored watermarks and staging loads
+            # name their constraints per run, so both are always regenerated.
+            volatile = (table_map.strategy or "").lower() in ("incremental", STAGING_STRATEGY)
+            stale.append(previous is None or volatile or previous.table_hash(key) != digest)
+        self.metrics.count("regenerated_tables", sum(stale))
+
+        for file_name in SQL_ARTIFACTS:
+            with self.metrics.span("read_outputs"):
+                existing = ArtifactSections(output_dir, file_name) if previous is not None else None
+            try:
+                with self.metrics.span(f"write_{file_name.split('.')[0]}_sql"), \
+                        self._artifact_writer(output_dir, file_name) as writer:
+                    for table_map, regenerate in zip(mapping.table_mappings, stale):
+                        key = table_key(table_map.source_table, table_map.target_table)
+                        writer.begin_table(key)
+                        if not regenerate and existing is not None and existing.copy_to(writer, key):
+                            continue
+                        single = MigrationMapping(mapping.source_system, mapping.target_system,
+                                                  mapping.confidence_score, [table_map], mapping.notes)
+                        schema = [tables[table_map.source_table]] if table_map.source_table in tables else []
+                        for statement in self._artifact_statements(file_name, single, schema, watermarks,
+                                                                   target_schema):
+                            writer.write(statement)
+            finally:
+                if existing is not None:
+                    existing.close()
+            self.metrics.count("sql_statements", writer.statements)
+
+    def _artifact_writer(self, output_dir: str, file_name: str) -> SQLArtifactWriter:
+        """
+        Opens a streaming writer for one SQL artifact with the configured
+        splitting and compression.
+        """
+        return SQLArtifactWriter(output_dir, file_name, split_bytes=self.split_bytes,
+                                 split_by_table=self.split_by_table, compress=self.compress)
+
+    def _artifact_statements(self, file_name: str, mapping: MigrationMapping, source_schema: List[TableSchema],
+                             watermarks: WatermarkStore,
+                             target_schema: Optional[List[TableSchema]] = None) -> Iterator[str]:
+        """
+        Generates the statements of one SQL artifact lazily.
+
+        Args:
+            file_name: Artifact name ("migration.sql", "validation.sql" or "rollback.sql").
+            mapping: MigrationMapping to generate for.
+            source_schema: Parsed source tables.
+            watermarks: Stored high-water marks for incremental loads.
+            target_schema: Parsed target tables, used by staging loads.
+
+        Returns:
+            Iterator of SQL statements.
+        """
+        if file_name == "validation.sql":
+            return self.sql_generator.iter_validation_sql(mapping, source_schema)
+        if file_name == "rollback.sql":
+            return self.sql_generator.iter_rollback_sql(mapping)
+        if self.batch_size:
+            return self.sql_generator.iter_chunked_migration_sql(mapping, source_schema, batch_size=self.batch_size,
+                                                                 target_schema=target_schema, watermarks=watermarks)
+        return self.sql_generator.iter_migration_sql(mapping, source_schema, watermarks, target_schema)
+
+    def _parse_input_file(self, file_path: str) -> List[TableSchema]:
+        """
+        Parses a file based on extension type.
+
+        Directories and glob patterns are parsed on a process pool.
+
+        Args:
+            file_path: File path, directory or glob pattern.
+
+        Returns:
+            List of TableSchema objects.
+        """
+        paths = expand_schema_inputs(file_path)
+        if paths != [file_path]:
+            return self.parser.parse_files(paths, workers=self.parse_workers)
+        if file_path.endswith(".sql"):
+            return self.parser.parse_sql_file(file_path)
+        if file_path.endswith(".csv"):
+            return [self.parser.parse_csv_file(file_path)]
+        if file_path.endswith(".json"):
+            return self.parser.parse_json_file(file_path)
+        raise ValueError("Unsupported file format")
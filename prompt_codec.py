@@ -0,0 +1,329 @@
+"""
+prompt_codec.py
+
+Compact, token-budgeted encoding of mapping prompts and the matching compact
+response format.
+
+A compact prompt lists every table on one line. Datatypes are replaced by
+indexes into a shared type vocabulary, and default attributes (nullable,
+not a primary key, no foreign key) are omitted::
+
+    Map source tables to target tables. Business context: CRM consolidation
+    Types: 0=INT; 1=VARCHAR(100)
+    Columns are name:type, * primary key, ! NOT NULL, >table(column) foreign key.
+    [source]
+    users: id:0*!, name:1, org_id:0>orgs(id)
+    [target]
+    customers: cust_id:0*!, full_name:1
+
+The model answers with one block per mapped source table::
+
+    @source_system=CRM_v1
+    @target_system=CRM_v2
+    @confidence=0.9
+    # free-text notes
+    users > customers full_load medium
+      id = cust_id
+      name = full_name :: UPPER(name)
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from models import TableSchema
+
+CONTEXT_TOKENS = 200
+MIN_FIELDS_PER_TABLE = 8
+
+_TOKEN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_PLAIN_NAME = re.compile(r'[^\s",:*!>=#@\[\]]+\Z')
+_NAME = r'"(?:[^"\\]|\\.)*"|[^\s",:*!>]+'
+_FIELD = re.compile(r'\s*(?P<name>' + _NAME + r'):(?P<type>\d+)(?P<pk>\*)?(?P<not_null>!)?'
+                    r'(?:>(?P<ref>"(?:[^"\\]|\\.)*"|[^\s",]+))?\s*(?:,|$)')
+_TABLE = re.compile(r'(?P<name>"(?:[^"\\]|\\.)*"|[^\s":]+):\s*(?P<fields>.*?)(?:\s*…\+(?P<omitted>\d+))?\s*$')
+_RESPONSE_TABLE = re.compile(r'(?P<source>' + _NAME + r')\s+>\s+(?P<target>' + _NAME + r')(?:\s+(?P<extra>.*))?$')
+_RESPONSE_FIELD = re.compile(r'(?P<source>' + _NAME + r')\s*=\s*(?P<target>' + _NAME + r')(?:\s*::\s*(?P<expr>.*))?$')
+_META_KEYS = {"source_system": "source_system", "target_system": "target_system", "confidence": "confidence_score"}
+
+RESPONSE_INSTRUCTIONS = (
+    "Reply in this format, one block per mapped source table:\n"
+    "@source_system=<name>\n"
+    "@target_system=<name>\n"
+    "@confidence=<0-1>\n"
+    "# <notes>\n"
+    "<source_table> > <target_table> [<strategy> [<complexity>]]\n"
+    "  <source_field> = <target_field> [:: <SQL transformation>]"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of model tokens of a text without a tokenizer.
+
+    Letter runs count one token per four characters, digit runs one per three
+    digits, and every other non-space character one token, which tracks BPE
+    tokenizers closely enough for budgeting.
+
+    Args:
+        text: Prompt or response text.
+
+    Returns:
+        Estimated token count.
+    """
+    tokens = 0
+    for match in _TOKEN.finditer(text):
+        piece = match.group(0)
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def encode_mapping_prompt(source: List[TableSchema], target: List[TableSchema], context: str,
+                          max_tokens: Optional[int] = None) -> str:
+    """
+    Encodes a mapping request in the compact prompt format.
+
+    When max_tokens is set and the prompt is larger, low-signal content is
+    truncated: first the business context (to CONTEXT_TOKENS), then the
+    columns of the widest tables, keeping key columns and at least
+    MIN_FIELDS_PER_TABLE columns per table. Callers that must not lose
+    columns split the source tables into several requests instead.
+
+    Args:
+        source: Source tables.
+        target: Target tables.
+        context: Business context string.
+        max_tokens: Optional token budget of the prompt.
+
+    Returns:
+        Prompt string.
+    """
+    prompt = _render(source, target, context, None)
+    if max_tokens is None or estimate_tokens(prompt) <= max_tokens:
+        return prompt
+    context = _truncate_words(context, CONTEXT_TOKENS)
+    prompt = _render(source, target, context, None)
+    limit = max((len(t.fields) for t in source + target), default=0)
+    while estimate_tokens(prompt) > max_tokens and limit > MIN_FIELDS_PER_TABLE:
+        limit = max(MIN_FIELDS_PER_TABLE, limit // 2)
+        prompt = _render(source, target, context, limit)
+    return prompt
+
+
+def decode_mapping_prompt(prompt: str) -> Dict:
+    """
+    Decodes a compact prompt back into its source and target tables.
+
+    Args:
+        prompt: Prompt produced by encode_mapping_prompt.
+
+    Returns:
+        Dict with "source" and "target" lists of table dicts (table_name,
+        fields, relationships, omitted_fields) and "business_context".
+    """
+    data: Dict = {"source": [], "target": [], "business_context": ""}
+    types: List[str] = []
+    section = None
+    for line in prompt.splitlines():
+        if line.startswith("Map source tables to target tables. Business context: "):
+            data["business_context"] = line.split(": ", 1)[1]
+        elif line.startswith("Types: "):
+            types = [entry.split("=", 1)[1] for entry in line[len("Types: "):].split("; ") if entry]
+        elif line in ("[source]", "[target]"):
+            section = line[1:-1]
+        elif section and line.startswith("Reply in this format"):
+            section = None
+        elif section and line.strip():
+            data[section].append(_decode_table(line, types))
+    return data
+
+
+def encode_mapping_response(mapping: Dict) -> str:
+    """
+    Encodes a mapping dict (mapping_io.mapping_to_dict format) in the compact
+    response format.
+
+    Args:
+        mapping: Dict with system names, confidence score, notes and table mappings.
+
+    Returns:
+        Response string.
+    """
+    lines = [f"@source_system={mapping.get('source_system') or ''}",
+             f"@target_system={mapping.get('target_system') or ''}"]
+    if mapping.get("confidence_score") is not None:
+        lines.append(f"@confidence={mapping['confidence_score']}")
+    lines.extend(f"# {note}" for note in (mapping.get("notes") or "").splitlines())
+    for table in mapping.get("table_mappings", []):
+        extra = [value for value in (table.get("strategy"), table.get("complexity")) if value]
+        lines.append(" ".join([_quote(table["source_table"]), ">", _quote(table["target_table"])] + extra))
+        for f in table.get("field_mappings", []):
+            line = f"  {_quote(f['source_field'])} = {_quote(f['target_field'])}"
+            if f.get("transformation"):
+                line += f" :: {f['transformation']}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def decode_mapping_response(response: str) -> Dict:
+    """
+    Parses a compact model response into the dict form read by
+    mapping_io.mapping_from_dict.
+
+    Args:
+        response: Response text in the compact format.
+
+    Returns:
+        Mapping dict.
+
+    Raises:
+        ValueError: When a line does not follow the format.
+    """
+    data: Dict = {"source_system": None, "target_system": None, "confidence_score": None,
+                  "notes": "", "table_mappings": []}
+    notes = []
+    current = None
+    for number, line in enumerate(response.splitlines(), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("```"):
+            continue
+        if stripped.startswith("@"):
+            key, _, value = stripped[1:].partition("=")
+            if key.strip() not in _META_KEYS:
+                raise ValueError(f"Line {number}: unknown attribute {key!r}")
+            value = value.strip()
+            data[_META_KEYS[key.strip()]] = float(value) if key.strip() == "confidence" else value
+        elif stripped.startswith("#"):
+            notes.append(stripped[1:].strip())
+        elif line[:1].isspace() and current is not None:
+            field = _RESPONSE_FIELD.match(stripped)
+            if not field:
+                raise ValueError(f"Line {number}: expected '<source_field> = <target_field>'")
+            current["field_mappings"].append({
+                "source_field": _unquote(field.group("source")),
+                "target_field": _unquote(field.group("target")),
+                "transformation": (field.group("expr") or "").strip() or None,
+            })
+        else:
+            table = _RESPONSE_TABLE.match(stripped)
+            if not table:
+                raise ValueError(f"Line {number}: expected '<source_table> > <target_table>'")
+            extra = (table.group("extra") or "").split()
+            current = {"source_table": _unquote(table.group("source")),
+                       "target_table": _unquote(table.group("target")),
+                       "field_mappings": [],
+                       "strategy": extra[0] if extra else None,
+                       "complexity": extra[1] if len(extra) > 1 else None}
+            data["table_mappings"].append(current)
+    data["notes"] = "\n".join(notes)
+    return data
+
+
+def _render(source: List[TableSchema], target: List[TableSchema], context: str,
+            field_limit: Optional[int]) -> str:
+    """
+    Renders the compact prompt, keeping at most field_limit columns per table.
+    """
+    counts = Counter(f.datatype for t in source + target for f in t.fields)
+    types = {datatype: index for index, (datatype, _) in enumerate(counts.most_common())}
+    lines = [
+        "Map source tables to target tables. Business context: " + " ".join((context or "").split()),
+        "Types: " + "; ".join(f"{index}={datatype}" for datatype, index in types.items()),
+        "Columns are name:type, * primary key, ! NOT NULL, >table(column) foreign key.",
+        "[source]",
+    ]
+    lines.extend(_encode_table(t, types, field_limit) for t in source)
+    lines.append("[target]")
+    lines.extend(_encode_table(t, types, field_limit) for t in target)
+    lines.append(RESPONSE_INSTRUCTIONS)
+    return "\n".join(lines)
+
+
+def _encode_table(table: TableSchema, types: Dict[str, int], field_limit: Optional[int]) -> str:
+    """
+    Renders one table line; beyond field_limit, key columns are kept first.
+    """
+    relationships = table.relationships or {}
+    fields = table.fields
+    omitted = 0
+    if field_limit is not None and len(fields) > field_limit:
+        keys = {id(f) for f in fields if f.primary_key or f.name in relationships}
+        kept = [f for f in fields if id(f) in keys]
+        kept += [f for f in fields if id(f) not in keys][:max(0, field_limit - len(kept))]
+        kept_ids = {id(f) for f in kept}
+        omitted = len(fields) - len(kept)
+        fields = [f for f in fields if id(f) in kept_ids]
+    columns = []
+    for f in fields:
+        column = f"{_quote(f.name)}:{types[f.datatype]}"
+        if f.primary_key:
+            column += "*"
+        if not f.nullable:
+            column += "!"
+        if f.name in relationships:
+            column += ">" + _quote(relationships[f.name], ",")
+        columns.append(column)
+    line = f"{_quote(table.table_name)}: {', '.join(columns)}"
+    return line + f" …+{omitted}" if omitted else line
+
+
+def _decode_table(line: str, types: List[str]) -> Dict:
+    """
+    Parses one table line of a compact prompt.
+    """
+    table = _TABLE.match(line)
+    if not table:
+        raise ValueError(f"Not a table line: {line!r}")
+    fields = []
+    relationships = {}
+    text = table.group("fields")
+    position = 0
+    while position < len(text):
+        field = _FIELD.match(text, position)
+        if not field:
+            raise ValueError(f"Not a column list: {text!r}")
+        name = _unquote(field.group("name"))
+        fields.append({"name": name, "datatype": types[int(field.group("type"))],
+                       "nullable": not field.group("not_null"), "primary_key": bool(field.group("pk"))})
+        if field.group("ref"):
+            relationships[name] = _unquote(field.group("ref"))
+        position = field.end()
+    return {"table_name": _unquote(table.group("name")), "fields": fields, "relationships": relationships,
+            "omitted_fields": int(table.group("omitted") or 0)}
+
+
+def _truncate_words(text: str, max_tokens: int) -> str:
+    """
+    Cuts a text after the word that reaches max_tokens.
+    """
+    words = (text or "").split()
+    kept = []
+    used = 0
+    for word in words:
+        used += estimate_tokens(word)
+        if used > max_tokens:
+            return " ".join(kept) + " …"
+        kept.append(word)
+    return " ".join(kept)
+
+
+def _quote(name: str, extra: str = "") -> str:
+    """
+    JSON-quotes names that contain separators of the compact format.
+    """
+    if _PLAIN_NAME.match(name) and not any(char in name for char in extra):
+        return name
+    return json.dumps(name, ensure_ascii=False)
+
+
+def _unquote(name: str) -> str:
+    """
+    Reverses _quote.
+    """
+    return json.loads(name) if name.startswith('"') else name
@@ -0,0 +1,100 @@
+"""
+reconciliation.py
+
+Runs checksum-based reconciliation between source and target tables. Bucket
+checksums are compared first; only mismatched buckets are drilled into to
+report the offending keys, so verification cost grows with the size of the
+differences rather than the size of the tables.
+"""
+
+from typing import List, Optional
+from models import MigrationMapping, ReconciliationPlan, ReconciliationResult, TableSchema
+from migration_executor import ConnectionFactory
+from sql_generator import DEFAULT_BUCKET_SIZE, SQLGenerator
+
+
+class Reconciler:
+    """
+    Executes the ReconciliationPlans produced by SQLGenerator.
+    """
+
+    def __init__(self, connection_factory: ConnectionFactory, sql_generator: Optional[SQLGenerator] = None,
+                 max_keys_per_table: int = 1000):
+        """
+        Args:
+            connection_factory: Factory opening a connection that sees both tables.
+            sql_generator: SQLGenerator used to build the queries.
+            max_keys_per_table: Cap on offending keys reported per table.
+        """
+        self.connection_factory = connection_factory
+        self.sql_generator = sql_generator or SQLGenerator()
+        self.max_keys_per_table = max_keys_per_table
+
+    def reconcile(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                  bucket_size: int = DEFAULT_BUCKET_SIZE, hash_buckets: int = 1024) -> List[ReconciliationResult]:
+        """
+        Compares every mapped table and reports mismatched buckets and keys.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary keys.
+            bucket_size: Key range per bucket for integer primary keys.
+            hash_buckets: Number of buckets for other keys.
+
+        Returns:
+            ReconciliationResult per table mapping.
+        """
+        plans = self.sql_generator.plan_reconciliation(mapping, source_schema, bucket_size, hash_buckets)
+        connection = self.connection_factory.connect()
+        try:
+            return [self._reconcile_table(connection, plan) for plan in plans]
+        finally:
+            connection.close()
+
+    def _reconcile_table(self, connection, plan: ReconciliationPlan) -> ReconciliationResult:
+        """
+        Compares bucket checksums of one table, then drills into mismatches.
+
+        Args:
+            connection: Open DB-API connection.
+            plan: ReconciliationPlan of the table.
+
+        Returns:
+            ReconciliationResult of the table.
+        """
+        result = ReconciliationResult(plan.source_table, plan.target_table)
+        try:
+            cursor = connection.cursor()
+            result.mismatched_buckets = [row[0] for row in cursor.execute(plan.bucket_sql).fetchall()]
+            for bucket in result.mismatched_buckets:
+                if len(result.offending_keys) >= self.max_keys_per_table:
+                    break
+                rows = cursor.execute(plan.drilldown_sql, self._bucket_params(plan, bucket)).fetchall()
+                result.offending_keys.extend(row[0] for row in rows)
+            del result.offending_keys[self.max_keys_per_table:]
+        except Exception as e:
+            result.error = str(e)
+        return result
+
+    def _bucket_params(self, plan: ReconciliationPlan, bucket) -> dict:
+        """
+        Translates a bucket number into drill-down query parameters.
+
+        Range buckets are computed as the key divided by bucket_size truncated
+        towards zero, so bucket 0 spans both sides of zero.
+
+        Args:
+            plan: ReconciliationPlan of the table.
+            bucket: Bucket number returned by the bucket query.
+
+        Returns:
+            Dict of query parameters.
+        """
+        if plan.bucket_mode == "hash":
+            return {"bucket": bucket}
+        bucket, size = int(bucket), plan.bucket_size
+        if bucket > 0:
+            return {"low": bucket * size - 1, "high": (bucket + 1) * size}
+        if bucket < 0:
+            return {"low": (bucket - 1) * size, "high": bucket * size + 1}
+        return {"low": -size, "high": size}
@@ -0,0 +1,182 @@
+"""
+run_manifest.py
+
+Tracks content hashes of the inputs, mapping and generated SQL of a workflow
+run, so the next run over the same output directory only redoes the tables
+that changed.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+SECTION_MARKER = "-- @@ table "
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hashes a file's bytes without loading it into memory.
+
+    Args:
+        path: File path.
+        chunk_size: Bytes read at a time.
+
+    Returns:
+        Hex digest string.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inputs_sha256(paths: List[str]) -> str:
+    """
+    Hashes the names and bytes of several input files.
+
+    Args:
+        paths: File paths, in parse order.
+
+    Returns:
+        Hex digest string.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{path}\0{file_sha256(path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def content_hash(value) -> str:
+    """
+    Hashes a JSON-serialisable value canonically.
+
+    Args:
+        value: Dicts, lists and scalars.
+
+    Returns:
+        Hex digest string.
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """
+    Per-table content hashes of one workflow run.
+
+    Attributes:
+        data: Manifest content with keys "version", "context", "settings",
+            "inputs" (per side: path, sha256, table fingerprints and parsed
+            schema) and "tables" (per table mapping: hash of its SQL inputs).
+    """
+
+    def __init__(self, data: Optional[Dict] = None):
+        self.data = data or {"version": MANIFEST_VERSION, "inputs": {}, "tables": {}}
+
+    @classmethod
+    def load(cls, output_dir: str) -> "RunManifest":
+        """
+        Loads the manifest of a previous run, or an empty one.
+
+        Args:
+            output_dir: Output directory of the run.
+
+        Returns:
+            RunManifest instance.
+        """
+        path = os.path.join(output_dir, MANIFEST_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(data)
+
+    def save(self, output_dir: str):
+        """
+        Writes the manifest atomically into the output directory.
+
+        Args:
+            output_dir: Output directory of the run.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+
+    def input(self, side: str) -> Optional[Dict]:
+        """
+        Returns the recorded input of one side ("source" or "target").
+        """
+        return self.data["inputs"].get(side)
+
+    def table_fingerprints(self, side: str) -> Dict[str, str]:
+        """
+        Returns the recorded table fingerprints of one side.
+        """
+        recorded = self.input(side)
+        return recorded.get("tables", {}) if recorded else {}
+
+    def table_hash(self, key: str) -> Optional[str]:
+        """
+        Returns the recorded SQL input hash of a table mapping.
+        """
+        return self.data["tables"].get(key)
+
+
+def table_key(source_table: str, target_table: str) -> str:
+    """
+    Builds the section and manifest key of a table mapping.
+    """
+    return f"{source_table}->{target_table}"
+
+
+def read_sections(path: str) -> Dict[str, str]:
+    """
+    Reads a sectioned SQL artifact into its per-table sections.
+
+    Args:
+        path: SQL file written by write_sections or SQLArtifactWriter;
+            ``.gz`` files are decompressed.
+
+    Returns:
+        Dict of section key -> SQL text; empty when the file does not exist.
+    """
+    sections: Dict[str, list] = {}
+    current = None
+    try:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(SECTION_MARKER):
+                    current = sections.setdefault(line[len(SECTION_MARKER):].rstrip("\n"), [])
+                elif current is not None:
+                    current.append(line)
+    except OSError:
+        return {}
+    return {key: "".join(lines).rstrip("\n") for key, lines in sections.items()}
+
+
+def write_sections(path: str, sections: Iterable[Tuple[str, str]]):
+    """
+    Writes per-table SQL sections, each preceded by a marker comment.
+
+    Args:
+        path: Destination SQL file.
+        sections: Iterable of (section key, SQL text) pairs.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for key, text in sections:
+            f.write(f"{SECTION_MARKER}{key}\n")
+            if text:
+                f.write(text)
+                f.write("\n")
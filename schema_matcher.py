@@ -0,0 +1,296 @@
+"""
+schema_matcher.py
+
+Provides the SchemaMatcher class, a deterministic NumPy-based pre-matcher that
+scores every source/target table and field pair in batch. Obvious matches are
+accepted without the GenAI model; ambiguous tables are narrowed down to their
+top candidates before they are sent to it.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Tuple
+import numpy as np
+from models import FieldMapping, PrematchResult, SchemaField, TableMapping, TableSchema
+
+_TYPE_FAMILIES = ("integer", "decimal", "text", "date", "timestamp", "boolean", "binary", "other")
+_FAMILY_INDEX = {name: i for i, name in enumerate(_TYPE_FAMILIES)}
+_FAMILY_KEYWORDS = (
+    ("timestamp", ("TIMESTAMP", "TIMESTAMPTZ", "DATETIME", "DATETIME2", "SMALLDATETIME", "DATETIMEOFFSET")),
+    ("date", ("DATE",)),
+    ("boolean", ("BOOL", "BOOLEAN", "BIT")),
+    ("integer", ("INT", "INTEGER", "INT2", "INT4", "INT8", "TINYINT", "SMALLINT", "MEDIUMINT", "BIGINT",
+                 "SERIAL", "SMALLSERIAL", "BIGSERIAL", "SERIAL4", "SERIAL8")),
+    ("decimal", ("DEC", "DECIMAL", "NUMERIC", "NUMBER", "FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "REAL",
+                 "MONEY", "SMALLMONEY")),
+    ("binary", ("BLOB", "TINYBLOB", "MEDIUMBLOB", "LONGBLOB", "BYTEA", "BINARY", "VARBINARY", "IMAGE", "RAW")),
+    ("text", ("CHAR", "CHARACTER", "VARCHAR", "VARCHAR2", "NCHAR", "NVARCHAR", "NVARCHAR2", "TEXT", "TINYTEXT",
+              "MEDIUMTEXT", "LONGTEXT", "NTEXT", "CITEXT", "STRING", "CLOB", "NCLOB", "UUID", "UNIQUEIDENTIFIER",
+              "JSON", "JSONB")),
+)
+_TYPE_NAMES = {name: family for family, names in _FAMILY_KEYWORDS for name in names}
+_TYPE_WORD = re.compile(r"[A-Z_][A-Z0-9_]*")
+
+
+def _build_compatibility() -> np.ndarray:
+    """
+    Builds the datatype family compatibility matrix.
+    """
+    compat = np.eye(len(_TYPE_FAMILIES), dtype=np.float32)
+    pairs = {("integer", "decimal"): 0.7, ("date", "timestamp"): 0.7, ("integer", "boolean"): 0.4}
+    for (a, b), score in pairs.items():
+        compat[_FAMILY_INDEX[a], _FAMILY_INDEX[b]] = compat[_FAMILY_INDEX[b], _FAMILY_INDEX[a]] = score
+    text = _FAMILY_INDEX["text"]
+    compat[text, :] = np.maximum(compat[text, :], 0.3)
+    compat[:, text] = np.maximum(compat[:, text], 0.3)
+    compat[_FAMILY_INDEX["other"], :] = compat[:, _FAMILY_INDEX["other"]] = 0.5
+    return compat
+
+
+_COMPATIBILITY = _build_compatibility()
+
+
+def type_family(datatype: str) -> str:
+    """
+    Classifies a SQL datatype into a coarse family.
+
+    The words of the type name before any ``(`` are matched against known
+    type names, so ``POINT`` or ``INTERVAL`` do not count as integers.
+    Array types (``INTEGER[]``, ``INT ARRAY``) are never scalar families.
+
+    Args:
+        datatype: Datatype string such as ``VARCHAR(100)`` or ``bigint``.
+
+    Returns:
+        Family name (e.g. "integer", "text").
+    """
+    upper = (datatype or "").upper()
+    words = _TYPE_WORD.findall(upper.split("(", 1)[0])
+    if "[" in upper or "ARRAY" in words:
+        return "other"
+    for word in words:
+        family = _TYPE_NAMES.get(word)
+        if family is not None:
+            return family
+    return "other"
+
+
+class SchemaMatcher:
+    """
+    Scores source×target tables and fields with character n-gram vectors,
+    datatype compatibility and primary key / nullability agreement.
+    """
+
+    def __init__(self, ngram: int = 3, dimensions: int = 1024, top_k: int = 5,
+                 table_threshold: float = 0.85, field_threshold: float = 0.8,
+                 min_margin: float = 0.1, block_size: int = 2048):
+        """
+        Args:
+            ngram: Character n-gram length used for name vectors.
+            dimensions: Size of the hashed n-gram vector space.
+            top_k: Candidate target tables kept for ambiguous source tables.
+            table_threshold: Score at which a table pair is auto-accepted.
+            field_threshold: Score at which a field pair is auto-accepted.
+            min_margin: Lead the best target table needs over the runner-up.
+            block_size: Source fields scored per block, bounding peak memory.
+        """
+        self.ngram = ngram
+        self.dimensions = dimensions
+        self.top_k = top_k
+        self.table_threshold = table_threshold
+        self.field_threshold = field_threshold
+        self.min_margin = min_margin
+        self.block_size = block_size
+
+    def match(self, source: List[TableSchema], target: List[TableSchema]) -> PrematchResult:
+        """
+        Matches source tables against target tables.
+
+        A source table is auto-accepted when its best target table clears
+        table_threshold by min_margin and every one of its fields has a
+        confident one-to-one match. All other source tables get their top_k
+        candidate target tables.
+
+        Args:
+            source: Source schema.
+            target: Target schema.
+
+        Returns:
+            PrematchResult with accepted table mappings and candidates.
+        """
+        result = PrematchResult()
+        if not source or not target:
+            result.candidates = {t.table_name: [] for t in source}
+            return result
+
+        source_fields = self._field_index(source)
+        target_fields = self._field_index(target)
+        table_scores = self.score_tables(source, target, source_fields, target_fields)
+
+        k = min(self.top_k, len(target))
+        order = np.argsort(-table_scores, axis=1, kind="stable")[:, :max(k, 2)]
+        for i, table in enumerate(source):
+            best = order[i, 0]
+            best_score = float(table_scores[i, best])
+            runner_up = float(table_scores[i, order[i, 1]]) if len(target) > 1 else 0.0
+            if best_score >= self.table_threshold and best_score - runner_up >= self.min_margin:
+                field_mappings = self._match_fields(table, target[best], source_fields, target_fields, i, best)
+                if field_mappings is not None:
+                    result.accepted.append(TableMapping(
+                        source_table=table.table_name,
+                        target_table=target[best].table_name,
+                        field_mappings=field_mappings,
+                        strategy="full_load",
+                        complexity="low"
+                    ))
+                    continue
+            result.candidates[table.table_name] = [target[j].table_name for j in order[i, :k]]
+        return result
+
+    def score_tables(self, source: List[TableSchema], target: List[TableSchema],
+                     source_fields=None, target_fields=None) -> np.ndarray:
+        """
+        Scores every source/target table pair.
+
+        The score blends table-name similarity with how well the source
+        table's fields are covered by the target table's best-matching fields.
+
+        Args:
+            source: Source schema.
+            target: Target schema.
+            source_fields: Optional precomputed field index of the source.
+            target_fields: Optional precomputed field index of the target.
+
+        Returns:
+            Array of shape (len(source), len(target)) with scores in [0, 1].
+        """
+        source_fields = source_fields or self._field_index(source)
+        target_fields = target_fields or self._field_index(target)
+        names = self.vectorize([t.table_name for t in source]) @ self.vectorize([t.table_name for t in target]).T
+
+        coverage = np.zeros((len(source), len(target)), dtype=np.float32)
+        s_owner, t_owner = source_fields["owner"], target_fields["owner"]
+        if len(s_owner) and len(t_owner):
+            t_starts = np.flatnonzero(np.r_[True, t_owner[1:] != t_owner[:-1]])
+            t_tables = t_owner[t_starts]
+            for start in range(0, len(s_owner), self.block_size):
+                stop = min(start + self.block_size, len(s_owner))
+                scores = self.score_fields(source_fields, target_fields, slice(start, stop))
+                best_per_table = np.maximum.reduceat(scores, t_starts, axis=1)
+                block_owner = s_owner[start:stop]
+                s_starts = np.flatnonzero(np.r_[True, block_owner[1:] != block_owner[:-1]])
+                sums = np.add.reduceat(best_per_table, s_starts, axis=0)
+                coverage[block_owner[s_starts][:, None], t_tables[None, :]] += sums
+            counts = np.bincount(s_owner, minlength=len(source)).astype(np.float32)
+            coverage /= np.maximum(counts, 1)[:, None]
+        return np.clip(0.5 * names + 0.5 * coverage, 0.0, 1.0)
+
+    def score_fields(self, source_fields: Dict, target_fields: Dict, rows=slice(None)) -> np.ndarray:
+        """
+        Scores a block of source fields against all target fields.
+
+        Args:
+            source_fields: Field index built by _field_index for the source.
+            target_fields: Field index built by _field_index for the target.
+            rows: Slice of source fields to score.
+
+        Returns:
+            Array of shape (rows, target fields) with scores in [0, 1].
+        """
+        names = source_fields["vectors"][rows] @ target_fields["vectors"].T
+        types = _COMPATIBILITY[source_fields["family"][rows, None], target_fields["family"][None, :]]
+        pk = source_fields["primary_key"][rows, None] == target_fields["primary_key"][None, :]
+        nullable = source_fields["nullable"][rows, None] == target_fields["nullable"][None, :]
+        return 0.7 * names + 0.2 * types + 0.05 * pk + 0.05 * nullable
+
+    def vectorize(self, names: List[str]) -> np.ndarray:
+        """
+        Turns names into L2-normalised hashed character n-gram vectors.
+
+        Args:
+            names: Identifiers to vectorize.
+
+        Returns:
+            Array of shape (len(names), dimensions).
+        """
+        rows, cols = [], []
+        for i, name in enumerate(names):
+            padded = " " + "_".join(re.findall(r"[a-z0-9]+", name.lower())) + " "
+            for j in range(max(len(padded) - self.ngram + 1, 1)):
+                rows.append(i)
+                cols.append(zlib.crc32(padded[j:j + self.ngram].encode("utf-8")) % self.dimensions)
+        matrix = np.zeros((len(names), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+        return matrix
+
+    def _field_index(self, tables: List[TableSchema]) -> Dict:
+        """
+        Flattens all fields of a schema into parallel arrays.
+
+        Args:
+            tables: Schema to index.
+
+        Returns:
+            Dict of arrays: owner table index, name vectors, type family,
+            primary key and nullable flags, plus per-table field offsets.
+        """
+        fields: List[SchemaField] = []
+        owner = []
+        offsets = [0]
+        for i, table in enumerate(tables):
+            fields.extend(table.fields)
+            owner.extend([i] * len(table.fields))
+            offsets.append(len(fields))
+        return {
+            "owner": np.asarray(owner, dtype=np.intp),
+            "offsets": offsets,
+            "vectors": self.vectorize([f.name for f in fields]),
+            "family": np.asarray([_FAMILY_INDEX[type_family(f.datatype)] for f in fields], dtype=np.intp),
+            "primary_key": np.asarray([bool(f.primary_key) for f in fields]),
+            "nullable": np.asarray([bool(f.nullable) for f in fields]),
+        }
+
+    def _match_fields(self, source: TableSchema, target: TableSchema, source_fields: Dict,
+                      target_fields: Dict, source_index: int, target_index: int):
+        """
+        Greedily assigns source fields to target fields one-to-one.
+
+        Args:
+            source: Source table.
+            target: Target table.
+            source_fields: Field index of the source schema.
+            target_fields: Field index of the target schema.
+            source_index: Position of the source table.
+            target_index: Position of the target table.
+
+        Returns:
+            List of FieldMapping objects, or None when any source field lacks a
+            confident match.
+        """
+        s_start, s_stop = source_fields["offsets"][source_index:source_index + 2]
+        t_start, t_stop = target_fields["offsets"][target_index:target_index + 2]
+        if s_stop == s_start or t_stop == t_start:
+            return None
+        scores = self.score_fields(source_fields, _slice_index(target_fields, t_start, t_stop), slice(s_start, s_stop))
+        pairs: List[Tuple[int, int]] = []
+        used_s, used_t = set(), set()
+        for flat in np.argsort(-scores, axis=None, kind="stable"):
+            i, j = divmod(int(flat), scores.shape[1])
+            if scores[i, j] < self.field_threshold:
+                break
+            if i not in used_s and j not in used_t:
+                used_s.add(i)
+                used_t.add(j)
+                pairs.append((i, j))
+        if len(pairs) < scores.shape[0]:
+            return None
+        return [FieldMapping(source_field=source.fields[i].name, target_field=target.fields[j].name)
+                for i, j in sorted(pairs)]
+
+
+def _slice_index(index: Dict, start: int, stop: int) -> Dict:
+    """
+    Restricts a field index to the fields of one table.
+    """
+    return {key: value[start:stop] for key, value in index.items() if key not in ("offsets",)}
@@ -5,11 +5,48 @@ Contains the SchemaAnalyzer class responsible for parsing schema definitions
 from SQL, CSV, or JSON files into structured Python data models.
 """
 
+import io
+import os
 import re
 import csv
+import glob
 import json
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Dict, Iterator, List, Optional, Union
 from models import SchemaField, TableSchema
+from ddl_reader import DEFAULT_CHUNK_SIZE, iter_sql_statements, split_top_level, unquote_identifier
+from json_reader import iter_json_array, iter_json_file
+from instrumentation import TimedReader, metrics_or_null
+
+_CREATE_TABLE = re.compile(
+    r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL|LOCAL)\s+)?(?:(?:TEMP|TEMPORARY|UNLOGGED)\s+)?'
+    r'TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?((?:"(?:[^"]|"")*"|[^\s(.])+(?:\.(?:"(?:[^"]|"")*"|[^\s(.])+)*)',
+    re.IGNORECASE
+)
+_IDENTIFIER = r'(?:"(?:[^"]|"")*"|[^\s(.,])+(?:\.(?:"(?:[^"]|"")*"|[^\s(.,])+)*'
+_REFERENCES = re.compile(r'REFERENCES\s+(' + _IDENTIFIER + r')\s*(?:\(([^)]*)\))?', re.IGNORECASE)
+_FOREIGN_KEY = re.compile(r'FOREIGN\s+KEY\s*\(([^)]*)\)\s*' + _REFERENCES.pattern, re.IGNORECASE)
+_ALTER_TABLE_ADD = re.compile(
+    r'^\s*ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(' + _IDENTIFIER + r')\s+ADD\s+(.*)$',
+    re.IGNORECASE | re.DOTALL
+)
+SCHEMA_EXTENSIONS = (".sql", ".csv", ".json")
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+STATEMENT_BATCH_BYTES = 1024 * 1024
+_CSV_INTEGER = re.compile(r'^[+-]?\d+$')
+_CSV_DECIMAL = re.compile(r'^[+-]?(?:\d+\.\d*|\.\d+)$')
+_CSV_FLOAT = re.compile(r'^[+-]?(?:\d+\.?\d*|\.\d+)[eE][+-]?\d+$')
+_CSV_DATE = re.compile(r'^\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])$')
+_CSV_TIMESTAMP = re.compile(
+    r'^\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?$'
+)
+_CSV_BOOLEANS = frozenset(("true", "false", "t", "f", "yes", "no", "y", "n"))
+_INT32_DIGITS = 9
+_INT64_DIGITS = 18
+_TABLE_CONSTRAINT_KEYWORDS = ("PRIMARY", "FOREIGN", "CONSTRAINT", "UNIQUE", "CHECK", "EXCLUDE")
+_COLUMN_CONSTRAINT_KEYWORDS = ("NOT", "NULL", "DEFAULT", "PRIMARY", "REFERENCES", "CONSTRAINT", "UNIQUE",
+                               "CHECK", "COLLATE", "GENERATED", "IDENTITY", "AUTO_INCREMENT", "AUTOINCREMENT")
 
 
 class SchemaAnalyzer:
@@ -18,6 +55,13 @@ class SchemaAnalyzer:
     for use in data migration logic.
     """
 
+    def __init__(self, metrics=None):
+        """
+        Args:
+            metrics: Optional RunMetrics receiving parse spans and counters.
+        """
+        self.metrics = metrics_or_null(metrics)
+
     def parse_sql_schema(self, sql_text: str) -> List[TableSchema]:
         """
         Parses SQL DDL statements and extracts table definitions.
@@ -28,25 +72,226 @@ class SchemaAnalyzer:
         Returns:
             List of TableSchema objects parsed from the script.
         """
-        table_blocks = re.findall(r'CREATE TABLE.*?;', sql_text, re.DOTALL | re.IGNORECASE)
-        tables = [self._parse_create_table(block) for block in table_blocks]
-        return [t for t in tables if t is not None]
+        return list(self.iter_sql_schema(io.StringIO(sql_text)))
+
+    def parse_sql_file(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[TableSchema]:
+        """
+        Parses a SQL DDL file by streaming it in chunks.
+
+        Args:
+            file_path: Path to the .sql file.
+            chunk_size: Number of characters read at a time.
+
+        Returns:
+            List of TableSchema objects parsed from the file.
+        """
+        with self.metrics.span("parse_sql_file"), \
+                open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            self.metrics.count("input_bytes", os.fstat(f.fileno()).st_size)
+            stream = TimedReader(f, self.metrics) if self.metrics.enabled else f
+            return list(self.iter_sql_schema(stream, chunk_size))
+
+    def iter_sql_schema(self, stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TableSchema]:
+        """
+        Incrementally parses SQL DDL and yields tables as each statement completes.
+
+        Memory use is bounded by the largest single statement, so multi-gigabyte
+        dumps with function bodies and comments can be processed. Primary and
+        foreign keys added later by ``ALTER TABLE ... ADD`` (as pg_dump emits
+        them) are applied to the already yielded TableSchema objects.
+
+        Args:
+            stream: Readable text stream containing the SQL script.
+            chunk_size: Number of characters read at a time.
+
+        Returns:
+            Iterator of TableSchema objects.
+        """
+        tables = {}
+        statements = 0
+        try:
+            for statement in iter_sql_statements(stream, chunk_size):
+                statements += 1
+                if _CREATE_TABLE.match(statement):
+                    table = self._parse_create_table(statement)
+                    if table is not None:
+                        tables[table.table_name] = table
+                        yield table
+                    continue
+                self._apply_alter_table(tables, statement)
+        finally:
+            self.metrics.count("ddl_statements", statements)
+
+    def parse_files(self, inputs: Union[str, List[str]], workers: Optional[int] = None,
+                    batch_bytes: int = STATEMENT_BATCH_BYTES,
+                    min_parallel_bytes: int = PARALLEL_MIN_BYTES) -> List[TableSchema]:
+        """
+        Parses several schema files, directories or glob patterns on a pool of
+        worker processes.
+
+        SQL files are split into statements in this process, which is cheap,
+        and batches of CREATE TABLE statements are parsed by the workers. CSV
+        and JSON files are parsed by one worker each. The tables are merged in
+        input order (files sorted by path, statements in file order), so the
+        result does not depend on the number of workers. ALTER TABLE ... ADD
+        constraints are applied after the merge, so keys may be declared in a
+        different file than their table. A single input, one worker, or
+        inputs smaller than min_parallel_bytes in total are parsed in this
+        process without the pickling round trip; a single SQL dump is then
+        streamed exactly like parse_sql_file.
+
+        Args:
+            inputs: File path, directory, glob pattern or a list of them
+                (see expand_schema_inputs).
+            workers: Number of worker processes; defaults to the CPU count.
+            batch_bytes: Approximate size of the statement batches sent to a worker.
+            min_parallel_bytes: Total input size below which no processes are started.
+
+        Returns:
+            List of TableSchema objects.
+        """
+        paths = expand_schema_inputs(inputs)
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        workers = workers or os.cpu_count() or 1
+        self.metrics.count("input_files", len(paths))
+        self.metrics.count("input_bytes", total_bytes)
+        with self.metrics.span("parse_files"):
+            if len(paths) == 1 and paths[0].lower().endswith(".sql"):
+                with open(paths[0], "r", encoding="utf-8", errors="replace") as f:
+                    return list(self.iter_sql_schema(f))
+            if workers <= 1 or len(paths) == 1 or total_bytes < min_parallel_bytes:
+                return self._parse_paths(paths, batch_bytes, None, 1)
+            with ProcessPoolExecutor(workers) as pool:
+                return self._parse_paths(paths, batch_bytes, pool, workers)
+
+    def _parse_paths(self, paths: List[str], batch_bytes: int, pool: Optional[ProcessPoolExecutor],
+                     workers: int) -> List[TableSchema]:
+        """
+        Splits the inputs into parse tasks, runs them on the pool (or in this
+        process) and merges their tables in input order.
+
+        Args:
+            paths: Schema file paths.
+            batch_bytes: Approximate size of a statement batch.
+            pool: Process pool, or None to parse in this process.
+            workers: Number of workers; at most twice as many tasks are in flight.
 
-    def parse_csv_schema(self, csv_text: str) -> TableSchema:
+        Returns:
+            List of TableSchema objects.
+        """
+        in_flight: "deque[Future]" = deque()
+        tables: List[TableSchema] = []
+        alters: List[str] = []
+
+        def submit(task, argument):
+            if pool is None:
+                future = Future()
+                future.set_result(task(argument))
+            else:
+                future = pool.submit(task, argument, True)
+            in_flight.append(future)
+            while len(in_flight) > 2 * workers:
+                collect()
+
+        def collect():
+            result = in_flight.popleft().result()
+            tables.extend(result if pool is None else _unpack_tables(result))
+
+        statements = 0
+        for path in paths:
+            if not path.lower().endswith(".sql"):
+                submit(_parse_schema_file, path)
+                continue
+            batch: List[str] = []
+            size = 0
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for statement in iter_sql_statements(f):
+                    statements += 1
+                    if _CREATE_TABLE.match(statement):
+                        batch.append(statement)
+                        size += len(statement)
+                        if size >= batch_bytes:
+                            submit(_parse_create_statements, batch)
+                            batch, size = [], 0
+                    elif _ALTER_TABLE_ADD.match(statement):
+                        alters.append(statement)
+            if batch:
+                submit(_parse_create_statements, batch)
+        while in_flight:
+            collect()
+        self.metrics.count("ddl_statements", statements)
+
+        by_name = {table.table_name: table for table in tables}
+        for statement in alters:
+            self._apply_alter_table(by_name, statement)
+        return tables
+
+    def parse_csv_schema(self, csv_text: str, table_name: str = "csv_input_table",
+                         max_rows: Optional[int] = None) -> TableSchema:
         """
         Infers schema from a CSV sample.
 
         Args:
             csv_text: Content of the CSV file as string.
+            table_name: Name given to the inferred table.
+            max_rows: Optional limit on the number of data rows inspected.
+
+        Returns:
+            TableSchema object inferred from headers and values.
+        """
+        return self.infer_csv_schema(io.StringIO(csv_text.strip()), table_name, max_rows)
+
+    def parse_csv_file(self, file_path: str, max_rows: Optional[int] = None) -> TableSchema:
+        """
+        Infers the schema of a CSV file in one streaming pass.
+
+        The table is named after the file (``customers.csv`` -> ``customers``).
+
+        Args:
+            file_path: Path to the .csv file.
+            max_rows: Optional limit on the number of data rows inspected.
+
+        Returns:
+            TableSchema object inferred from headers and values.
+        """
+        table_name = os.path.splitext(os.path.basename(file_path))[0]
+        with self.metrics.span("parse_csv_file"), \
+                open(file_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            self.metrics.count("input_bytes", os.fstat(f.fileno()).st_size)
+            return self.infer_csv_schema(f, table_name, max_rows)
+
+    def infer_csv_schema(self, stream: IO[str], table_name: str,
+                         max_rows: Optional[int] = None) -> TableSchema:
+        """
+        Infers column types, maximum lengths and nullability from a CSV stream.
+
+        Rows are read one at a time and each column keeps only a few counters,
+        so memory stays constant however large the file is. Empty values count
+        as NULL. Types are narrowed from BOOLEAN/INT/BIGINT/DECIMAL(p,s)/DATE/
+        TIMESTAMP down to VARCHAR(n) as soon as a value does not fit.
+
+        Args:
+            stream: Readable text stream positioned at the header row.
+            table_name: Name given to the inferred table.
+            max_rows: Optional limit on the number of data rows inspected.
 
         Returns:
-            TableSchema object inferred from headers.
+            TableSchema object.
         """
-        lines = csv_text.strip().splitlines()
-        reader = csv.reader(lines)
-        headers = next(reader)
-        fields = [SchemaField(name=h.strip(), datatype="VARCHAR", nullable=True) for h in headers]
-        return TableSchema(table_name="csv_input_table", fields=fields)
+        reader = csv.reader(stream)
+        headers = next(reader, [])
+        profiles = [_ColumnProfile() for _ in headers]
+        for row_number, row in enumerate(reader):
+            if max_rows is not None and row_number >= max_rows:
+                break
+            for profile, value in zip(profiles, row):
+                profile.add(value)
+            for profile in profiles[len(row):]:
+                profile.add("")
+        self.metrics.count("csv_lines", reader.line_num)
+        fields = [SchemaField(name=h.strip(), datatype=p.datatype(), nullable=p.nullable())
+                  for h, p in zip(headers, profiles)]
+        return TableSchema(table_name=table_name, fields=fields)
 
     def parse_json_schema(self, json_text: str) -> List[TableSchema]:
         """
@@ -58,22 +303,82 @@ class SchemaAnalyzer:
         Returns:
             List of TableSchema objects.
         """
-        raw = json.loads(json_text)
+        with self.metrics.span("decode_json"):
+            raw = json.loads(json_text)
         if isinstance(raw, dict):
             raw = [raw]
-        schemas = []
-        for entry in raw:
-            table_name = entry.get("table_name")
-            fields = [
-                SchemaField(
-                    name=f.get("name"),
-                    datatype=f.get("datatype", "VARCHAR"),
-                    nullable=f.get("nullable", True),
-                    primary_key=f.get("primary_key", False),
-                ) for f in entry.get("fields", [])
-            ]
-            schemas.append(TableSchema(table_name=table_name, fields=fields))
-        return schemas
+        return [self._table_from_json(entry) for entry in raw]
+
+    def parse_json_file(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        use_mmap: bool = False) -> List[TableSchema]:
+        """
+        Parses a JSON schema file by streaming its top-level array.
+
+        Args:
+            file_path: Path to the .json file.
+            chunk_size: Number of bytes read at a time.
+            use_mmap: When True, the file is scanned through a memory map
+                instead of being read in chunks.
+
+        Returns:
+            List of TableSchema objects parsed from the file.
+        """
+        with self.metrics.span("parse_json_file"):
+            self.metrics.count("input_bytes", os.path.getsize(file_path))
+            return [self._table_from_json(entry) for entry in iter_json_file(file_path, chunk_size, use_mmap)]
+
+    def iter_json_schema(self, stream: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TableSchema]:
+        """
+        Incrementally parses a JSON array of table entries and yields one
+        table per entry.
+
+        Only one entry is decoded at a time, so memory use is bounded by the
+        largest table entry rather than by the size of the document.
+
+        Args:
+            stream: Readable binary or text stream with the JSON document.
+            chunk_size: Number of bytes (characters for text streams) read at a time.
+
+        Returns:
+            Iterator of TableSchema objects.
+        """
+        for entry in iter_json_array(stream, chunk_size):
+            yield self._table_from_json(entry)
+
+    def _table_from_json(self, entry: dict) -> TableSchema:
+        """
+        Builds a TableSchema from one decoded JSON table entry.
+
+        Args:
+            entry: Dict with table_name, fields and optional relationships.
+
+        Returns:
+            TableSchema object.
+        """
+        fields = [
+            SchemaField(
+                name=f.get("name"),
+                datatype=f.get("datatype", "VARCHAR"),
+                nullable=f.get("nullable", True),
+                primary_key=f.get("primary_key", False),
+            ) for f in entry.get("fields", [])
+        ]
+        return TableSchema(table_name=entry.get("table_name"), fields=fields,
+                           relationships=entry.get("relationships") or {})
+
+    def _apply_alter_table(self, tables: Dict[str, TableSchema], statement: str):
+        """
+        Applies an ``ALTER TABLE ... ADD`` key constraint to an already parsed table.
+
+        Args:
+            tables: Parsed tables by name.
+            statement: Any SQL statement; others are ignored.
+        """
+        alter = _ALTER_TABLE_ADD.match(statement)
+        if alter:
+            table = tables.get(unquote_identifier(alter.group(1)))
+            if table is not None:
+                self._apply_table_constraint(table, alter.group(2))
 
     def _parse_create_table(self, ddl: str) -> TableSchema:
         """
@@ -86,22 +391,274 @@ class SchemaAnalyzer:
             TableSchema object or None.
         """
         try:
-            table_name_match = re.search(r'CREATE TABLE\s+([^\s(]+)', ddl, re.IGNORECASE)
+            table_name_match = _CREATE_TABLE.match(ddl)
             if not table_name_match:
                 return None
-            table_name = table_name_match.group(1)
-            column_block = ddl[ddl.find("(")+1: ddl.rfind(")")]
-            lines = [l.strip().strip(",") for l in column_block.splitlines() if l.strip()]
+            table_name = unquote_identifier(table_name_match.group(1))
+            open_paren = ddl.find("(", table_name_match.end())
+            if open_paren < 0:
+                return None
+            column_block = ddl[open_paren+1: ddl.rfind(")")]
             fields = []
-            for line in lines:
+            constraints = []
+            relationships = {}
+            for line in split_top_level(column_block):
                 parts = line.split()
-                if len(parts) < 2 or parts[0].upper() in ("PRIMARY", "FOREIGN", "CONSTRAINT"):
+                keyword = parts[0].upper()
+                if keyword in _TABLE_CONSTRAINT_KEYWORDS:
+                    constraints.append(line)
                     continue
-                field_name = parts[0]
-                datatype = parts[1]
+                if len(parts) < 2:
+                    continue
+                field_name, datatype = self._split_column_definition(line)
                 nullable = not ("NOT NULL" in line.upper())
                 pk = "PRIMARY KEY" in line.upper()
                 fields.append(SchemaField(name=field_name, datatype=datatype, nullable=nullable, primary_key=pk))
-            return TableSchema(table_name=table_name, fields=fields)
+                reference = _REFERENCES.search(line)
+                if reference:
+                    relationships[field_name] = self._reference(reference.group(1), reference.group(2))
+            table = TableSchema(table_name=table_name, fields=fields, relationships=relationships)
+            for constraint in constraints:
+                self._apply_table_constraint(table, constraint)
+            return table
         except Exception:
             return None
+
+    def _apply_table_constraint(self, table: TableSchema, constraint: str):
+        """
+        Applies a PRIMARY KEY or FOREIGN KEY table constraint to a parsed table.
+
+        Args:
+            table: TableSchema to update in place.
+            constraint: Constraint text, e.g. ``CONSTRAINT fk FOREIGN KEY (a) REFERENCES t(b)``.
+        """
+        upper = constraint.upper()
+        if "PRIMARY KEY" in upper:
+            primary_keys = self._constraint_columns(constraint, "PRIMARY KEY")
+            for f in table.fields:
+                if f.name in primary_keys:
+                    f.primary_key = True
+                    f.nullable = False
+            return
+        foreign_key = _FOREIGN_KEY.search(constraint)
+        if not foreign_key:
+            return
+        columns = [unquote_identifier(c) for c in split_top_level(foreign_key.group(1))]
+        ref_columns = [unquote_identifier(c) for c in split_top_level(foreign_key.group(3) or "")]
+        for i, column in enumerate(columns):
+            ref_column = ref_columns[i] if i < len(ref_columns) else None
+            table.relationships[column] = self._reference(foreign_key.group(2), ref_column)
+
+    def _reference(self, ref_table: str, ref_column: str = None) -> str:
+        """
+        Formats a foreign key target as ``table(column)`` (or ``table`` alone).
+
+        Args:
+            ref_table: Referenced table identifier, possibly quoted.
+            ref_column: Referenced column, possibly quoted.
+
+        Returns:
+            Relationship string stored in TableSchema.relationships.
+        """
+        ref_table = unquote_identifier(ref_table)
+        ref_column = unquote_identifier(ref_column.strip()) if ref_column and ref_column.strip() else None
+        if ref_column and "," not in ref_column:
+            return f"{ref_table}({ref_column})"
+        return ref_table
+
+    def _split_column_definition(self, line: str):
+        """
+        Splits a column definition into its (unquoted) name and datatype.
+
+        Args:
+            line: Column definition such as ``"Order Id" numeric(10, 2) NOT NULL``.
+
+        Returns:
+            Tuple of (field name, datatype).
+        """
+        if line.startswith('"'):
+            end = line.index('"', 1)
+            while line[end + 1:end + 2] == '"':
+                end = line.index('"', end + 2)
+            name, rest = line[:end + 1], line[end + 1:]
+        else:
+            name, rest = line.split(None, 1)
+        type_tokens = []
+        for token in split_top_level(" ".join(rest.split()), " "):
+            if token.upper() in _COLUMN_CONSTRAINT_KEYWORDS:
+                break
+            type_tokens.append(token)
+        return unquote_identifier(name), " ".join(type_tokens)
+
+    def _constraint_columns(self, line: str, keyword: str) -> List[str]:
+        """
+        Extracts the column list following a keyword in a table constraint.
+
+        Args:
+            line: Constraint definition, e.g. ``PRIMARY KEY (id, region)``.
+            keyword: Keyword that precedes the column list.
+
+        Returns:
+            List of unquoted column names.
+        """
+        start = line.upper().index(keyword) + len(keyword)
+        open_paren = line.index("(", start)
+        close_paren = line.index(")", open_paren)
+        return [unquote_identifier(c) for c in split_top_level(line[open_paren+1:close_paren])]
+
+
+def expand_schema_inputs(inputs: Union[str, List[str]]) -> List[str]:
+    """
+    Expands schema inputs into the list of files they name.
+
+    Args:
+        inputs: File path, directory (searched recursively), glob pattern
+            such as ``modules/**/*.sql``, or a list of them. Directories and
+            patterns only yield .sql, .csv and .json files.
+
+    Returns:
+        File paths; each directory or pattern sorted by path, duplicates removed.
+
+    Raises:
+        ValueError: When a directory or pattern matches no schema file.
+    """
+    paths: List[str] = []
+    for item in [inputs] if isinstance(inputs, str) else inputs:
+        if os.path.isdir(item):
+            found = sorted(os.path.join(root, name) for root, _, names in os.walk(item)
+                           for name in names if name.lower().endswith(SCHEMA_EXTENSIONS))
+        elif any(char in item for char in "*?["):
+            found = sorted(path for path in glob.glob(item, recursive=True)
+                           if os.path.isfile(path) and path.lower().endswith(SCHEMA_EXTENSIONS))
+        else:
+            found = [item]
+        if not found:
+            raise ValueError(f"No schema files match {item!r}")
+        paths.extend(path for path in found if path not in paths)
+    return paths
+
+
+_worker_analyzer: Optional[SchemaAnalyzer] = None
+
+
+def _analyzer() -> SchemaAnalyzer:
+    """
+    Returns the uninstrumented SchemaAnalyzer of this (worker) process.
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = SchemaAnalyzer()
+    return _worker_analyzer
+
+
+def _parse_create_statements(statements: List[str], packed: bool = False) -> list:
+    """
+    Parse task of SchemaAnalyzer.parse_files: a batch of CREATE TABLE statements.
+    """
+    tables = (_analyzer()._parse_create_table(statement) for statement in statements)
+    tables = [table for table in tables if table is not None]
+    return _pack_tables(tables) if packed else tables
+
+
+def _parse_schema_file(path: str, packed: bool = False) -> list:
+    """
+    Parse task of SchemaAnalyzer.parse_files: a whole CSV or JSON file.
+    """
+    if path.lower().endswith(".csv"):
+        tables = [_analyzer().parse_csv_file(path)]
+    elif path.lower().endswith(".json"):
+        tables = _analyzer().parse_json_file(path)
+    else:
+        raise ValueError(f"Unsupported file format: {path}")
+    return _pack_tables(tables) if packed else tables
+
+
+def _pack_tables(tables: List[TableSchema]) -> list:
+    """
+    Converts tables to plain tuples, which pickle several times faster than
+    dataclass instances when results return from a worker process.
+    """
+    return [(t.table_name, t.relationships, [(f.name, f.datatype, f.nullable, f.primary_key) for f in t.fields])
+            for t in tables]
+
+
+def _unpack_tables(rows: list) -> List[TableSchema]:
+    """
+    Rebuilds the tables packed by _pack_tables.
+    """
+    return [TableSchema(name, [SchemaField(*f) for f in fields], relationships) for name, relationships, fields in rows]
+
+
+class _ColumnProfile:
+    """
+    Constant-memory type profile of one CSV column.
+    """
+
+    __slots__ = ("values", "nulls", "max_length", "boolean", "integer", "decimal", "floating",
+                 "date", "timestamp", "int_digits", "scale")
+
+    def __init__(self):
+        self.values = 0
+        self.nulls = 0
+        self.max_length = 0
+        self.boolean = self.integer = self.decimal = self.floating = self.date = self.timestamp = True
+        self.int_digits = 0
+        self.scale = 0
+
+    def add(self, raw: str):
+        """
+        Narrows the candidate types with one value.
+        """
+        self.values += 1
+        value = raw.strip()
+        if not value:
+            self.nulls += 1
+            return
+        if len(raw) > self.max_length:
+            self.max_length = len(raw)
+        if self.boolean and value.lower() not in _CSV_BOOLEANS:
+            self.boolean = False
+        if self.integer or self.decimal:
+            if _CSV_INTEGER.match(value):
+                self.int_digits = max(self.int_digits, len(value.lstrip("+-").lstrip("0")) or 1)
+            elif self.decimal and _CSV_DECIMAL.match(value):
+                self.integer = False
+                whole, _, fraction = value.lstrip("+-").partition(".")
+                self.int_digits = max(self.int_digits, len(whole.lstrip("0")) or 1)
+                self.scale = max(self.scale, len(fraction))
+            else:
+                self.integer = self.decimal = False
+        if self.floating and not (_CSV_INTEGER.match(value) or _CSV_DECIMAL.match(value) or _CSV_FLOAT.match(value)):
+            self.floating = False
+        if self.date and not _CSV_DATE.match(value):
+            self.date = False
+        if self.timestamp and not (_CSV_TIMESTAMP.match(value) or _CSV_DATE.match(value)):
+            self.timestamp = False
+
+    def datatype(self) -> str:
+        """
+        Returns the narrowest SQL type that fits every value seen.
+        """
+        if self.values == self.nulls:
+            return "VARCHAR"
+        if self.boolean:
+            return "BOOLEAN"
+        if self.integer:
+            if self.int_digits <= _INT32_DIGITS:
+                return "INT"
+            return "BIGINT" if self.int_digits <= _INT64_DIGITS else f"DECIMAL({self.int_digits},0)"
+        if self.decimal:
+            return f"DECIMAL({self.int_digits + self.scale},{self.scale})"
+        if self.floating:
+            return "DOUBLE PRECISION"
+        if self.date:
+            return "DATE"
+        if self.timestamp:
+            return "TIMESTAMP"
+        return f"VARCHAR({self.max_length})"
+
+    def nullable(self) -> bool:
+        """
+        Returns whether the column held empty values (or no values at all).
+        """
+        return self.nulls > 0 or self.values == 0
@@ -0,0 +1,541 @@
+"""
+sql_dialects.py
+
+Dialect backends for SQLGenerator. Each dialect quotes identifiers the way its
+database expects and emits the fastest way it has to move a table from a
+source database into a separate target database:
+
+* generic    -- ANSI ``INSERT ... SELECT`` for databases reachable from one
+                connection, and multi-row ``VALUES`` batches driven from
+                Python (copy_rows) for everything else.
+* sqlite     -- ``ATTACH DATABASE`` the source file, then one set-based
+                ``INSERT ... SELECT`` per table inside a transaction.
+* postgresql -- psql ``\\copy`` export from the source and ``\\copy`` import
+                into the target, in CSV or binary format.
+"""
+
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+from models import TableMapping
+
+
+class SQLDialect:
+    """
+    Generic ANSI SQL dialect; the base class of all dialects.
+
+    Attributes:
+        name: Dialect name used by get_dialect.
+        placeholder: DB-API parameter marker of the matching driver.
+        max_parameters: Bound parameters allowed in one statement.
+        select_from_source: Whether statements run on the target connection
+            can read source tables through source_table(), which incremental,
+            batched and partitioned INSERT ... SELECT loads rely on.
+    """
+
+    name = "generic"
+    placeholder = "?"
+    max_parameters = 999
+    select_from_source = True
+    cast_types = {"int": "INTEGER", "bigint": "BIGINT", "number": "DOUBLE PRECISION", "text": "VARCHAR",
+                  "timestamp": "TIMESTAMP"}
+
+    def quote(self, identifier: str) -> str:
+        """
+        Double-quotes an identifier, quoting each part of a schema-qualified name.
+
+        Args:
+            identifier: Identifier such as ``users`` or ``public.users``.
+
+        Returns:
+            Quoted identifier.
+        """
+        return ".".join('"' + part.replace('"', '""') + '"' for part in identifier.split("."))
+
+    def literal(self, value) -> str:
+        """
+        Renders a Python value as a SQL literal.
+
+        Args:
+            value: None, number or string.
+
+        Returns:
+            SQL literal.
+        """
+        if value is None:
+            return "NULL"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def cast_sql(self, expression: str, kind: str) -> str:
+        """
+        Casts an expression to "int", "bigint", "number", "text" or "timestamp".
+        """
+        return f"CAST({expression} AS {self.cast_types[kind]})"
+
+    def substr_sql(self, expression: str, start: str, length: Optional[str] = None) -> str:
+        """
+        Extracts a substring; start is 1-based.
+        """
+        return f"SUBSTRING({expression} FROM {start}" + (f" FOR {length})" if length else ")")
+
+    def round_sql(self, expression: str, digits: str) -> str:
+        """
+        Rounds a number to the given number of decimal places.
+        """
+        return f"ROUND({expression}, {digits})"
+
+    def format_date_sql(self, expression: str, fmt: str) -> str:
+        """
+        Formats an ISO date or timestamp with a strftime format using
+        %Y, %m, %d, %H, %M and %S.
+        """
+        return f"TO_CHAR(CAST({expression} AS TIMESTAMP), {self.literal(_to_char_pattern(fmt))})"
+
+    def source_table(self, name: str) -> str:
+        """
+        Returns the reference of a source table in a load statement.
+        """
+        return self.quote(name)
+
+    def target_table(self, name: str) -> str:
+        """
+        Returns the reference of a target table in a load statement.
+        """
+        return self.quote(name)
+
+    def iter_with_source_sql(self, statements: Iterable[str]) -> Iterator[str]:
+        """
+        Yields statements that read source tables through source_table() on
+        the target connection, together with whatever makes the source
+        database reachable there.
+
+        Args:
+            statements: Statements referencing source tables.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield from statements
+
+    def select_sql(self, table_map: TableMapping, expressions: List[str], source: Optional[str] = None) -> str:
+        """
+        Builds the query reading a table mapping's rows from the source.
+
+        Args:
+            table_map: TableMapping to copy.
+            expressions: SQL expression per field mapping, in order.
+            source: Source table reference; source_table() when None.
+
+        Returns:
+            SELECT statement without trailing semicolon.
+        """
+        source = source or self.source_table(table_map.source_table)
+        return f"SELECT {', '.join(expressions)} FROM {source}"
+
+    def column_list(self, table_map: TableMapping) -> str:
+        """
+        Returns the quoted target column list of a table mapping.
+        """
+        return ", ".join(self.quote(f.target_field) for f in table_map.field_mappings)
+
+    def iter_load_sql(self, table_map: TableMapping, expressions: List[str]) -> Iterator[str]:
+        """
+        Yields the script statements loading one table mapping.
+
+        Args:
+            table_map: TableMapping to copy.
+            expressions: SQL expression per field mapping, in order.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield (f"INSERT INTO {self.target_table(table_map.target_table)} ({self.column_list(table_map)}) "
+               f"{self.select_sql(table_map, expressions)};")
+
+    def iter_run_column_sql(self, table: str, column: str) -> Iterator[str]:
+        """
+        Yields the DDL adding an indexed run ID column to a target table.
+
+        Args:
+            table: Target table name.
+            column: Run ID column name.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield f"ALTER TABLE {self.quote(table)} ADD COLUMN {self.quote(column)} VARCHAR(64);"
+        yield (f"CREATE INDEX IF NOT EXISTS {self.quote(self.index_name(table, column))} "
+               f"ON {self.quote(table)} ({self.quote(column)});")
+
+    def index_name(self, table: str, column: str) -> str:
+        """
+        Returns the name of the index on one column of a table.
+        """
+        return f"ix_{table.replace('.', '_')}_{column}"
+
+    def iter_create_staging_sql(self, target: str, staging: str) -> Iterator[str]:
+        """
+        Yields the DDL creating an empty staging table shaped like the target,
+        without its indexes and constraints.
+
+        Args:
+            target: Target table name.
+            staging: Staging table name.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield f"CREATE TABLE {self.quote(staging)} AS SELECT * FROM {self.quote(target)} WHERE 1 = 0;"
+
+    def primary_key_sql(self, table: str, columns: List[str], name: str) -> str:
+        """
+        Builds the statement adding a primary key to a loaded table.
+
+        Args:
+            table: Table name.
+            columns: Key columns.
+            name: Constraint name.
+
+        Returns:
+            SQL statement.
+        """
+        cols = ", ".join(self.quote(c) for c in columns)
+        return f"ALTER TABLE {self.quote(table)} ADD CONSTRAINT {self.quote(name)} PRIMARY KEY ({cols});"
+
+    def iter_foreign_key_sql(self, table: str, column: str, parent: str, parent_column: str,
+                             name: str) -> Iterator[str]:
+        """
+        Yields the statements adding a foreign key, and its supporting index,
+        to a loaded table.
+
+        Args:
+            table: Table name.
+            column: Referencing column.
+            parent: Referenced table.
+            parent_column: Referenced column.
+            name: Constraint name; the index is named ``ix_<name>``.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield self.foreign_key_sql(table, column, parent, parent_column, name)
+        yield f"CREATE INDEX {self.quote('ix_' + name)} ON {self.quote(table)} ({self.quote(column)});"
+
+    def foreign_key_sql(self, table: str, column: str, parent: str, parent_column: str, name: str) -> str:
+        """
+        Builds the statement adding a foreign key constraint.
+
+        Args:
+            table: Table name.
+            column: Referencing column.
+            parent: Referenced table.
+            parent_column: Referenced column.
+            name: Constraint name.
+
+        Returns:
+            ALTER TABLE statement.
+        """
+        return (f"ALTER TABLE {self.quote(table)} ADD CONSTRAINT {self.quote(name)} FOREIGN KEY ({self.quote(column)}) "
+                f"REFERENCES {self.quote(parent)} ({self.quote(parent_column)});")
+
+    def iter_count_check_sql(self, table_map: TableMapping, staging: str) -> Iterator[str]:
+        """
+        Yields statements that fail, through a CHECK constraint, when the
+        staging table does not hold as many rows as the source table.
+
+        Args:
+            table_map: TableMapping being staged.
+            staging: Staging table name.
+
+        Returns:
+            Iterator of statements.
+        """
+        yield "CREATE TEMPORARY TABLE staging_check (ok INTEGER CHECK (ok = 1));"
+        yield (f"INSERT INTO staging_check SELECT CASE WHEN (SELECT COUNT(*) FROM {self.source_table(table_map.source_table)}) "
+               f"= (SELECT COUNT(*) FROM {self.target_table(staging)}) THEN 1 ELSE 0 END;")
+        yield "DROP TABLE staging_check;"
+
+    def iter_swap_sql(self, target: str, staging: str, backup: str,
+                      references: Sequence[Tuple[str, str, str, str]] = ()) -> Iterator[str]:
+        """
+        Yields the statements renaming the staging table into place in one
+        transaction, then dropping the replaced table.
+
+        Foreign keys of other tables follow the renamed table, so the replaced
+        table cannot simply be dropped while it is referenced. When references
+        are given, it is dropped with CASCADE inside the swap transaction and
+        those keys are re-created against the new table; a child row without
+        a parent then rolls the whole swap back.
+
+        Args:
+            target: Target table name.
+            staging: Staging table name.
+            backup: Name the replaced table is renamed to before it is dropped.
+            references: Foreign keys of other tables referencing the target,
+                as (table, column, referenced column, constraint name).
+
+        Returns:
+            Iterator of statements.
+        """
+        yield "BEGIN;"
+        yield f"ALTER TABLE {self.quote(target)} RENAME TO {self.quote(backup.split('.')[-1])};"
+        yield f"ALTER TABLE {self.quote(staging)} RENAME TO {self.quote(target.split('.')[-1])};"
+        if not references:
+            yield "COMMIT;"
+            yield f"DROP TABLE {self.quote(backup)};"
+            return
+        yield f"DROP TABLE {self.quote(backup)} CASCADE;"
+        for table, column, parent_column, name in references:
+            yield self.foreign_key_sql(table, column, target, parent_column, name)
+        yield "COMMIT;"
+
+    def sample_keys_sql(self, table: str, key: str, row_count: int, sample_size: int) -> str:
+        """
+        Builds a query returning a random sample of about sample_size keys.
+
+        Args:
+            table: Quoted table reference.
+            key: Quoted key column.
+            row_count: Number of rows in the table.
+            sample_size: Wanted number of sampled keys.
+
+        Returns:
+            SELECT statement.
+        """
+        percent = min(100.0, 100.0 * sample_size / max(row_count, 1))
+        return f"SELECT {key} FROM {table} TABLESAMPLE BERNOULLI ({percent:.6f}) WHERE {key} IS NOT NULL"
+
+    def insert_values_sql(self, table_map: TableMapping, rows: int) -> str:
+        """
+        Builds a parameterised multi-row INSERT ... VALUES statement.
+
+        Args:
+            table_map: TableMapping whose target columns are inserted.
+            rows: Number of row tuples in the statement.
+
+        Returns:
+            SQL statement with ``rows * len(field_mappings)`` placeholders.
+        """
+        row = "(" + ", ".join([self.placeholder] * len(table_map.field_mappings)) + ")"
+        return (f"INSERT INTO {self.quote(table_map.target_table)} ({self.column_list(table_map)}) "
+                f"VALUES {', '.join([row] * rows)}")
+
+    def rows_per_statement(self, table_map: TableMapping, requested: int) -> int:
+        """
+        Caps a multi-row batch so it stays within max_parameters.
+        """
+        return max(1, min(requested, self.max_parameters // max(len(table_map.field_mappings), 1)))
+
+    def copy_rows(self, source_connection, target_connection, table_map: TableMapping, expressions: List[str],
+                  rows_per_statement: int = 500, commit: bool = True) -> int:
+        """
+        Copies a table between two separate connections with multi-row
+        INSERT ... VALUES batches.
+
+        Rows are streamed with fetchmany, so memory is bounded by one batch.
+
+        Args:
+            source_connection: DB-API connection to the source database.
+            target_connection: DB-API connection to the target database.
+            table_map: TableMapping to copy.
+            expressions: SQL expression per field mapping, in order.
+            rows_per_statement: Rows per INSERT statement (capped by max_parameters).
+            commit: Commit the target connection when done.
+
+        Returns:
+            Number of rows copied.
+        """
+        size = self.rows_per_statement(table_map, rows_per_statement)
+        full_batch = self.insert_values_sql(table_map, size)
+        reader = source_connection.cursor()
+        writer = target_connection.cursor()
+        reader.execute(self.select_sql(table_map, expressions, self.quote(table_map.source_table)))
+        copied = 0
+        while True:
+            rows = reader.fetchmany(size)
+            if not rows:
+                break
+            sql = full_batch if len(rows) == size else self.insert_values_sql(table_map, len(rows))
+            writer.execute(sql, [value for row in rows for value in row])
+            copied += len(rows)
+        reader.close()
+        writer.close()
+        if commit:
+            target_connection.commit()
+        return copied
+
+
+class SQLiteDialect(SQLDialect):
+    """
+    SQLite dialect: every table is loaded by attaching the source database
+    file and running one set-based INSERT ... SELECT in a transaction. Each
+    table block is self-contained, so split script parts run independently.
+    """
+
+    name = "sqlite"
+    max_parameters = 32766
+    cast_types = {"int": "INTEGER", "bigint": "INTEGER", "number": "REAL", "text": "TEXT", "timestamp": "TEXT"}
+
+    def __init__(self, source_database: Optional[str] = "source.db", source_alias: str = "source"):
+        """
+        Args:
+            source_database: Path of the source database file, as seen by
+                the process running the script; None when the source tables
+                live in the target database.
+            source_alias: Schema name the source database is attached as.
+        """
+        self.source_database = source_database
+        self.source_alias = source_alias
+
+    def source_table(self, name: str) -> str:
+        if self.source_database is None:
+            return self.quote(name)
+        return f"{self.quote(self.source_alias)}.{self.quote(name)}"
+
+    def target_table(self, name: str) -> str:
+        return f'"main".{self.quote(name)}'
+
+    def iter_with_source_sql(self, statements: Iterable[str]) -> Iterator[str]:
+        if self.source_database is None:
+            yield from statements
+            return
+        yield f"ATTACH DATABASE {self.literal(self.source_database)} AS {self.quote(self.source_alias)};"
+        yield from statements
+        yield f"DETACH DATABASE {self.quote(self.source_alias)};"
+
+    def iter_load_sql(self, table_map: TableMapping, expressions: List[str]) -> Iterator[str]:
+        yield from self.iter_with_source_sql(["BEGIN;", *super().iter_load_sql(table_map, expressions), "COMMIT;"])
+
+    def sample_keys_sql(self, table: str, key: str, row_count: int, sample_size: int) -> str:
+        # No TABLESAMPLE in SQLite: keep every n-th row at random in one scan.
+        stride = max(1, row_count // max(sample_size, 1))
+        return f"SELECT {key} FROM {table} WHERE {key} IS NOT NULL AND ABS(RANDOM()) % {stride} = 0"
+
+    def substr_sql(self, expression: str, start: str, length: Optional[str] = None) -> str:
+        return f"SUBSTR({expression}, {start}" + (f", {length})" if length else ")")
+
+    def format_date_sql(self, expression: str, fmt: str) -> str:
+        return f"STRFTIME({self.literal(fmt)}, {expression})"
+
+    def primary_key_sql(self, table: str, columns: List[str], name: str) -> str:
+        # SQLite cannot add constraints to an existing table; a unique index enforces the key.
+        cols = ", ".join(self.quote(c) for c in columns)
+        return f"CREATE UNIQUE INDEX {self.quote(name)} ON {self.quote(table)} ({cols});"
+
+    def iter_foreign_key_sql(self, table: str, column: str, parent: str, parent_column: str,
+                             name: str) -> Iterator[str]:
+        # Foreign keys cannot be added after CREATE TABLE; only the index is built.
+        yield f"CREATE INDEX {self.quote('ix_' + name)} ON {self.quote(table)} ({self.quote(column)});"
+
+    def iter_count_check_sql(self, table_map: TableMapping, staging: str) -> Iterator[str]:
+        yield from self.iter_with_source_sql(super().iter_count_check_sql(table_map, staging))
+
+    def iter_swap_sql(self, target: str, staging: str, backup: str,
+                      references: Sequence[Tuple[str, str, str, str]] = ()) -> Iterator[str]:
+        # Keep foreign keys of other tables pointing at the target name
+        # instead of following the renamed table, so none need re-creating.
+        yield "PRAGMA legacy_alter_table = ON;"
+        yield from super().iter_swap_sql(target, staging, backup)
+        yield "PRAGMA legacy_alter_table = OFF;"
+
+
+class PostgreSQLDialect(SQLDialect):
+    """
+    PostgreSQL dialect: every table is exported from the source with psql
+    ``\\copy (SELECT ...) TO`` and imported into the target with
+    ``\\copy ... FROM``, switching databases with ``\\connect``.
+
+    Run the script with ``psql -v source_db=<dsn> -v target_db=<dsn> -f migration.sql``.
+    """
+
+    name = "postgresql"
+    placeholder = "%s"
+    max_parameters = 65535
+    select_from_source = False
+
+    def __init__(self, export_dir: str = "migration_export", copy_format: str = "csv"):
+        """
+        Args:
+            export_dir: Directory, on the machine running psql, holding the
+                exported table files.
+            copy_format: "csv", or "binary" when source and target column
+                types match exactly.
+        """
+        if copy_format not in ("csv", "binary"):
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        self.export_dir = export_dir
+        self.copy_format = copy_format
+
+    def iter_run_column_sql(self, table: str, column: str) -> Iterator[str]:
+        yield f"ALTER TABLE {self.quote(table)} ADD COLUMN IF NOT EXISTS {self.quote(column)} VARCHAR(64);"
+        yield (f"CREATE INDEX IF NOT EXISTS {self.quote(self.index_name(table, column))} "
+               f"ON {self.quote(table)} ({self.quote(column)});")
+
+    def round_sql(self, expression: str, digits: str) -> str:
+        # ROUND(x, n) is only defined for NUMERIC in PostgreSQL.
+        return f"ROUND(CAST({expression} AS NUMERIC), {digits})"
+
+    def iter_create_staging_sql(self, target: str, staging: str) -> Iterator[str]:
+        yield f"CREATE TABLE {self.quote(staging)} (LIKE {self.quote(target)} INCLUDING DEFAULTS);"
+
+    def iter_count_check_sql(self, table_map: TableMapping, staging: str) -> Iterator[str]:
+        # The source lives in another database; compare the COPY row counts psql prints.
+        yield f"-- check that the COPY counts of {table_map.source_table} and {staging} match before the swap"
+
+    def export_path(self, table_map: TableMapping) -> str:
+        """
+        Returns the export file path of a table mapping.
+        """
+        extension = "csv" if self.copy_format == "csv" else "bin"
+        return os.path.join(self.export_dir, f"{table_map.source_table}__{table_map.target_table}.{extension}")
+
+    def iter_load_sql(self, table_map: TableMapping, expressions: List[str]) -> Iterator[str]:
+        path = self.literal(self.export_path(table_map))
+        options = f"WITH (FORMAT {self.copy_format})"
+        yield "\\connect :source_db"
+        yield f"\\copy ({self.select_sql(table_map, expressions)}) TO {path} {options}"
+        yield "\\connect :target_db"
+        yield f"\\copy {self.target_table(table_map.target_table)} ({self.column_list(table_map)}) FROM {path} {options}"
+
+
+def _to_char_pattern(fmt: str) -> str:
+    """
+    Translates a strftime format into a TO_CHAR pattern, quoting literal text.
+    """
+    patterns = {"%Y": "YYYY", "%m": "MM", "%d": "DD", "%H": "HH24", "%M": "MI", "%S": "SS"}
+    parts = []
+    for piece in re.split(r"(%.)", fmt):
+        if piece in patterns:
+            parts.append(patterns[piece])
+        elif piece:
+            parts.append(f'"{piece}"' if re.search(r"[A-Za-z]", piece) else piece)
+    return "".join(parts)
+
+
+DIALECTS: Dict[str, Type[SQLDialect]] = {
+    SQLDialect.name: SQLDialect,
+    SQLiteDialect.name: SQLiteDialect,
+    PostgreSQLDialect.name: PostgreSQLDialect,
+}
+
+
+def get_dialect(name: str, **options) -> SQLDialect:
+    """
+    Creates a dialect by name.
+
+    Args:
+        name: "generic", "sqlite" or "postgresql" (also "postgres").
+        options: Keyword arguments of the dialect class.
+
+    Returns:
+        SQLDialect instance.
+
+    Raises:
+        ValueError: If the dialect is unknown.
+    """
+    key = "postgresql" if name.lower() == "postgres" else name.lower()
+    if key not in DIALECTS:
+        raise ValueError(f"Unknown SQL dialect: {name}")
+    return DIALECTS[key](**options)
@@ -5,8 +5,34 @@ Generates SQL scripts for data migration, validation, and rollback based on
 the provided MigrationMapping object.
 """
 
-from typing import List
-from models import MigrationMapping, TableMapping
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from models import (BatchPlan, FieldMapping, IncrementalPlan, MigrationMapping, PartitionPlan,
+                    ReconciliationPlan, StagingPlan, TableMapping, TableSchema)
+from watermark_store import WatermarkStore
+from instrumentation import metrics_or_null
+from run_manifest import table_key
+from schema_matcher import type_family
+from sql_dialects import SQLDialect
+from transformations import TransformationError, compile_transformation, raw_sql
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_BUCKET_SIZE = 100000
+WATERMARK_COLUMNS = ("updated_at", "modified_at", "last_modified", "last_updated", "updated_on",
+                     "modified_on", "changed_at", "last_update", "modified_date", "update_date")
+RUN_ID_COLUMN = "migration_run_id"
+WATERMARK_TABLE = "migration_watermarks"
+MARK_CAST_KINDS = {"integer": "bigint", "decimal": "number", "timestamp": "timestamp", "date": "timestamp"}
+STAGING_STRATEGY = "staging"
+
+
+def new_run_id() -> str:
+    """
+    Creates a sortable, unique migration run ID, e.g. "20240102T030405-1a2b3c4d".
+    """
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
 
 
 class SQLGenerator:
@@ -14,55 +40,973 @@ class SQLGenerator:
     Generates SQL scripts for performing data migration tasks.
     """
 
-    def generate_migration_sql(self, mapping: MigrationMapping) -> str:
+    def __init__(self, metrics=None, dialect: Optional[SQLDialect] = None, run_id: Optional[str] = None):
+        """
+        Args:
+            metrics: Optional RunMetrics receiving generated statement counts.
+            dialect: SQLDialect deciding identifier quoting and the bulk-load
+                path of full table loads; generic ANSI SQL when None.
+            run_id: When set, every loaded row is tagged with this ID in the
+                RUN_ID_COLUMN of its target table, and rollback only deletes
+                the rows of this run (see new_run_id).
+        """
+        self.metrics = metrics_or_null(metrics)
+        self.dialect = dialect or SQLDialect()
+        self.run_id = run_id
+
+    def generate_migration_sql(self, mapping: MigrationMapping,
+                               source_schema: Optional[List[TableSchema]] = None,
+                               watermarks: Optional[WatermarkStore] = None,
+                               target_schema: Optional[List[TableSchema]] = None) -> str:
         """
         Generates SQL for migrating data from source to target.
 
+        Full table loads use the bulk-load path of the configured dialect.
+        Tables whose strategy is "incremental" are loaded as watermark-based
+        upserts when the source schema provides a watermark column; rows at or
+        below the high-water mark kept in the WATERMARK_TABLE of the target
+        database are skipped, and the script advances that mark in the same
+        transaction, so running it again only loads the new rows. Tables
+        whose strategy is "staging" are loaded into a staging table that is
+        swapped into place (see plan_staging). With a run ID, each table is preceded by
+        the DDL of its run ID column.
+
         Args:
             mapping: MigrationMapping object.
+            source_schema: Optional parsed source tables, needed for incremental loads.
+            watermarks: Optional WatermarkStore whose marks seed WATERMARK_TABLE.
+            target_schema: Optional parsed target tables whose keys are rebuilt
+                on staging tables.
 
         Returns:
             A full SQL string for data migration.
         """
-        statements = []
+        statements = list(self.iter_migration_sql(mapping, source_schema, watermarks, target_schema))
+        self.metrics.count("migration_statements", len(statements))
+        return "\n".join(statements)
+
+    def iter_migration_sql(self, mapping: MigrationMapping,
+                           source_schema: Optional[List[TableSchema]] = None,
+                           watermarks: Optional[WatermarkStore] = None,
+                           target_schema: Optional[List[TableSchema]] = None) -> Iterator[str]:
+        """
+        Yields the migration statements of generate_migration_sql one at a time.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Optional parsed source tables, needed for incremental loads.
+            watermarks: Optional WatermarkStore whose marks seed WATERMARK_TABLE.
+            target_schema: Optional parsed target tables, used by staging loads.
+
+        Returns:
+            Iterator of SQL statements and comment lines.
+        """
+        incremental = {}
+        if source_schema is not None:
+            incremental = {(p.source_table, p.target_table): p
+                           for p in self.plan_incremental(mapping, source_schema)}
+        staged = {(p.source_table, p.target_table): p for p in self.plan_staging(mapping, target_schema)}
+        prepared = set()
         for table_map in mapping.table_mappings:
-            cols = ", ".join([f'"{f.target_field}"' for f in table_map.field_mappings])
-            src_cols = ", ".join([f'"{f.source_field}"' for f in table_map.field_mappings])
-            sql = f'INSERT INTO "{table_map.target_table}" ({cols}) SELECT {src_cols} FROM "{table_map.source_table}";'
-            statements.append(sql)
-            if not cols or not src_cols:
+            if table_map.field_mappings:
+                yield from self.iter_run_tracking_sql(table_map.target_table, prepared)
+            staging = staged.get((table_map.source_table, table_map.target_table))
+            if staging is not None:
+                yield from self.iter_staging_sql(table_map, staging)
+                continue
+            plan = incremental.get((table_map.source_table, table_map.target_table))
+            if plan is not None:
+                yield from self.dialect.iter_with_source_sql(self._iter_incremental_sql(plan, watermarks))
+                continue
+            if not table_map.field_mappings:
                 continue  # Skip if columns are missing
-            sql = f"INSERT INTO {table_map.target_table} ({cols}) SELECT {src_cols} FROM {table_map.source_table};"
-            statements.append(sql)
+            loaded = self.load_mapping(table_map)
+            yield from self.dialect.iter_load_sql(loaded, self.source_expressions(loaded))
+
+    def copy_table(self, source_connection, target_connection, table_map: TableMapping,
+                   rows_per_statement: int = 500) -> int:
+        """
+        Copies one table between separate source and target connections in
+        multi-row INSERT ... VALUES batches of the configured dialect.
+
+        Args:
+            source_connection: DB-API connection to the source database.
+            target_connection: DB-API connection to the target database.
+            table_map: TableMapping to copy.
+            rows_per_statement: Rows per INSERT statement.
+
+        Returns:
+            Number of rows copied.
+        """
+        loaded = self.load_mapping(table_map)
+        return self.dialect.copy_rows(source_connection, target_connection, loaded,
+                                      self.source_expressions(loaded), rows_per_statement)
+
+    def load_mapping(self, table_map: TableMapping) -> TableMapping:
+        """
+        Returns the table mapping as it is loaded: with a run ID, an extra
+        field mapping writes the ID into RUN_ID_COLUMN.
+
+        Args:
+            table_map: TableMapping object.
+
+        Returns:
+            The table mapping itself, or a copy with the run ID field.
+        """
+        if self.run_id is None:
+            return table_map
+        run_field = FieldMapping(RUN_ID_COLUMN, RUN_ID_COLUMN, self.dialect.literal(self.run_id))
+        return TableMapping(table_map.source_table, table_map.target_table, table_map.field_mappings + [run_field],
+                            table_map.strategy, table_map.complexity)
+
+    def iter_run_tracking_sql(self, target_table: str, prepared: set) -> Iterator[str]:
+        """
+        Yields the DDL adding the indexed run ID column to a target table,
+        once per table; nothing without a run ID.
+
+        Args:
+            target_table: Target table name.
+            prepared: Target tables already prepared, updated in place.
+
+        Returns:
+            Iterator of SQL statements.
+        """
+        if self.run_id is None or target_table in prepared:
+            return
+        prepared.add(target_table)
+        yield from self.dialect.iter_run_column_sql(target_table, RUN_ID_COLUMN)
+
+    def source_expressions(self, table_map: TableMapping) -> List[str]:
+        """
+        Returns the SQL expression of every field mapping of a table, in order.
+
+        Args:
+            table_map: TableMapping object.
+
+        Returns:
+            List of SQL expressions producing the target column values.
+        """
+        return [self._source_expression(f) for f in table_map.field_mappings]
+
+    def generate_table_migration_sql(self, table_map: TableMapping) -> str:
+        """
+        Generates the single INSERT ... SELECT statement for one table mapping.
+
+        Args:
+            table_map: TableMapping object.
+
+        Returns:
+            SQL statement copying the whole table.
+        """
+        return f"{self._insert_select(table_map)};"
+
+    def plan_incremental(self, mapping: MigrationMapping, source_schema: List[TableSchema]) -> List[IncrementalPlan]:
+        """
+        Builds watermark-based delta loads for tables with strategy "incremental".
+
+        The watermark is an update timestamp column (updated_at, modified_at, ...)
+        or else a single integer primary key. Rows are upserted on the target
+        key mapped from the source primary key; without one they are appended.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables.
+
+        Returns:
+            List of IncrementalPlan objects; tables without a usable watermark
+            are left out and fall back to a full load.
+        """
+        tables: Dict[str, TableSchema] = {t.table_name: t for t in source_schema}
+        plans = []
+        for table_map in mapping.table_mappings:
+            if (table_map.strategy or "").lower() != "incremental" or not table_map.field_mappings:
+                continue
+            source = tables.get(table_map.source_table)
+            watermark = self._watermark_column(source) if source else None
+            if watermark is None:
+                continue
+            targets = {f.source_field: f.target_field for f in table_map.field_mappings}
+            keys = [targets.get(f.name) for f in source.fields if f.primary_key]
+            wm = self.dialect.quote(watermark)
+            insert = self._insert_select(table_map)
+            upsert = ""
+            if keys and all(keys):
+                updates = [f'{self.dialect.quote(f.target_field)} = excluded.{self.dialect.quote(f.target_field)}'
+                           for f in table_map.field_mappings if f.target_field not in keys]
+                conflict = ", ".join(self.dialect.quote(k) for k in keys)
+                upsert = f" ON CONFLICT ({conflict}) " + (f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING")
+            datatype = next(f.datatype for f in source.fields if f.name == watermark)
+            plans.append(IncrementalPlan(
+                source_table=table_map.source_table,
+                target_table=table_map.target_table,
+                watermark_column=watermark,
+                high_mark_sql=f"SELECT MAX({wm}) FROM {self.dialect.source_table(table_map.source_table)};",
+                full_sql=f"{insert} WHERE {wm} <= :high_mark{upsert};",
+                delta_sql=f"{insert} WHERE {wm} > :last_mark AND {wm} <= :high_mark{upsert};",
+                script_sql=self._stored_mark_sql(table_map, watermark, datatype, insert, upsert),
+            ))
+        return plans
+
+    def _stored_mark_sql(self, table_map: TableMapping, watermark: str, datatype: str, insert: str,
+                         upsert: str) -> List[str]:
+        """
+        Builds the statements of an incremental load that reads and advances
+        its high-water mark in WATERMARK_TABLE.
+
+        The current maximum is recorded as the pending mark first, so rows
+        arriving in the source while the load runs are left for the next run
+        instead of being skipped. An empty source leaves the stored mark alone.
+
+        Args:
+            table_map: TableMapping loaded incrementally.
+            watermark: Source watermark column.
+            datatype: Datatype of the watermark column; stored marks are cast
+                back to it for the comparisons.
+            insert: INSERT ... SELECT prefix of the table.
+            upsert: ON CONFLICT clause, or an empty string.
+
+        Returns:
+            SQL statements, to be run in one transaction.
+        """
+        q = self.dialect.quote
+        wm = q(watermark)
+        marks = self.dialect.target_table(WATERMARK_TABLE)
+        key = self.dialect.literal(table_key(table_map.source_table, table_map.target_table))
+        match = f"{q('table_key')} = {key} AND {q('watermark_column')} = {self.dialect.literal(watermark)}"
+        kind = MARK_CAST_KINDS.get(type_family(datatype), "text")
+        high, pending = (self.dialect.cast_sql(f"(SELECT {q(column)} FROM {marks} WHERE {match})", kind)
+                         for column in ("high_mark", "pending_mark"))
+        current = self.dialect.cast_sql(f"MAX({wm})", "text")
+        return [
+            f"INSERT INTO {marks} ({q('table_key')}, {q('watermark_column')}, {q('pending_mark')}) "
+            f"SELECT {key}, {self.dialect.literal(watermark)}, {current} "
+            f"FROM {self.dialect.source_table(table_map.source_table)} WHERE 1 = 1 "
+            f"ON CONFLICT ({q('table_key')}, {q('watermark_column')}) "
+            f"DO UPDATE SET {q('pending_mark')} = excluded.{q('pending_mark')};",
+            f"{insert} WHERE {wm} <= {pending} AND ({high} IS NULL OR {wm} > {high}){upsert};",
+            f"UPDATE {marks} SET {q('high_mark')} = {q('pending_mark')} "
+            f"WHERE {match} AND {q('pending_mark')} IS NOT NULL;",
+        ]
+
+    def iter_watermark_table_sql(self) -> Iterator[str]:
+        """
+        Yields the DDL of the WATERMARK_TABLE holding the high-water marks of
+        incremental loads in the target database.
+
+        Returns:
+            Iterator of statements.
+        """
+        q = self.dialect.quote
+        yield (f"CREATE TABLE IF NOT EXISTS {self.dialect.target_table(WATERMARK_TABLE)} ("
+               f"{q('table_key')} VARCHAR(512) NOT NULL, {q('watermark_column')} VARCHAR(255) NOT NULL, "
+               f"{q('high_mark')} VARCHAR(255), {q('pending_mark')} VARCHAR(255), "
+               f"PRIMARY KEY ({q('table_key')}, {q('watermark_column')}));")
+
+    def _watermark_column(self, table: TableSchema) -> Optional[str]:
+        """
+        Picks the column used to detect new or changed rows.
+
+        Args:
+            table: Source TableSchema.
+
+        Returns:
+            Column name, or None when the table has no suitable column.
+        """
+        by_name = {f.name.lower(): f for f in table.fields}
+        for name in WATERMARK_COLUMNS:
+            if name in by_name:
+                return by_name[name].name
+        pk_fields = [f for f in table.fields if f.primary_key]
+        if len(pk_fields) == 1 and type_family(pk_fields[0].datatype) == "integer":
+            return pk_fields[0].name
+        return None
+
+    def _iter_incremental_sql(self, plan: IncrementalPlan, watermarks: Optional[WatermarkStore]) -> Iterator[str]:
+        """
+        Renders an incremental plan as script statements that keep their
+        high-water mark in WATERMARK_TABLE.
+
+        A mark found in the WatermarkStore (e.g. recorded by
+        MigrationExecutor) is copied into the table unless it already holds
+        one for the load.
+
+        Args:
+            plan: IncrementalPlan of the table.
+            watermarks: Optional WatermarkStore whose marks seed WATERMARK_TABLE.
+
+        Returns:
+            Iterator of the comment line and SQL statements.
+        """
+        yield (f"-- {plan.source_table} -> {plan.target_table}: incremental on {plan.watermark_column}, "
+               f"past the high-water mark kept in {WATERMARK_TABLE}")
+        yield from self.iter_watermark_table_sql()
+        mark = watermarks.get(plan.source_table, plan.target_table, plan.watermark_column) if watermarks else None
+        if mark is not None:
+            q = self.dialect.quote
+            yield (f"INSERT INTO {self.dialect.target_table(WATERMARK_TABLE)} "
+                   f"({q('table_key')}, {q('watermark_column')}, {q('high_mark')}) "
+                   f"VALUES ({self.dialect.literal(table_key(plan.source_table, plan.target_table))}, "
+                   f"{self.dialect.literal(plan.watermark_column)}, {self.dialect.literal(str(mark))}) "
+                   f"ON CONFLICT ({q('table_key')}, {q('watermark_column')}) DO NOTHING;")
+        yield "BEGIN;"
+        yield from plan.script_sql
+        yield "COMMIT;"
+
+    def plan_staging(self, mapping: MigrationMapping,
+                     target_schema: Optional[List[TableSchema]] = None) -> List[StagingPlan]:
+        """
+        Builds staging loads for tables with strategy "staging".
+
+        Rows are bulk-loaded into an empty, unindexed copy of the target
+        table. The primary key and foreign keys of the target schema are
+        built afterwards, the row count is checked against the source, and
+        the staging table replaces the target in one short rename
+        transaction, so readers never see a half-loaded table.
+
+        Only keys known from the target schema are rebuilt; other indexes of
+        the replaced table are lost. Constraint names carry a tag derived from
+        the run ID (random without one) so they never collide with the names
+        of the table being replaced. Foreign keys of other target tables that
+        reference a staged table are re-created against the new table during
+        the swap (see SQLDialect.iter_swap_sql); keys missing from the target
+        schema are dropped with the replaced table.
+
+        Args:
+            mapping: MigrationMapping object.
+            target_schema: Parsed target tables providing keys to rebuild.
+
+        Returns:
+            List of StagingPlan objects.
+        """
+        targets: Dict[str, TableSchema] = {t.table_name: t for t in target_schema or []}
+        tag = hashlib.sha1((self.run_id or new_run_id()).encode("utf-8")).hexdigest()[:8]
+        referenced_by: Dict[str, List[Tuple[str, str, str, str]]] = {}
+        for table in target_schema or []:
+            for column, reference in (table.relationships or {}).items():
+                parent, _, parent_column = reference.partition("(")
+                if parent != table.table_name:
+                    name = f"fk_{table.table_name.replace('.', '_')}_{column}_{tag}"
+                    referenced_by.setdefault(parent, []).append(
+                        (table.table_name, column, parent_column.rstrip(")"), name))
+        plans = []
+        for table_map in mapping.table_mappings:
+            if (table_map.strategy or "").lower() != STAGING_STRATEGY or not table_map.field_mappings:
+                continue
+            target = table_map.target_table
+            staging = f"{target}__staging"
+            base = target.replace(".", "_")
+            index_sql = []
+            schema = targets.get(target)
+            if schema is not None:
+                keys = [f.name for f in schema.fields if f.primary_key]
+                if keys:
+                    index_sql.append(self.dialect.primary_key_sql(staging, keys, f"pk_{base}_{tag}"))
+                for column, reference in (schema.relationships or {}).items():
+                    parent, _, parent_column = reference.partition("(")
+                    index_sql.extend(self.dialect.iter_foreign_key_sql(
+                        staging, column, parent, parent_column.rstrip(")"), f"fk_{base}_{column}_{tag}"))
+            loaded = TableMapping(table_map.source_table, staging, table_map.field_mappings,
+                                  table_map.strategy, table_map.complexity)
+            if self.dialect.select_from_source:
+                load_sql = f"{self._insert_select(loaded)};"
+            else:
+                bulk = self.load_mapping(loaded)
+                load_sql = "\n".join(self.dialect.iter_load_sql(bulk, self.source_expressions(bulk)))
+            plans.append(StagingPlan(
+                source_table=table_map.source_table,
+                target_table=target,
+                staging_table=staging,
+                create_sql=[f"DROP TABLE IF EXISTS {self.dialect.quote(staging)};",
+                            *self.dialect.iter_create_staging_sql(target, staging)],
+                load_sql=load_sql,
+                index_sql=index_sql,
+                source_count_sql=f"SELECT COUNT(*) FROM {self.dialect.source_table(table_map.source_table)};",
+                staging_count_sql=f"SELECT COUNT(*) FROM {self.dialect.quote(staging)};",
+                swap_sql=list(self.dialect.iter_swap_sql(target, staging, f"{target}__replaced",
+                                                         referenced_by.get(target, []))),
+            ))
+        return plans
+
+    def iter_staging_sql(self, table_map: TableMapping, plan: StagingPlan) -> Iterator[str]:
+        """
+        Renders a staging plan as script statements, loading the staging
+        table with the dialect's bulk-load path.
+
+        Args:
+            table_map: TableMapping being staged.
+            plan: StagingPlan of the table.
+
+        Returns:
+            Iterator of SQL statements and comment lines.
+        """
+        yield f"-- {plan.source_table} -> {plan.target_table}: staged load through {plan.staging_table}"
+        yield from plan.create_sql
+        loaded = self.load_mapping(TableMapping(table_map.source_table, plan.staging_table, table_map.field_mappings,
+                                                table_map.strategy, table_map.complexity))
+        yield from self.dialect.iter_load_sql(loaded, self.source_expressions(loaded))
+        yield from plan.index_sql
+        yield from self.dialect.iter_count_check_sql(table_map, plan.staging_table)
+        yield from plan.swap_sql
+
+    def plan_batches(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                     batch_size: int = DEFAULT_BATCH_SIZE, fallback: str = "rowid",
+                     hash_buckets: int = 16, hash_function: str = "hashtext") -> List[BatchPlan]:
+        """
+        Builds a batch plan per table mapping using the source primary keys.
+
+        Tables with a single-column primary key are paged by keyset
+        (``WHERE pk > :last_key AND pk <= :next_key``). Other tables fall back
+        to ROWID ranges or to a fixed number of hash buckets.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary key columns.
+            batch_size: Rows per keyset/rowid batch.
+            fallback: "rowid" or "hash" for tables without a single-column key.
+            hash_buckets: Number of buckets used by the hash fallback.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            List of BatchPlan objects, one per table mapping with columns.
+        """
+        if fallback not in ("rowid", "hash"):
+            raise ValueError(f"Unsupported batch fallback: {fallback}")
+        tables: Dict[str, TableSchema] = {t.table_name: t for t in source_schema}
+        plans = []
+        for table_map in mapping.table_mappings:
+            if not table_map.field_mappings:
+                continue
+            source = tables.get(table_map.source_table)
+            pk_columns = [f.name for f in source.fields if f.primary_key] if source else []
+            if len(pk_columns) == 1:
+                plans.append(self._keyset_plan(table_map, self.dialect.quote(pk_columns[0]), "keyset", batch_size))
+            elif fallback == "rowid":
+                plans.append(self._keyset_plan(table_map, "rowid", "rowid", batch_size))
+            else:
+                key_columns = pk_columns or [f.source_field for f in table_map.field_mappings]
+                plans.append(self._hash_plan(table_map, key_columns, batch_size, hash_buckets, hash_function))
+        return plans
+
+    def generate_chunked_migration_sql(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                                       batch_size: int = DEFAULT_BATCH_SIZE, fallback: str = "rowid",
+                                       hash_buckets: int = 16, hash_function: str = "hashtext",
+                                       target_schema: Optional[List[TableSchema]] = None,
+                                       watermarks: Optional[WatermarkStore] = None) -> str:
+        """
+        Generates migration SQL split into independently committed batches.
+
+        Keyset and rowid tables are emitted as parameterised templates together
+        with the boundary queries a driver loops over; hash-bucketed tables are
+        emitted as one concrete transaction per bucket. Staging tables are
+        loaded in one statement and swapped into place. Incremental tables
+        load only the rows past the high-water mark kept in WATERMARK_TABLE,
+        and advance it, in one transaction.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary key columns.
+            batch_size: Rows per keyset/rowid batch.
+            fallback: "rowid" or "hash" for tables without a single-column key.
+            hash_buckets: Number of buckets used by the hash fallback.
+            hash_function: SQL function hashing a text value to an integer.
+            target_schema: Optional parsed target tables, used by staging loads.
+            watermarks: Optional WatermarkStore whose marks seed WATERMARK_TABLE.
+
+        Returns:
+            SQL string for batched data migration.
+        """
+        statements = list(self.iter_chunked_migration_sql(mapping, source_schema, batch_size, fallback,
+                                                          hash_buckets, hash_function, target_schema, watermarks))
+        self.metrics.count("migration_statements", len(statements))
         return "\n".join(statements)
 
-    def generate_validation_sql(self, mapping: MigrationMapping) -> str:
+    def iter_chunked_migration_sql(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                                   batch_size: int = DEFAULT_BATCH_SIZE, fallback: str = "rowid",
+                                   hash_buckets: int = 16, hash_function: str = "hashtext",
+                                   target_schema: Optional[List[TableSchema]] = None,
+                                   watermarks: Optional[WatermarkStore] = None) -> Iterator[str]:
+        """
+        Yields the statements of generate_chunked_migration_sql one at a time.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary key columns.
+            batch_size: Rows per keyset/rowid batch.
+            fallback: "rowid" or "hash" for tables without a single-column key.
+            hash_buckets: Number of buckets used by the hash fallback.
+            hash_function: SQL function hashing a text value to an integer.
+            target_schema: Optional parsed target tables, used by staging loads.
+            watermarks: Optional WatermarkStore whose marks seed WATERMARK_TABLE.
+
+        Returns:
+            Iterator of SQL statements and comment lines.
+        """
+        staged = {(p.source_table, p.target_table): p for p in self.plan_staging(mapping, target_schema)}
+        incremental = {(p.source_table, p.target_table): p for p in self.plan_incremental(mapping, source_schema)}
+        tables = {(t.source_table, t.target_table): t for t in mapping.table_mappings}
+        prepared = set()
+        for plan in self.plan_batches(mapping, source_schema, batch_size, fallback, hash_buckets, hash_function):
+            yield from self.iter_run_tracking_sql(plan.target_table, prepared)
+            staging = staged.get((plan.source_table, plan.target_table))
+            if staging is not None:
+                yield from self.iter_staging_sql(tables[(plan.source_table, plan.target_table)], staging)
+                continue
+            delta = incremental.get((plan.source_table, plan.target_table))
+            if delta is not None:
+                yield from self.dialect.iter_with_source_sql(self._iter_incremental_sql(delta, watermarks))
+                continue
+            yield f"-- {plan.source_table} -> {plan.target_table}: {plan.mode} batches on {plan.key_column}"
+            yield from self.dialect.iter_with_source_sql(self._iter_batch_sql(plan))
+
+    def _iter_batch_sql(self, plan: BatchPlan) -> Iterator[str]:
+        """
+        Renders a batch plan as committed batches of a chunked script.
+
+        Args:
+            plan: BatchPlan of the table.
+
+        Returns:
+            Iterator of SQL statements and comment lines.
+        """
+        if plan.mode == "hash":
+            for bucket in range(plan.hash_buckets):
+                yield "BEGIN;"
+                yield plan.batch_sql.replace(":bucket", str(bucket))
+                yield "COMMIT;"
+            return
+        yield f"-- first upper bound: {plan.first_boundary_sql}"
+        yield f"-- next upper bound:  {plan.boundary_sql}"
+        yield "-- repeat until the upper bound is NULL, binding :last_key to the previous :next_key"
+        yield "BEGIN;"
+        yield plan.first_batch_sql
+        yield "COMMIT;"
+        yield "BEGIN;"
+        yield plan.batch_sql
+        yield "COMMIT;"
+
+    def _keyset_plan(self, table_map: TableMapping, key: str, mode: str, batch_size: int) -> BatchPlan:
+        """
+        Builds a keyset-paginated plan over a single ordered key.
+
+        Args:
+            table_map: TableMapping to copy.
+            key: Quoted key column or pseudo-column (e.g. rowid).
+            mode: Plan mode recorded on the BatchPlan.
+            batch_size: Rows per batch.
+
+        Returns:
+            BatchPlan with boundary and batch SQL templates.
+        """
+        insert = self._insert_select(table_map)
+        source = self.dialect.source_table(table_map.source_table)
+        boundary = f"SELECT MAX({key}) FROM (SELECT {key} FROM {source}{{where}} ORDER BY {key} LIMIT {batch_size}) AS batch_keys;"
+        return BatchPlan(
+            source_table=table_map.source_table,
+            target_table=table_map.target_table,
+            mode=mode,
+            batch_size=batch_size,
+            key_column=key,
+            first_boundary_sql=boundary.format(where=""),
+            boundary_sql=boundary.format(where=f" WHERE {key} > :last_key"),
+            first_batch_sql=f"{insert} WHERE {key} <= :next_key;",
+            batch_sql=f"{insert} WHERE {key} > :last_key AND {key} <= :next_key;",
+        )
+
+    def _hash_plan(self, table_map: TableMapping, key_columns: List[str], batch_size: int,
+                   hash_buckets: int, hash_function: str) -> BatchPlan:
+        """
+        Builds a plan that splits a table into hash buckets of its key columns.
+
+        Args:
+            table_map: TableMapping to copy.
+            key_columns: Columns hashed to assign rows to buckets.
+            batch_size: Nominal rows per batch (informational).
+            hash_buckets: Number of buckets.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            BatchPlan whose batch_sql is bound with :bucket.
+        """
+        key = " || '|' || ".join(f"CAST({self.dialect.quote(c)} AS VARCHAR)" for c in key_columns)
+        insert = self._insert_select(table_map)
+        return BatchPlan(
+            source_table=table_map.source_table,
+            target_table=table_map.target_table,
+            mode="hash",
+            batch_size=batch_size,
+            key_column=", ".join(key_columns),
+            batch_sql=f"{insert} WHERE MOD(ABS({hash_function}({key})), {hash_buckets}) = :bucket;",
+            hash_buckets=hash_buckets,
+        )
+
+    def plan_partitions(self, mapping: MigrationMapping, source_schema: List[TableSchema], partitions: int,
+                        fallback: str = "rowid", hash_function: str = "hashtext") -> List[PartitionPlan]:
+        """
+        Builds a plan splitting every table mapping into disjoint partitions
+        that can be loaded concurrently on separate connections.
+
+        Tables with a single-column primary key are split into key ranges,
+        whose boundaries are chosen at load time from a key sample (see
+        sample_keys_sql and balanced_boundaries). Other tables fall back to
+        ROWID ranges or to hash buckets of their key columns.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary key columns.
+            partitions: Number of partitions per table.
+            fallback: "rowid" or "hash" for tables without a single-column key.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            List of PartitionPlan objects, one per table mapping with columns.
+        """
+        if fallback not in ("rowid", "hash"):
+            raise ValueError(f"Unsupported partition fallback: {fallback}")
+        tables: Dict[str, TableSchema] = {t.table_name: t for t in source_schema}
+        plans = []
+        for table_map in mapping.table_mappings:
+            if not table_map.field_mappings:
+                continue
+            source = tables.get(table_map.source_table)
+            pk_columns = [f.name for f in source.fields if f.primary_key] if source else []
+            if len(pk_columns) == 1:
+                mode, key = "range", self.dialect.quote(pk_columns[0])
+            elif fallback == "rowid":
+                mode, key = "rowid", "rowid"
+            else:
+                columns = pk_columns or [f.source_field for f in table_map.field_mappings]
+                mode = "hash"
+                cast = " || '|' || ".join(f"CAST({self.dialect.quote(c)} AS VARCHAR)" for c in columns)
+                key = f"{hash_function}({cast})"
+            plans.append(PartitionPlan(
+                source_table=table_map.source_table,
+                target_table=table_map.target_table,
+                mode=mode,
+                key_column=key,
+                partitions=partitions,
+                count_sql=f"SELECT COUNT(*) FROM {self.dialect.source_table(table_map.source_table)};",
+                insert_sql=self._insert_select(table_map),
+            ))
+        return plans
+
+    def sample_keys_sql(self, plan: PartitionPlan, row_count: int, sample_size: int = 10000) -> str:
+        """
+        Builds the query sampling the keys of a range or rowid partition plan.
+
+        Args:
+            plan: PartitionPlan whose mode is "range" or "rowid".
+            row_count: Number of source rows.
+            sample_size: Wanted number of sampled keys.
+
+        Returns:
+            SELECT statement.
+        """
+        return self.dialect.sample_keys_sql(self.dialect.source_table(plan.source_table), plan.key_column, row_count,
+                                            sample_size)
+
+    def render_partitions(self, plan: PartitionPlan, boundaries: Optional[List] = None) -> List[str]:
+        """
+        Renders one INSERT ... SELECT per partition.
+
+        Args:
+            plan: PartitionPlan of the table.
+            boundaries: Sorted upper key bounds of all but the last range
+                partition (see balanced_boundaries); ignored for hash plans.
+
+        Returns:
+            SQL statements covering every source row exactly once.
+        """
+        if plan.mode == "hash":
+            return [f"{plan.insert_sql} WHERE MOD(ABS({plan.key_column}), {plan.partitions}) = {bucket};"
+                    for bucket in range(plan.partitions)]
+        bounds = [None] + list(boundaries or []) + [None]
+        statements = []
+        for low, high in zip(bounds, bounds[1:]):
+            conditions = []
+            if low is not None:
+                conditions.append(f"{plan.key_column} > {self.dialect.literal(low)}")
+            if high is not None:
+                conditions.append(f"{plan.key_column} <= {self.dialect.literal(high)}")
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            statements.append(f"{plan.insert_sql}{where};")
+        return statements
+
+    def _insert_select(self, table_map: TableMapping) -> str:
+        """
+        Builds the INSERT ... SELECT prefix for a table mapping (without WHERE),
+        reading the source through the dialect's source_table reference.
+
+        Args:
+            table_map: TableMapping to copy.
+
+        Returns:
+            SQL fragment.
+
+        Raises:
+            ValueError: If the dialect cannot read source tables from the
+                target connection (see SQLDialect.select_from_source).
+        """
+        if not self.dialect.select_from_source:
+            raise ValueError(f"The {self.dialect.name} dialect only loads whole tables through its bulk-load path; "
+                             f"{table_map.source_table} -> {table_map.target_table} needs an INSERT ... SELECT "
+                             f"(strategy {table_map.strategy!r}, batching or partitioning), which reads the source "
+                             f"from the target connection. Use the generic or sqlite dialect for it.")
+        cols = [self.dialect.quote(f.target_field) for f in table_map.field_mappings]
+        src_cols = self.source_expressions(table_map)
+        if self.run_id is not None:
+            cols.append(self.dialect.quote(RUN_ID_COLUMN))
+            src_cols.append(self.dialect.literal(self.run_id))
+        return (f"INSERT INTO {self.dialect.target_table(table_map.target_table)} ({', '.join(cols)}) "
+                f"SELECT {', '.join(src_cols)} FROM {self.dialect.source_table(table_map.source_table)}")
+
+    def generate_validation_sql(self, mapping: MigrationMapping,
+                                source_schema: Optional[List[TableSchema]] = None,
+                                bucket_size: int = DEFAULT_BUCKET_SIZE, hash_buckets: int = 1024,
+                                hash_function: str = "hashtext") -> str:
         """
         Generates SQL to validate row counts between source and target.
 
+        When the source schema is given, checksum reconciliation queries are
+        added per table: an order-independent hash aggregate per key bucket on
+        both sides, and a drill-down query listing the offending keys of one
+        mismatched bucket.
+
         Args:
             mapping: MigrationMapping object.
+            source_schema: Optional parsed source tables providing primary keys.
+            bucket_size: Key range per bucket for integer primary keys.
+            hash_buckets: Number of buckets for other keys.
+            hash_function: SQL function hashing a text value to an integer.
 
         Returns:
             A SQL string with COUNT validation queries.
         """
-        validation = []
-        for t in mapping.table_mappings:
-            sql = f"SELECT '{t.source_table}' AS table_name, "                   f"(SELECT COUNT(*) FROM {t.source_table}) AS source_count, "                   f"(SELECT COUNT(*) FROM {t.target_table}) AS target_count;"
-            validation.append(sql)
+        validation = list(self.iter_validation_sql(mapping, source_schema, bucket_size, hash_buckets, hash_function))
+        self.metrics.count("validation_statements", len(validation))
         return "\n".join(validation)
 
-    def generate_rollback_sql(self, mapping: MigrationMapping) -> str:
+    def iter_validation_sql(self, mapping: MigrationMapping,
+                            source_schema: Optional[List[TableSchema]] = None,
+                            bucket_size: int = DEFAULT_BUCKET_SIZE, hash_buckets: int = 1024,
+                            hash_function: str = "hashtext") -> Iterator[str]:
+        """
+        Yields the statements of generate_validation_sql one at a time.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Optional parsed source tables providing primary keys.
+            bucket_size: Key range per bucket for integer primary keys.
+            hash_buckets: Number of buckets for other keys.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            Iterator of SQL statements and comment lines.
+        """
+        yield from self.dialect.iter_with_source_sql(
+            (f"SELECT {self.dialect.literal(t.source_table)} AS table_name, "
+             f"(SELECT COUNT(*) FROM {self.dialect.source_table(t.source_table)}) AS source_count, "
+             f"(SELECT COUNT(*) FROM {self.dialect.target_table(t.target_table)}) AS target_count;")
+            for t in mapping.table_mappings)
+        if source_schema is not None:
+            for plan in self.plan_reconciliation(mapping, source_schema, bucket_size, hash_buckets, hash_function):
+                yield f"-- {plan.source_table} -> {plan.target_table}: {plan.bucket_mode} bucket checksums on {plan.key_column}"
+                yield plan.bucket_sql
+                yield f"-- drill down into one mismatched bucket: {plan.drilldown_sql}"
+
+    def plan_reconciliation(self, mapping: MigrationMapping, source_schema: List[TableSchema],
+                            bucket_size: int = DEFAULT_BUCKET_SIZE, hash_buckets: int = 1024,
+                            hash_function: str = "hashtext") -> List[ReconciliationPlan]:
+        """
+        Builds checksum reconciliation queries for every mapped table.
+
+        Rows are hashed over the mapped columns (with FieldMapping.transformation
+        applied on the source side) and summed per bucket. Integer primary keys
+        are bucketed by key range; other keys by a hash of the key columns.
+
+        Args:
+            mapping: MigrationMapping object.
+            source_schema: Parsed source tables providing primary keys.
+            bucket_size: Key range per bucket for integer primary keys.
+            hash_buckets: Number of buckets for other keys.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            List of ReconciliationPlan objects.
+        """
+        tables: Dict[str, TableSchema] = {t.table_name: t for t in source_schema}
+        plans = []
+        for table_map in mapping.table_mappings:
+            if not table_map.field_mappings:
+                continue
+            source = tables.get(table_map.source_table)
+            pk_fields = [f for f in source.fields if f.primary_key] if source else []
+            targets = {f.source_field: f.target_field for f in table_map.field_mappings}
+            if not pk_fields or any(f.name not in targets for f in pk_fields):
+                pk_names = [f.source_field for f in table_map.field_mappings]
+                pk_fields = []
+            else:
+                pk_names = [f.name for f in pk_fields]
+            source_key = self._key_expression([self.dialect.quote(n) for n in pk_names])
+            target_key = self._key_expression([self.dialect.quote(targets[n]) for n in pk_names])
+            source_hash = self._row_hash([self._source_expression(f) for f in table_map.field_mappings], hash_function)
+            target_hash = self._row_hash([self.dialect.quote(f.target_field) for f in table_map.field_mappings],
+                                         hash_function)
+            if len(pk_fields) == 1 and type_family(pk_fields[0].datatype) == "integer":
+                mode, size = "range", bucket_size
+                source_bucket = f"CAST({source_key} / {size} AS INTEGER)"
+                target_bucket = f"CAST({target_key} / {size} AS INTEGER)"
+                source_filter = f"{source_key} > :low AND {source_key} < :high"
+                target_filter = f"{target_key} > :low AND {target_key} < :high"
+            else:
+                mode, size = "hash", hash_buckets
+                source_bucket = f"MOD(ABS({hash_function}({source_key})), {size})"
+                target_bucket = f"MOD(ABS({hash_function}({target_key})), {size})"
+                source_filter = f"{source_bucket} = :bucket"
+                target_filter = f"{target_bucket} = :bucket"
+            source_table = self.dialect.quote(table_map.source_table)
+            target_table = self.dialect.quote(table_map.target_table)
+            bucket_sql = (
+                "SELECT COALESCE(s.bucket, t.bucket) AS bucket, s.row_count AS source_rows, t.row_count AS target_rows "
+                f"FROM (SELECT {source_bucket} AS bucket, COUNT(*) AS row_count, SUM({source_hash}) AS checksum "
+                f"FROM {source_table} GROUP BY 1) s "
+                f"FULL OUTER JOIN (SELECT {target_bucket} AS bucket, COUNT(*) AS row_count, SUM({target_hash}) AS checksum "
+                f"FROM {target_table} GROUP BY 1) t ON s.bucket = t.bucket "
+                "WHERE s.bucket IS NULL OR t.bucket IS NULL OR s.row_count <> t.row_count OR s.checksum <> t.checksum "
+                "ORDER BY 1;"
+            )
+            drilldown_sql = (
+                "SELECT COALESCE(s.row_key, t.row_key) AS row_key "
+                f"FROM (SELECT {source_key} AS row_key, {source_hash} AS row_hash FROM {source_table} WHERE {source_filter}) s "
+                f"FULL OUTER JOIN (SELECT {target_key} AS row_key, {target_hash} AS row_hash FROM {target_table} WHERE {target_filter}) t "
+                "ON s.row_key = t.row_key "
+                "WHERE s.row_key IS NULL OR t.row_key IS NULL OR s.row_hash <> t.row_hash "
+                "ORDER BY 1;"
+            )
+            plans.append(ReconciliationPlan(
+                source_table=table_map.source_table,
+                target_table=table_map.target_table,
+                key_column=", ".join(pk_names),
+                bucket_mode=mode,
+                bucket_size=size,
+                bucket_sql=bucket_sql,
+                drilldown_sql=drilldown_sql,
+            ))
+        return plans
+
+    def _source_expression(self, field_map) -> str:
+        """
+        Returns the SQL expression producing a target value from the source row.
+
+        Args:
+            field_map: FieldMapping object.
+
+        Returns:
+            The transformation compiled to the dialect when present, else the
+            quoted source column. SQL marked with RAW_SQL_PREFIX is copied as
+            is. A transformation that does not parse (e.g. a prose
+            description) is counted as "invalid_transformations" and replaced
+            by the source column, followed by a comment quoting it.
+        """
+        if not field_map.transformation:
+            return self.dialect.quote(field_map.source_field)
+        sql = raw_sql(field_map.transformation)
+        if sql is not None:
+            return sql
+        try:
+            return compile_transformation(field_map.transformation).sql(self.dialect)
+        except TransformationError:
+            self.metrics.count("invalid_transformations")
+            text = " ".join(field_map.transformation.split()).replace("*/", "* /")
+            return f"{self.dialect.quote(field_map.source_field)} /* invalid transformation ignored: {text} */"
+
+    def _key_expression(self, columns: List[str]) -> str:
+        """
+        Combines key columns into a single comparable expression.
+
+        Args:
+            columns: Quoted key columns.
+
+        Returns:
+            The column itself, or a delimited text concatenation for composite keys.
+        """
+        if len(columns) == 1:
+            return columns[0]
+        return " || '|' || ".join(f"COALESCE(CAST({c} AS VARCHAR), '')" for c in columns)
+
+    def _row_hash(self, expressions: List[str], hash_function: str) -> str:
+        """
+        Builds a NULL-safe row hash over the given expressions.
+
+        Args:
+            expressions: Column expressions in mapping order.
+            hash_function: SQL function hashing a text value to an integer.
+
+        Returns:
+            SQL expression.
+        """
+        values = " || '|' || ".join(f"COALESCE(CAST({e} AS VARCHAR), '\\N')" for e in expressions)
+        return f"{hash_function}({values})"
+
+    def generate_rollback_sql(self, mapping: MigrationMapping, run_id: Optional[str] = None) -> str:
         """
         Generates SQL to rollback the target tables (e.g., delete loaded rows).
 
+        With a run ID only the rows tagged by that run are deleted, through
+        the index on RUN_ID_COLUMN, leaving rows that existed before the
+        migration alone. Without one every target table is emptied.
+
         Args:
             mapping: MigrationMapping object.
+            run_id: Run to roll back; defaults to the generator's run ID.
 
         Returns:
             SQL string for rollback.
         """
-        rollback = []
-        for t in mapping.table_mappings:
-            rollback.append(f"DELETE FROM {t.target_table};")
+        rollback = list(self.iter_rollback_sql(mapping, run_id))
+        self.metrics.count("rollback_statements", len(rollback))
         return "\n".join(rollback)
+
+    def iter_rollback_sql(self, mapping: MigrationMapping, run_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Yields the statements of generate_rollback_sql one at a time.
+
+        Args:
+            mapping: MigrationMapping object.
+            run_id: Run to roll back; defaults to the generator's run ID.
+
+        Returns:
+            Iterator of SQL statements.
+        """
+        run_id = run_id or self.run_id
+        for t in mapping.table_mappings:
+            table = self.dialect.quote(t.target_table)
+            if run_id is None:
+                yield f"DELETE FROM {table};"
+            else:
+                yield (f"DELETE FROM {table} WHERE {self.dialect.quote(RUN_ID_COLUMN)} = "
+                       f"{self.dialect.literal(run_id)};")
+
+
+def balanced_boundaries(sample: List, partitions: int) -> List:
+    """
+    Picks range partition boundaries at the quantiles of a key sample, so
+    each partition holds about the same number of rows however the keys
+    are distributed.
+
+    Args:
+        sample: Sampled key values.
+        partitions: Wanted number of partitions.
+
+    Returns:
+        Sorted, distinct upper bounds of all but the last partition; fewer
+        than partitions - 1 when the sample has too few distinct keys.
+    """
+    keys = sorted(k for k in sample if k is not None)
+    boundaries = []
+    for i in range(1, partitions):
+        if not keys:
+            break
+        key = keys[max(0, len(keys) * i // partitions - 1)]
+        if key != keys[-1] and (not boundaries or key != boundaries[-1]):
+            boundaries.append(key)
+    return boundaries
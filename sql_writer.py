@@ -0,0 +1,294 @@
+"""
+sql_writer.py
+
+Streams generated SQL statements to disk through a buffered writer that can
+split the output into numbered files, by size or per table, and gzip them on
+the fly, so memory stays flat however large a script gets.
+"""
+
+import glob
+import gzip
+import io
+import os
+import re
+import shutil
+from typing import Dict, IO, List, Optional, Tuple
+from run_manifest import SECTION_MARKER, read_sections
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class SQLArtifactWriter:
+    """
+    Writes one SQL artifact (e.g. migration.sql) statement by statement.
+
+    Without splitting the artifact is a single ``<name>`` file. With
+    split_bytes or split_by_table it becomes ``<stem>.0001.sql``,
+    ``<stem>.0002.sql``, ... Files only ever break between statements, and a
+    table section continued in a new file repeats its marker line. With
+    compress, every file gets a ``.gz`` suffix.
+
+    Attributes:
+        paths: Files written so far, in order.
+        statements: Number of statements written.
+        bytes_written: Uncompressed characters written.
+    """
+
+    def __init__(self, directory: str, name: str, split_bytes: Optional[int] = None,
+                 split_by_table: bool = False, compress: bool = False,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Args:
+            directory: Output directory, created if needed.
+            name: Artifact file name, e.g. "migration.sql".
+            split_bytes: Start a new file once this many uncompressed
+                characters have been written to the current one.
+            split_by_table: Start a new file for every table section.
+            compress: gzip every file.
+            buffer_size: Write buffer size in bytes.
+        """
+        self.directory = directory
+        self.name = name
+        self.split_bytes = split_bytes
+        self.split_by_table = split_by_table
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.paths: List[str] = []
+        self.statements = 0
+        self.bytes_written = 0
+        self._file: Optional[IO[str]] = None
+        self._file_bytes = 0
+        self._section: Optional[str] = None
+        os.makedirs(directory, exist_ok=True)
+        for path in artifact_paths(directory, name):
+            os.remove(path)
+
+    def begin_table(self, key: str):
+        """
+        Starts the section of one table mapping.
+
+        Args:
+            key: Section key, e.g. "users->customers".
+        """
+        marker = f"{SECTION_MARKER}{key}\n"
+        if self._file_bytes and (self.split_by_table or
+                                 (self.split_bytes and self._file_bytes + len(marker) > self.split_bytes)):
+            self._rotate()
+        self._section = key
+        self._emit(marker)
+
+    def write(self, statement: str):
+        """
+        Writes one statement (or comment line) followed by a newline.
+
+        Args:
+            statement: SQL text.
+        """
+        text = statement + "\n"
+        if self.split_bytes and self._file_bytes and self._file_bytes + len(text) > self.split_bytes:
+            self._rotate()
+            if self._section is not None:
+                self._emit(f"{SECTION_MARKER}{self._section}\n")
+        self._emit(text)
+        self.statements += 1
+
+    def write_text(self, text: str):
+        """
+        Writes previously generated text, e.g. a reused table section, line by line.
+
+        Args:
+            text: Newline-separated statements.
+        """
+        if text:
+            for line in text.split("\n"):
+                self.write(line)
+
+    def close(self) -> List[str]:
+        """
+        Flushes and closes the current file.
+
+        Returns:
+            Paths of all files written.
+        """
+        if self._file is None and not self.paths:
+            self._open()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _emit(self, text: str):
+        if self._file is None:
+            self._open()
+        self._file.write(text)
+        self._file_bytes += len(text)
+        self.bytes_written += len(text)
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+
+    def _open(self):
+        if self.split_bytes or self.split_by_table:
+            stem, ext = os.path.splitext(self.name)
+            file_name = f"{stem}.{len(self.paths) + 1:04d}{ext}"
+        else:
+            file_name = self.name
+        path = os.path.join(self.directory, file_name + (".gz" if self.compress else ""))
+        if self.compress:
+            raw = gzip.open(path, "wb", compresslevel=6)
+            self._file = io.TextIOWrapper(io.BufferedWriter(raw, self.buffer_size), encoding="utf-8", newline="\n")
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="\n", buffering=self.buffer_size)
+        self.paths.append(path)
+        self._file_bytes = 0
+
+
+def artifact_paths(directory: str, name: str) -> List[str]:
+    """
+    Lists the existing files of an artifact in write order: the plain file,
+    its gzip variant and any numbered parts.
+
+    Args:
+        directory: Output directory.
+        name: Artifact file name, e.g. "migration.sql".
+
+    Returns:
+        List of file paths.
+    """
+    stem, ext = os.path.splitext(name)
+    part = re.compile(re.escape(stem) + r"\.\d{4}" + re.escape(ext) + r"(?:\.gz)?$")
+    paths = [os.path.join(directory, n) for n in (name, name + ".gz") if os.path.exists(os.path.join(directory, n))]
+    numbered = [p for p in glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(stem)}.*"))
+                if part.match(os.path.basename(p))]
+    return paths + sorted(numbered)
+
+
+def read_artifact_sections(directory: str, name: str) -> Dict[str, str]:
+    """
+    Reads the per-table sections of an artifact across all of its files.
+
+    Args:
+        directory: Output directory.
+        name: Artifact file name, e.g. "migration.sql".
+
+    Returns:
+        Dict of section key -> SQL text.
+    """
+    sections: Dict[str, str] = {}
+    for path in artifact_paths(directory, name):
+        for key, text in read_sections(path).items():
+            sections[key] = "\n".join(part for part in (sections.get(key), text) if part)
+    return sections
+
+
+class ArtifactSections:
+    """
+    Byte-offset index of the per-table sections of an existing artifact,
+    copied section by section into a new writer of the same artifact.
+
+    The files of the artifact are moved into a hidden ``.<name>.previous``
+    directory first, so the new writer can replace them while unchanged
+    sections are still read from the old ones. Only the offsets are held in
+    memory; section text is streamed line by line. Use as a context manager;
+    closing deletes the moved files.
+    """
+
+    def __init__(self, directory: str, name: str):
+        """
+        Args:
+            directory: Output directory.
+            name: Artifact file name, e.g. "migration.sql".
+        """
+        self._directory = os.path.join(directory, f".{name}.previous")
+        shutil.rmtree(self._directory, ignore_errors=True)
+        paths = artifact_paths(directory, name)
+        self.paths: List[str] = []
+        if paths:
+            os.makedirs(self._directory)
+        for path in paths:
+            moved = os.path.join(self._directory, os.path.basename(path))
+            os.replace(path, moved)
+            self.paths.append(moved)
+        self._spans: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._file: Optional[IO[bytes]] = None
+        self._file_index = -1
+        marker = SECTION_MARKER.encode("utf-8")
+        for index, path in enumerate(self.paths):
+            with self._open(path) as f:
+                key, start, position = None, 0, 0
+                for line in f:
+                    if line.startswith(marker):
+                        if key is not None:
+                            self._spans[key].append((index, start, position))
+                        key = line[len(marker):].rstrip(b"\n").decode("utf-8")
+                        self._spans.setdefault(key, [])
+                        start = position + len(line)
+                    position += len(line)
+                if key is not None:
+                    self._spans[key].append((index, start, position))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._spans
+
+    def copy_to(self, writer: SQLArtifactWriter, key: str) -> bool:
+        """
+        Writes the lines of one section of the old artifact to a writer.
+
+        Args:
+            writer: Writer of the new artifact, positioned after begin_table(key).
+            key: Section key.
+
+        Returns:
+            False when the old artifact has no such section.
+        """
+        spans = self._spans.get(key)
+        if spans is None:
+            return False
+        lines = []
+        for index, start, end in spans:
+            if index != self._file_index:
+                self._close_file()
+                self._file = self._open(self.paths[index])
+                self._file_index = index
+            self._file.seek(start)
+            position = start
+            while position < end:
+                line = self._file.readline()
+                position += len(line)
+                lines.append(line.decode("utf-8").rstrip("\n"))
+                if lines[-1]:
+                    for text in lines:
+                        writer.write(text)
+                    lines = []
+        return True
+
+    def close(self):
+        """
+        Closes and deletes the moved files of the old artifact.
+        """
+        self._close_file()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _open(self, path: str) -> IO[bytes]:
+        return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_index = -1
@@ -0,0 +1,104 @@
+"""
+Local HTTP server standing in for the GenAI model endpoint in tests.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from prompt_codec import decode_mapping_prompt, encode_mapping_response
+
+
+class FakeModelServer:
+    """
+    Answers mapping prompts by mapping every source table to the first
+    candidate target table, field by field. Compact prompts get compact
+    responses.
+
+    Attributes:
+        prompts: Decoded prompts received, in arrival order.
+        raw_prompts: Prompt strings received, in arrival order.
+        failures: Number of upcoming requests answered with HTTP 503.
+        delay: Seconds each request takes.
+        peak_concurrency: Highest number of requests served at once.
+    """
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.prompts = []
+        self.raw_prompts = []
+        self.failures = failures
+        self.delay = delay
+        self.peak_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/map"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, prompt: dict) -> dict:
+        """
+        Builds the mapping response for one decoded prompt.
+        """
+        targets = prompt["target"]
+        table_mappings = []
+        for table in prompt["source"]:
+            if not targets:
+                continue
+            target = targets[0]
+            table_mappings.append({
+                "source_table": table["table_name"],
+                "target_table": target["table_name"],
+                "field_mappings": [{"source_field": f["name"], "target_field": f["name"]} for f in table["fields"]],
+            })
+        return {"source_system": "S", "target_system": "T", "confidence_score": 0.8,
+                "notes": "fake", "table_mappings": table_mappings}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    fail = server.failures > 0
+                    server.failures -= 1 if fail else 0
+                    server._active += 1
+                    server.peak_concurrency = max(server.peak_concurrency, server._active)
+                try:
+                    time.sleep(server.delay)
+                    if fail:
+                        self.send_response(503)
+                        self.end_headers()
+                        return
+                    compact = not body["prompt"].lstrip().startswith("{")
+                    prompt = decode_mapping_prompt(body["prompt"]) if compact else json.loads(body["prompt"])
+                    with server._lock:
+                        server.prompts.append(prompt)
+                        server.raw_prompts.append(body["prompt"])
+                    response = server.respond(prompt)
+                    payload = (encode_mapping_response(response) if compact else json.dumps(response)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with server._lock:
+                        server._active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
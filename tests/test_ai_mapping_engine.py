@@ -0,0 +1,52 @@
+"""
+Unit tests for partitioned, concurrent requests in GenAIMappingEngine.
+"""
+
+from ai_mapping_engine import GenAIMappingEngine
+from tests.fake_model_server import FakeModelServer
+from models import SchemaField, TableSchema
+
+
+def _table(name, *fields, relationships=None):
+    return TableSchema(name, [SchemaField(f, "INT") for f in fields], relationships or {})
+
+
+SOURCE = [
+    _table("customers", "id", "name"),
+    _table("orders", "id", "customer_id", relationships={"customer_id": "customers(id)"}),
+    _table("products", "sku", "title"),
+    _table("invoices", "id", "total"),
+]
+TARGET = [
+    _table("customer_master", "cust_id", "name"),
+    _table("sales_orders", "order_id", "cust_id"),
+    _table("product_catalog", "sku", "title"),
+    _table("billing_invoices", "invoice_id", "total"),
+]
+
+
+def test_partitions_follow_foreign_key_clusters():
+    engine = GenAIMappingEngine(partition_size=2)
+    partitions = engine._partition_source_tables(SOURCE)
+    assert [[t.table_name for t in p] for p in partitions] == [["customers", "orders"], ["products", "invoices"]]
+
+
+def test_partitioned_requests_run_concurrently_and_merge():
+    with FakeModelServer(delay=0.2) as server:
+        engine = GenAIMappingEngine(endpoint=server.url, partition_size=1, candidate_targets=1, max_concurrency=4)
+        mapping = engine.generate_mappings(SOURCE, TARGET, "ctx")
+    assert server.peak_concurrency > 1
+    assert all(len(p["source"]) == 1 and len(p["target"]) == 1 for p in server.prompts)
+    pairs = {(t.source_table, t.target_table) for t in mapping.table_mappings}
+    assert ("products", "product_catalog") in pairs
+    assert ("invoices", "billing_invoices") in pairs
+    assert len(mapping.table_mappings) == 4
+
+
+def test_failed_requests_are_retried():
+    with FakeModelServer(failures=2) as server:
+        engine = GenAIMappingEngine(endpoint=server.url, partition_size=2, max_concurrency=1,
+                                    backoff_seconds=0.01, requests_per_second=100)
+        mapping = engine.generate_mappings(SOURCE, TARGET, "ctx")
+    assert len(server.prompts) == 2
+    assert mapping.confidence_score == 0.8
@@ -0,0 +1,73 @@
+"""
+Unit tests for manifest-driven batch runs.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+from batch_runner import _worker, load_manifest, run_batch
+
+
+def _write_manifest(tmp_path, jobs, name="batch.json", **extra):
+    (tmp_path / "target.sql").write_text("CREATE TABLE customers (id INT PRIMARY KEY, name VARCHAR(50));")
+    for job in jobs:
+        if job.get("source", "").startswith("app"):
+            (tmp_path / job["source"]).write_text("CREATE TABLE clients (id INT PRIMARY KEY, name VARCHAR(50));")
+    manifest = dict(defaults={"target": "target.sql", "context": "Divestiture"}, jobs=jobs, **extra)
+    path = tmp_path / name
+    path.write_text(json.dumps(manifest))
+    return str(path)
+
+
+def test_load_manifest_resolves_paths_and_merges_options(tmp_path):
+    path = _write_manifest(tmp_path, [{"source": "app1.sql", "compress": False}, {"source": "app2.sql", "name": "two"}])
+    jobs, settings = load_manifest(path, {"compress": True, "dialect": None})
+    assert [j.name for j in jobs] == ["app1", "two"]
+    assert jobs[0].target_file == str(tmp_path / "target.sql") and jobs[1].output_dir == str(tmp_path / "two")
+    assert jobs[0].options == {"compress": False} and jobs[1].options == {"compress": True}
+    assert settings["summary"] == str(tmp_path / "batch_summary.json")
+
+    with pytest.raises(ValueError, match="unknown key"):
+        load_manifest(_write_manifest(tmp_path, [{"source": "app1.sql", "ouput": "x"}]))
+    with pytest.raises(ValueError, match="share"):
+        load_manifest(_write_manifest(tmp_path, [{"source": "app1.sql", "output": "o"}, {"source": "app2.sql", "output": "o"}]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_isolates_failures_and_writes_summary(tmp_path, workers):
+    path = _write_manifest(tmp_path, [{"source": "app1.sql"}, {"source": "missing.sql"}, {"source": "app2.sql"}])
+    jobs, settings = load_manifest(path)
+    summary = run_batch(jobs, workers=workers, cache_dir=settings["cache_dir"], summary_file=settings["summary"])
+    assert [r["status"] for r in summary["results"]] == ["ok", "failed", "ok"]
+    assert summary["succeeded"] == 2 and summary["workers"] == workers
+    assert "missing.sql" in summary["results"][1]["error"]
+    assert (tmp_path / "app2" / "migration.sql").exists()
+    assert json.loads((tmp_path / "batch_summary.json").read_text())["failed"] == 1
+    assert not _worker
+
+
+def test_jobs_of_one_worker_share_parsed_schemas_and_mappings(tmp_path, monkeypatch):
+    import orchestrator
+    parsed = []
+    original = orchestrator.MigrationOrchestrator._parse_input_file
+    monkeypatch.setattr(orchestrator.MigrationOrchestrator, "_parse_input_file",
+                        lambda self, path: parsed.append(path) or original(self, path))
+    path = _write_manifest(tmp_path, [{"source": "app1.sql"}, {"source": "app2.sql"}, {"source": "app3.sql"}])
+    summary = run_batch(load_manifest(path)[0], workers=1)
+    assert summary["succeeded"] == 3
+    # The target and the identical source schemas are parsed once.
+    assert len(parsed) == 2
+
+
+@pytest.mark.parametrize("args, error", [
+    (["--batch"], "Error: --batch needs a manifest file"),
+    (["--batch", "a.json", "b.json"], "Error: --batch takes a single manifest file, got extra arguments: b.json"),
+    (["--workers=0", "--batch", "a.json"], "Error: --workers must be a positive whole number, got '0'"),
+])
+def test_batch_usage_errors_exit_non_zero(args, error):
+    main = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    completed = subprocess.run([sys.executable, main] + args, capture_output=True, text=True)
+    assert completed.returncode == 1
+    assert completed.stderr.strip() == error and "--batch <manifest_file>" in completed.stdout
@@ -0,0 +1,36 @@
+"""
+Unit tests for the synthetic workload generator and benchmark comparison.
+"""
+
+import json
+from benchmarks.run_benchmarks import compare
+from benchmarks.synthetic import WorkloadSpec, generate_schema, write_workload
+from mapping_io import load_mapping
+from schema_parser import SchemaAnalyzer
+
+
+def test_synthetic_workload_round_trips_through_the_parsers(tmp_path):
+    spec = WorkloadSpec(tables=20, columns=6, foreign_keys=2, csv_rows=50)
+    paths = write_workload(str(tmp_path), spec)
+    parser = SchemaAnalyzer()
+    expected = generate_schema(spec, "src")
+    assert parser.parse_sql_file(paths["source_sql"]) == expected
+    assert parser.parse_json_schema(open(paths["source_json"]).read()) == expected
+    assert parser.parse_json_file(paths["source_json"], chunk_size=97) == expected
+    assert parser.parse_json_file(paths["source_json"], use_mmap=True) == expected
+    assert expected[5].relationships and all(v.endswith("(id)") for v in expected[5].relationships.values())
+    csv_table = parser.parse_csv_file(paths["source_csv"])
+    assert [f.name for f in csv_table.fields] == [f.name for f in expected[0].fields]
+    mapping = load_mapping(paths["mapping"])
+    assert [t.target_table for t in mapping.table_mappings] == [f"tgt_table_{i}" for i in range(20)]
+
+
+def test_compare_flags_slower_and_larger_runs_only():
+    def doc(seconds, peak):
+        return {"results": {"small": {"parse": {"seconds": seconds, "peak_bytes": peak},
+                                      "tiny": {"seconds": seconds / 1000, "peak_bytes": 0}}}}
+
+    baseline = json.loads(json.dumps(doc(1.0, 1000)))
+    assert compare(doc(1.1, 1100), baseline) == []
+    assert compare(doc(1.5, 1000), baseline) == ["small/parse: 1.0000s -> 1.5000s"]
+    assert compare(doc(1.0, 2000), baseline) == ["small/parse: peak 1000 -> 2000 bytes"]
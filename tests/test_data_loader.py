@@ -0,0 +1,95 @@
+"""
+Unit tests for the resumable in-process data loader.
+"""
+
+import io
+import sqlite3
+import pytest
+from data_loader import CHECKPOINT_TABLE, ConsoleProgress, DataLoader
+from migration_executor import SQLiteConnectionFactory
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+from sql_generator import SQLGenerator
+
+ROWS = 2500
+
+
+class _Crash(Exception):
+    pass
+
+
+def _crash_after(batches):
+    def progress(p):
+        if p.batches == batches and not p.done:
+            raise _Crash("simulated crash")
+    return progress
+
+
+@pytest.fixture
+def databases(tmp_path):
+    source_db, target_db = str(tmp_path / "source.db"), str(tmp_path / "target.db")
+    with sqlite3.connect(source_db) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE events (user_id INTEGER, kind TEXT)")
+        conn.executemany("INSERT INTO users VALUES (?, ?)", [(i, f"u{i}") for i in range(ROWS)])
+        conn.executemany("INSERT INTO events VALUES (?, ?)", [(i % 7, "login") for i in range(ROWS)])
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE activity (customer_id INTEGER, kind TEXT)")
+    mapping = MigrationMapping("a", "b", 1.0, [
+        TableMapping("users", "customers", [FieldMapping("id", "customer_id"), FieldMapping("name", "name", "UPPER(name)")]),
+        TableMapping("events", "activity", [FieldMapping("user_id", "customer_id"), FieldMapping("kind", "kind")]),
+    ])
+    schema = [
+        TableSchema("users", [SchemaField("id", "INTEGER", False, True), SchemaField("name", "TEXT")]),
+        TableSchema("events", [SchemaField("user_id", "INTEGER"), SchemaField("kind", "TEXT")], {"user_id": "users(id)"}),
+    ]
+    return SQLiteConnectionFactory(source_db), SQLiteConnectionFactory(target_db), target_db, mapping, schema
+
+
+def test_keyed_load_resumes_after_last_committed_batch(databases):
+    source, target, target_db, mapping, schema = databases
+    crashed = DataLoader(source, target, batch_size=1000, progress=_crash_after(2)).load(mapping, schema)
+    assert crashed[0].status == "failed" and crashed[1].status == "skipped"
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM customers").fetchone() == (2000,)
+        assert conn.execute(f"SELECT rows_loaded, completed FROM {CHECKPOINT_TABLE}").fetchone() == (2000, 0)
+
+    results = DataLoader(source, target, batch_size=1000).load(mapping, schema)
+    assert [(r.status, r.rows) for r in results] == [("completed", ROWS - 2000), ("completed", ROWS)]
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*), MAX(name) FROM customers").fetchone() == (ROWS, "U999")
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert [r.rows for r in DataLoader(source, target).load(mapping, schema)] == [0, 0]
+
+
+def test_keyless_table_restart_only_deletes_the_rows_of_its_run(databases):
+    source, target, target_db, mapping, schema = databases
+    DataLoader(source, target, batch_size=1000).load(MigrationMapping("a", "b", 1.0, mapping.table_mappings[:1]), schema)
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("INSERT INTO activity VALUES (-1, 'existing')")
+    generator = SQLGenerator(run_id="run-1")
+    loader = DataLoader(source, target, batch_size=1000, sql_generator=generator, progress=_crash_after(2))
+    assert loader.load(mapping, schema)[1].status == "failed"
+
+    stream = io.StringIO()
+    results = DataLoader(source, target, batch_size=1000, count_rows=True, sql_generator=generator,
+                         progress=ConsoleProgress(stream, interval=0)).load(mapping, schema)
+    assert results[1].rows == ROWS and results[1].batches == 3
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM activity").fetchone() == (ROWS + 1,)
+        assert conn.execute("SELECT kind FROM activity WHERE migration_run_id IS NULL").fetchall() == [("existing",)]
+    assert "events -> activity: 2,500 rows (100.0%)" in stream.getvalue()
+
+
+def test_keyless_table_without_run_id_refuses_to_restart(databases):
+    source, target, target_db, mapping, schema = databases
+    mapping = MigrationMapping("a", "b", 1.0, mapping.table_mappings[1:])
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("INSERT INTO activity VALUES (-1, 'existing')")
+    assert DataLoader(source, target, batch_size=1000, progress=_crash_after(2)).load(mapping, schema)[0].status \
+        == "failed"
+
+    result = DataLoader(source, target, batch_size=1000).load(mapping, schema)[0]
+    assert result.status == "failed" and "carry no run ID" in result.error
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM activity").fetchone() == (2001,)
@@ -0,0 +1,52 @@
+"""
+Unit tests for the incremental SQL statement splitter.
+"""
+
+import io
+from ddl_reader import SQLStatementSplitter, iter_sql_statements, split_top_level, unquote_identifier
+
+DUMP = """
+-- header comment; with a semicolon
+CREATE FUNCTION touch() RETURNS trigger AS $body$
+BEGIN
+    NEW.note := 'a;b';
+    RETURN NEW;
+END;
+$body$ LANGUAGE plpgsql;
+/* block; comment /* nested; */ still comment; */
+CREATE TABLE "Order Items" (
+    "id" integer NOT NULL,
+    note text DEFAULT 'it''s; fine',
+    price$usd numeric(10, 2)
+);
+INSERT INTO t VALUES ($1)
+"""
+
+
+def test_statements_ignore_semicolons_in_strings_comments_and_bodies():
+    statements = list(iter_sql_statements(io.StringIO(DUMP)))
+    assert len(statements) == 3
+    assert statements[0].startswith("CREATE FUNCTION")
+    assert statements[0].rstrip().endswith("LANGUAGE plpgsql")
+    assert statements[1].startswith('CREATE TABLE "Order Items"')
+    assert "it''s; fine" in statements[1]
+    assert statements[2] == "INSERT INTO t VALUES ($1)"
+
+
+def test_chunk_boundaries_do_not_change_result():
+    expected = list(iter_sql_statements(io.StringIO(DUMP)))
+    for chunk_size in (1, 2, 3, 7):
+        assert list(iter_sql_statements(io.StringIO(DUMP), chunk_size=chunk_size)) == expected
+
+
+def test_split_top_level_and_unquote():
+    assert split_top_level("a int, b numeric(10, 2), c text DEFAULT 'x,y'") == [
+        "a int", "b numeric(10, 2)", "c text DEFAULT 'x,y'"
+    ]
+    assert unquote_identifier('"public"."Order ""Items"""') == 'public.Order "Items"'
+
+
+def test_unterminated_statement_is_flushed_on_close():
+    splitter = SQLStatementSplitter()
+    assert list(splitter.feed("CREATE TABLE a (id int)")) == []
+    assert list(splitter.close()) == ["CREATE TABLE a (id int)"]
@@ -0,0 +1,50 @@
+"""
+Unit tests for run metrics collection.
+"""
+
+import json
+from instrumentation import NULL_METRICS, RunMetrics
+from orchestrator import MigrationOrchestrator
+
+
+def test_spans_nest_and_aggregate_repeated_calls():
+    metrics = RunMetrics(trace_memory=True)
+    try:
+        with metrics.span("outer"):
+            for _ in range(3):
+                with metrics.span("inner"):
+                    data = [0] * 100000
+            metrics.count("rows", 2)
+            metrics.count("rows", 3)
+            metrics.observe("latency", 0.5)
+            metrics.observe("latency", 1.5)
+    finally:
+        metrics.stop()
+    result = metrics.to_dict()
+    outer = result["spans"][0]
+    inner = outer["children"][0]
+    assert (outer["name"], outer["calls"], inner["name"], inner["calls"]) == ("outer", 1, "inner", 3)
+    assert inner["peak_bytes"] >= 800000 and outer["peak_bytes"] >= inner["peak_bytes"]
+    assert result["counters"] == {"rows": 5}
+    assert result["observations"]["latency"] == {"count": 2, "total": 2.0, "min": 0.5, "max": 1.5, "mean": 1.0}
+    with NULL_METRICS.span("ignored"):
+        NULL_METRICS.count("ignored")
+    assert not NULL_METRICS.enabled
+
+
+def test_orchestrator_writes_run_metrics_only_when_enabled(tmp_path):
+    (tmp_path / "source.sql").write_text("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(100));")
+    (tmp_path / "target.sql").write_text("CREATE TABLE customers (cust_id INT, full_name VARCHAR(100));")
+    args = (str(tmp_path / "source.sql"), str(tmp_path / "target.sql"), "CRM")
+
+    MigrationOrchestrator().execute_migration_workflow(*args, str(tmp_path / "plain"))
+    assert not (tmp_path / "plain" / "run_metrics.json").exists()
+
+    MigrationOrchestrator(metrics=RunMetrics()).execute_migration_workflow(*args, str(tmp_path / "out"))
+    metrics = json.loads((tmp_path / "out" / "run_metrics.json").read_text())
+    stages = [s["name"] for s in metrics["spans"][0]["children"]]
+    assert stages[:3] == ["parse_source", "parse_target", "mapping"]
+    assert metrics["counters"]["source_fields"] == 2
+    assert metrics["counters"]["model_requests"] == 1
+    assert metrics["counters"]["prompt_bytes"] > 0
+    assert metrics["observations"]["model_latency_seconds"]["count"] == 1
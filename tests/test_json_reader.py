@@ -0,0 +1,51 @@
+"""
+Unit tests for the incremental JSON array reader.
+"""
+
+import io
+import json
+import pytest
+from json_reader import JSONArrayReader, iter_json_array, iter_json_file
+from schema_parser import SchemaAnalyzer
+
+ENTRIES = [
+    {"table_name": "orders", "fields": [{"name": "id", "datatype": "INT", "primary_key": True}]},
+    {"table_name": "odd [names], \"quoted\" {x}", "fields": [{"name": "back\\slash\\", "datatype": "TEXT"}]},
+    {"table_name": "ünïcödé ✓", "fields": [], "relationships": {"id": "orders(id)"}},
+    [1, 2.5, None, "]"],
+    "plain string",
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 4096])
+def test_elements_survive_any_chunk_boundary(chunk_size):
+    document = json.dumps(ENTRIES, indent=2, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(io.BytesIO(document), chunk_size)) == ENTRIES
+    assert list(iter_json_array(io.StringIO(document.decode("utf-8")), chunk_size)) == ENTRIES
+
+
+def test_file_reader_with_and_without_mmap(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(ENTRIES[:3]), encoding="utf-8")
+    for use_mmap in (False, True):
+        tables = SchemaAnalyzer().parse_json_file(str(path), chunk_size=5, use_mmap=use_mmap)
+        assert [t.table_name for t in tables] == [e["table_name"] for e in ENTRIES[:3]]
+        assert tables[1].fields[0].name == "back\\slash\\" and tables[2].relationships == {"id": "orders(id)"}
+
+    path.write_text(json.dumps(ENTRIES[0]))
+    assert list(iter_json_file(str(path), use_mmap=True)) == [ENTRIES[0]]
+    path.write_text("[]")
+    assert list(iter_json_file(str(path))) == []
+
+
+def test_reader_keeps_only_the_current_element_and_rejects_bad_documents():
+    reader = JSONArrayReader()
+    assert list(reader.feed("[")) == []
+    for i in range(1000):
+        assert list(reader.feed(json.dumps({"table_name": f"t{i}"}) + ",")) == [{"table_name": f"t{i}"}]
+        assert len(reader._pending) < 40
+    assert list(reader.feed("1")) == [] and list(reader.feed("2]")) == [12]
+    assert list(reader.close()) == []
+    for bad in (b'[{"a": 1}', b'{"a": "b', b"42", b"", b"[1 2]", b"[1,]", b"[1] x"):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.BytesIO(bad)))
@@ -0,0 +1,88 @@
+"""
+Unit tests for the MappingCache and its use by GenAIMappingEngine.
+"""
+
+import json
+import time
+from ai_mapping_engine import GenAIMappingEngine
+from mapping_cache import MappingCache, schema_fingerprint
+from models import SchemaField, TableSchema
+
+
+class CountingEngine(GenAIMappingEngine):
+    """
+    Engine whose simulated model maps every requested source table to ``<name>_new``.
+    """
+
+    def __init__(self, cache=None):
+        super().__init__(cache)
+        self.prompts = []
+
+    def _call_ai_for_mappings(self, prompt):
+        self.prompts.append(json.loads(prompt))
+        tables = self.prompts[-1]["source"]
+        return json.dumps({
+            "source_system": "S", "target_system": "T", "confidence_score": 0.9,
+            "table_mappings": [
+                {"source_table": t["table_name"], "target_table": t["table_name"] + "_new",
+                 "field_mappings": [{"source_field": f["name"], "target_field": f["name"]} for f in t["fields"]]}
+                for t in tables
+            ],
+        })
+
+
+def _schema(*names, extra=None):
+    return [TableSchema(n, [SchemaField("id", "INT", primary_key=True)] + ([extra] if extra and n == names[-1] else []))
+            for n in names]
+
+
+def test_fingerprint_ignores_order_and_type_case():
+    a = [TableSchema("t", [SchemaField("a", "varchar(10)"), SchemaField("b", "INT")]), TableSchema("u", [])]
+    b = [TableSchema("u", []), TableSchema("t", [SchemaField("b", "int"), SchemaField("a", "VARCHAR(10)")])]
+    assert schema_fingerprint(a) == schema_fingerprint(b)
+
+
+def test_identical_rerun_is_served_from_disk(tmp_path):
+    source, target = _schema("users", "orders"), _schema("users_new", "orders_new")
+    first = CountingEngine(MappingCache(str(tmp_path)))
+    mapping = first.generate_mappings(source, target, "ctx")
+    second = CountingEngine(MappingCache(str(tmp_path)))
+    again = second.generate_mappings(source, target, "  ctx ")
+    assert second.prompts == []
+    assert again == mapping
+    assert second.cache.stats()["disk_hits"] == 1
+
+
+def test_only_changed_tables_are_sent_to_model():
+    engine = CountingEngine(MappingCache())
+    target = _schema("users_new", "orders_new")
+    engine.generate_mappings(_schema("users", "orders"), target, "ctx")
+    mapping = engine.generate_mappings(_schema("users", "orders", extra=SchemaField("total", "DECIMAL")), target, "ctx")
+    assert [t["table_name"] for t in engine.prompts[-1]["source"]] == ["orders"]
+    assert [t.source_table for t in mapping.table_mappings] == ["users", "orders"]
+    assert [f.source_field for f in mapping.table_mappings[1].field_mappings] == ["id", "total"]
+
+
+def test_disk_tier_evicts_expired_and_oversized_entries(tmp_path):
+    cache = MappingCache(str(tmp_path), max_entries=1, max_disk_bytes=60, ttl_seconds=60)
+    cache.put("a", {"value": "x" * 20})
+    cache.put("b", {"value": "y" * 20})
+    cache.put("c", {"value": "z" * 20})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"value": "z" * 20}
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("c") is None
+
+
+def test_disk_tier_is_only_scanned_when_over_its_limit(tmp_path, monkeypatch):
+    import os
+    scans = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: scans.append(path) or listdir(path))
+    cache = MappingCache(str(tmp_path), max_disk_bytes=600)
+    for i in range(100):
+        cache.put(f"key{i:03d}", {"value": i})
+    assert 1 < len(scans) < 20
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json")) <= 600
+    assert cache.get("key099") == {"value": 99}
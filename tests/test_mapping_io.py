@@ -0,0 +1,61 @@
+"""
+Unit tests for mapping serialization.
+"""
+
+import io
+import json
+import sys
+import pytest
+from mapping_io import load_mapping, read_mapping_binary, save_mapping, write_mapping_binary, write_mapping_json
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping
+from orchestrator import MigrationOrchestrator
+
+
+def _mapping(tables=3):
+    return MigrationMapping("CRM_v1", "CRM_v2", 0.875, [
+        TableMapping(f"src_{i}", f"tgt_{i}", [FieldMapping("id", "id"), FieldMapping("name", "full_name", "TRIM(name)")],
+                     strategy="incremental" if i % 2 else None, complexity="low")
+        for i in range(tables)
+    ], notes="unicode ✓ and \"quotes\"")
+
+
+def test_json_stream_round_trip(tmp_path):
+    buffer = io.StringIO()
+    write_mapping_json(_mapping(), buffer)
+    assert json.loads(buffer.getvalue())["table_mappings"][1]["strategy"] == "incremental"
+    path = str(tmp_path / "mapping.json")
+    save_mapping(_mapping(), path)
+    assert load_mapping(path) == _mapping()
+    empty = MigrationMapping("a", "b", None, [])
+    save_mapping(empty, path)
+    assert load_mapping(path) == empty
+
+
+def test_binary_round_trip_is_lossless_and_compact(tmp_path):
+    mapping = _mapping(200)
+    buffer = io.BytesIO()
+    write_mapping_binary(mapping, buffer)
+    assert read_mapping_binary(io.BytesIO(buffer.getvalue())) == mapping
+    text = io.StringIO()
+    write_mapping_json(mapping, text)
+    assert len(buffer.getvalue()) < len(text.getvalue()) / 5
+    path = str(tmp_path / "mapping.mmap")
+    save_mapping(MigrationMapping("a", "b", None, []), path)
+    assert load_mapping(path) == MigrationMapping("a", "b", None, [])
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="slotted dataclasses need Python 3.10")
+def test_models_are_slotted_and_interned():
+    first = SchemaField("customer_" + "id", "VARCHAR")
+    second = SchemaField("".join(["customer", "_id"]), "VARCHAR")
+    assert not hasattr(first, "__dict__")
+    assert first.name is second.name
+
+
+def test_sql_regenerated_from_saved_mapping(tmp_path):
+    save_mapping(_mapping(), str(tmp_path / "saved.json"))
+    out = tmp_path / "out"
+    mapping = MigrationOrchestrator().execute_from_saved_mapping(str(tmp_path / "saved.json"), str(out))
+    assert mapping == _mapping()
+    assert "INSERT INTO" in (out / "migration.sql").read_text()
+    assert load_mapping(str(out / "migration_mapping.json")) == _mapping()
@@ -0,0 +1,173 @@
+"""
+Unit tests for the dependency-aware MigrationExecutor.
+"""
+
+import sqlite3
+import pytest
+from migration_executor import MigrationExecutor, SQLiteConnectionFactory, build_dependency_graph, dependency_levels
+from models import MigrationMapping, TableMapping, FieldMapping
+from schema_parser import SchemaAnalyzer
+from sql_generator import SQLGenerator
+
+SOURCE_DDL = """
+CREATE TABLE customers_old (id INT PRIMARY KEY, name VARCHAR(50));
+CREATE TABLE orders_old (id INT PRIMARY KEY, customer_id INT REFERENCES customers_old(id));
+CREATE TABLE lines_old (
+    id INT,
+    order_id INT,
+    PRIMARY KEY (id),
+    CONSTRAINT fk_order FOREIGN KEY (order_id) REFERENCES orders_old (id)
+);
+"""
+
+TARGET_DDL = """
+CREATE TABLE customers (cust_id INT PRIMARY KEY, full_name VARCHAR(50));
+CREATE TABLE orders (order_id INT PRIMARY KEY, cust_id INT REFERENCES customers(cust_id));
+CREATE TABLE lines (line_id INT PRIMARY KEY, order_id INT REFERENCES orders(order_id));
+"""
+
+
+def _mapping():
+    return MigrationMapping("src", "tgt", 1.0, [
+        TableMapping("lines_old", "lines", [FieldMapping("id", "line_id"), FieldMapping("order_id", "order_id")]),
+        TableMapping("orders_old", "orders", [FieldMapping("id", "order_id"), FieldMapping("customer_id", "cust_id")]),
+        TableMapping("customers_old", "customers", [FieldMapping("id", "cust_id"), FieldMapping("name", "full_name")]),
+    ])
+
+
+@pytest.fixture
+def databases(tmp_path):
+    source_db, target_db = str(tmp_path / "source.db"), str(tmp_path / "target.db")
+    with sqlite3.connect(source_db) as conn:
+        conn.executescript(SOURCE_DDL)
+        conn.executemany("INSERT INTO customers_old VALUES (?, ?)", [(i, f"c{i}") for i in range(50)])
+        conn.executemany("INSERT INTO orders_old VALUES (?, ?)", [(i, i % 50) for i in range(120)])
+        conn.executemany("INSERT INTO lines_old VALUES (?, ?)", [(i, i % 120) for i in range(300)])
+    with sqlite3.connect(target_db) as conn:
+        conn.executescript("PRAGMA foreign_keys = ON;" + TARGET_DDL)
+    return source_db, target_db
+
+
+def test_parser_keeps_foreign_keys():
+    tables = {t.table_name: t for t in SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)}
+    assert tables["orders_old"].relationships == {"customer_id": "customers_old(id)"}
+    assert tables["lines_old"].relationships == {"order_id": "orders_old(id)"}
+
+
+def test_dependency_levels_order_parents_first():
+    source = SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)
+    graph = build_dependency_graph(_mapping(), source)
+    assert dependency_levels(graph) == [["customers_old->customers"], ["orders_old->orders"], ["lines_old->lines"]]
+
+
+def test_executor_loads_sqlite_in_dependency_order(databases):
+    source_db, target_db = databases
+    analyzer = SchemaAnalyzer()
+    executor = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db), max_workers=3, batch_size=40)
+    results = executor.execute(_mapping(), analyzer.parse_sql_schema(SOURCE_DDL), analyzer.parse_sql_schema(TARGET_DDL))
+    assert [r.status for r in results] == ["completed"] * 3
+    assert {r.target_table: r.rows for r in results} == {"lines": 300, "orders": 120, "customers": 50}
+    assert results[0].batches == 8
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM lines").fetchone()[0] == 300
+
+
+def test_executor_skips_children_of_failed_table(databases):
+    source_db, target_db = databases
+    mapping = _mapping()
+    mapping.table_mappings[2].source_table = "missing_table"
+    results = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db)).execute(
+        mapping, target_schema=SchemaAnalyzer().parse_sql_schema(TARGET_DDL))
+    assert [r.status for r in results] == ["skipped", "skipped", "failed"]
+
+
+def test_mappings_into_the_same_target_table_are_all_loaded(databases):
+    source_db, target_db = databases
+    with sqlite3.connect(source_db) as conn:
+        conn.execute("CREATE TABLE prospects_old (id INT PRIMARY KEY, name VARCHAR(50))")
+        conn.executemany("INSERT INTO prospects_old VALUES (?, ?)", [(1000 + i, f"p{i}") for i in range(7)])
+    mapping = _mapping()
+    mapping.table_mappings.append(TableMapping("prospects_old", "customers",
+                                               [FieldMapping("id", "cust_id"), FieldMapping("name", "full_name")]))
+    source = SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)
+    results = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db), batch_size=40).execute(mapping, source)
+    assert [(r.source_table, r.rows) for r in results] == [
+        ("lines_old", 300), ("orders_old", 120), ("customers_old", 50), ("prospects_old", 7)]
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM customers").fetchone() == (57,)
+
+
+def test_incremental_load_only_copies_rows_past_watermark(tmp_path):
+    from watermark_store import WatermarkStore
+    db = str(tmp_path / "db.sqlite")
+    ddl = "CREATE TABLE src (id INT PRIMARY KEY, name TEXT, updated_at TEXT);"
+    with sqlite3.connect(db) as conn:
+        conn.execute(ddl)
+        conn.execute("CREATE TABLE dst (id INT PRIMARY KEY, name TEXT, updated_at TEXT)")
+        conn.executemany("INSERT INTO src VALUES (?, ?, ?)", [(i, f"n{i}", f"2024-01-{i:02d}") for i in range(1, 11)])
+    mapping = MigrationMapping("s", "t", 1.0, [TableMapping(
+        "src", "dst", [FieldMapping("id", "id"), FieldMapping("name", "name"), FieldMapping("updated_at", "updated_at")],
+        strategy="incremental")])
+    source = SchemaAnalyzer().parse_sql_schema(ddl)
+    store = WatermarkStore(str(tmp_path))
+    executor = MigrationExecutor(SQLiteConnectionFactory(db), watermarks=store)
+    assert executor.execute(mapping, source)[0].rows == 10
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE src SET name = 'changed', updated_at = '2024-02-01' WHERE id = 3")
+        conn.execute("INSERT INTO src VALUES (11, 'n11', '2024-02-02')")
+    result = MigrationExecutor(SQLiteConnectionFactory(db), watermarks=WatermarkStore(str(tmp_path))).execute(mapping, source)
+    assert result[0].rows == 2
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*), MAX(updated_at) FROM dst").fetchone() == (11, "2024-02-02")
+        assert conn.execute("SELECT name FROM dst WHERE id = 3").fetchone() == ("changed",)
+
+
+def test_rollback_only_deletes_rows_of_the_run(databases):
+    source_db, target_db = databases
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("INSERT INTO customers VALUES (1000, 'existing')")
+    source = SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)
+    executor = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db), batch_size=40,
+                                 sql_generator=SQLGenerator(run_id="run-1"))
+    assert all(r.status == "completed" for r in executor.execute(_mapping(), source))
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM customers WHERE migration_run_id = 'run-1'").fetchone() == (50,)
+        indexes = [row[1] for row in conn.execute("PRAGMA index_list(lines)")]
+        assert "ix_lines_migration_run_id" in indexes
+
+    assert executor.rollback(_mapping(), source_schema=source) == {"lines": 300, "orders": 120, "customers": 50}
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT cust_id FROM customers").fetchall() == [(1000,)]
+    assert SQLGenerator().generate_rollback_sql(_mapping(), "run-1").split("\n")[0] == \
+        'DELETE FROM "lines" WHERE "migration_run_id" = \'run-1\';'
+
+
+def test_staging_strategy_swaps_loaded_table_into_place(databases):
+    source_db, target_db = databases
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("INSERT INTO customers VALUES (1000, 'replaced')")
+    source = SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)
+    target = SchemaAnalyzer().parse_sql_schema(TARGET_DDL)
+    mapping = _mapping()
+    mapping.table_mappings[2].strategy = "staging"
+    results = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db)).execute(mapping, source, target)
+    assert [r.status for r in results] == ["completed"] * 3
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*), MIN(cust_id) FROM customers").fetchone() == (50, 0)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert tables == {"customers", "orders", "lines"}
+        assert any(row[2] for row in conn.execute("PRAGMA index_list(customers)"))
+        assert "REFERENCES customers" in conn.execute("SELECT sql FROM sqlite_master WHERE name = 'orders'").fetchone()[0]
+
+
+def test_large_tables_load_as_parallel_partitions(databases):
+    source_db, target_db = databases
+    source = SchemaAnalyzer().parse_sql_schema(SOURCE_DDL)
+    executor = MigrationExecutor(SQLiteConnectionFactory(target_db, source_db), partitions=4,
+                                 partition_min_rows=100, sample_size=1000)
+    results = {r.target_table: r for r in executor.execute(_mapping(), source)}
+    assert (results["customers"].rows, results["customers"].batches) == (50, 1)
+    assert results["lines"].rows == 300 and results["lines"].batches == 4
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(DISTINCT line_id) FROM lines").fetchone() == (300,)
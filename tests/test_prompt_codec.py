@@ -0,0 +1,79 @@
+"""
+Unit tests for the compact prompt encoding and its token budget.
+"""
+
+import json
+from dataclasses import asdict
+import pytest
+from ai_mapping_engine import GenAIMappingEngine
+from tests.fake_model_server import FakeModelServer
+from instrumentation import RunMetrics
+from mapping_io import mapping_from_dict, mapping_to_dict
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+from prompt_codec import (decode_mapping_prompt, decode_mapping_response, encode_mapping_prompt,
+                          encode_mapping_response, estimate_tokens)
+
+
+def _wide(name, columns, reference=None):
+    fields = [SchemaField("id", "INT", nullable=False, primary_key=True)]
+    fields += [SchemaField(f"{name}_col_{i}", "VARCHAR(255)" if i % 3 else "DECIMAL(12,2)") for i in range(columns)]
+    return TableSchema(name, fields, {f"{name}_col_1": reference} if reference else {})
+
+
+SOURCE = [
+    TableSchema('Order "Items"', [SchemaField("item id", "DOUBLE PRECISION", False, True),
+                                  SchemaField("order_id", "INT")], {"order_id": "public.orders(id)"}),
+    _wide("customers", 40, reference="regions(id)"),
+]
+TARGET = [_wide("customer_master", 40)]
+
+
+def test_compact_prompt_round_trips_and_is_smaller_than_json():
+    prompt = encode_mapping_prompt(SOURCE, TARGET, "CRM\nconsolidation")
+    decoded = decode_mapping_prompt(prompt)
+    assert decoded["business_context"] == "CRM consolidation"
+    for table, expected in zip(decoded["source"] + decoded["target"], SOURCE + TARGET):
+        assert table.pop("omitted_fields") == 0
+        assert table == asdict(expected)
+    as_json = json.dumps({"source": [asdict(t) for t in SOURCE], "target": [asdict(t) for t in TARGET],
+                          "business_context": "CRM consolidation"})
+    assert estimate_tokens(prompt) < 0.4 * estimate_tokens(as_json)
+
+    mapping = MigrationMapping("S", "T", 0.75, [
+        TableMapping('Order "Items"', "lines", [FieldMapping("item id", "line_id"),
+                                                FieldMapping("order_id", "order_ref", "CAST(order_id AS TEXT) || '-x'")],
+                     strategy="incremental", complexity="low"),
+        TableMapping("customers", "customer_master", []),
+    ], notes="first line\nsecond line")
+    response = encode_mapping_response(mapping_to_dict(mapping))
+    assert mapping_from_dict(decode_mapping_response(response)) == mapping
+    with pytest.raises(ValueError):
+        decode_mapping_response("customers -> customer_master")
+
+
+def test_budget_truncates_low_signal_content_keeping_keys():
+    full = encode_mapping_prompt(SOURCE, TARGET, "word " * 1000)
+    prompt = encode_mapping_prompt(SOURCE, TARGET, "word " * 1000, max_tokens=700)
+    assert estimate_tokens(full) > 1500 and estimate_tokens(prompt) <= 700
+    customers = decode_mapping_prompt(prompt)["source"][1]
+    names = [f["name"] for f in customers["fields"]]
+    assert names[:2] == ["id", "customers_col_0"] and "customers_col_1" in names
+    assert customers["omitted_fields"] == 41 - len(names)
+    assert decode_mapping_prompt(prompt)["business_context"].endswith("…")
+
+
+def test_engine_splits_requests_to_fit_the_budget():
+    source = [_wide(f"src_{i}", 10) for i in range(6)]
+    target = [_wide(f"src_{i}_new", 10) for i in range(6)]
+    metrics = RunMetrics()
+    with FakeModelServer() as server:
+        engine = GenAIMappingEngine(endpoint=server.url, prompt_format="compact", max_prompt_tokens=600,
+                                    candidate_targets=1, metrics=metrics)
+        mapping = engine.generate_mappings(source, target, "ctx")
+    assert len(server.raw_prompts) > 1
+    assert all(estimate_tokens(p) <= 600 for p in server.raw_prompts)
+    assert [(t.source_table, t.target_table) for t in mapping.table_mappings] == [(f"src_{i}", f"src_{i}_new")
+                                                                                 for i in range(6)]
+    counters = metrics.to_dict()["counters"]
+    assert counters["model_requests"] == len(server.raw_prompts)
+    assert counters["prompt_tokens"] == sum(estimate_tokens(p) for p in server.raw_prompts)
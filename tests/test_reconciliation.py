@@ -0,0 +1,53 @@
+"""
+Unit tests for checksum-based reconciliation.
+"""
+
+import sqlite3
+from migration_executor import SQLiteConnectionFactory
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+from reconciliation import Reconciler
+from sql_generator import SQLGenerator
+
+SOURCE = [
+    TableSchema("users_old", [SchemaField("id", "INT", False, True), SchemaField("name", "VARCHAR(20)")]),
+    TableSchema("tags_old", [SchemaField("code", "VARCHAR(5)", False, True), SchemaField("label", "VARCHAR(20)")]),
+]
+
+
+def _mapping():
+    return MigrationMapping("src", "tgt", 1.0, [
+        TableMapping("users_old", "users_new", [FieldMapping("id", "user_id"),
+                                                FieldMapping("name", "full_name", "UPPER(\"name\")")]),
+        TableMapping("tags_old", "tags_new", [FieldMapping("code", "code"), FieldMapping("label", "label")]),
+    ])
+
+
+def test_validation_sql_contains_bucket_checksums():
+    sql = SQLGenerator().generate_validation_sql(_mapping(), SOURCE, bucket_size=1000)
+    assert '(SELECT COUNT(*) FROM "users_old") AS source_count' in sql
+    assert 'CAST("id" / 1000 AS INTEGER)' in sql
+    assert "UPPER(\"name\")" in sql
+    assert 'MOD(ABS(hashtext("code")), 1024)' in sql
+    points = [TableSchema("users_old", [SchemaField("id", "POINT", False, True), SchemaField("name", "VARCHAR(20)")])]
+    assert [p.bucket_mode for p in SQLGenerator().plan_reconciliation(_mapping(), points)] == ["hash", "hash"]
+
+
+def test_reconciler_reports_only_offending_keys(tmp_path):
+    db = str(tmp_path / "db.sqlite")
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE users_old (id INT PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE users_new (user_id INT PRIMARY KEY, full_name TEXT)")
+        conn.execute("CREATE TABLE tags_old (code TEXT PRIMARY KEY, label TEXT)")
+        conn.execute("CREATE TABLE tags_new (code TEXT PRIMARY KEY, label TEXT)")
+        conn.executemany("INSERT INTO users_old VALUES (?, ?)", [(i, f"user{i}") for i in range(1000)])
+        conn.executemany("INSERT INTO users_new VALUES (?, ?)", [(i, f"USER{i}") for i in range(1000) if i != 420])
+        conn.execute("UPDATE users_new SET full_name = 'WRONG' WHERE user_id = 77")
+        conn.executemany("INSERT INTO tags_old VALUES (?, ?)", [(f"t{i}", "x") for i in range(50)])
+        conn.executemany("INSERT INTO tags_new VALUES (?, ?)", [(f"t{i}", "x") for i in range(50)])
+
+    results = Reconciler(SQLiteConnectionFactory(db)).reconcile(_mapping(), SOURCE, bucket_size=100, hash_buckets=8)
+    users, tags = results
+    assert users.error is None and tags.error is None
+    assert users.mismatched_buckets == [0, 4]
+    assert users.offending_keys == [77, 420]
+    assert tags.mismatched_buckets == [] and tags.offending_keys == []
@@ -0,0 +1,82 @@
+"""
+Unit tests for manifest-driven incremental workflow runs.
+"""
+
+import json
+from models import FieldMapping, MigrationMapping, TableMapping
+from orchestrator import MigrationOrchestrator
+from run_manifest import read_sections, write_sections
+
+
+class _RecordingMapper:
+    """
+    Maps every source table to the target table of the same name and records
+    which tables each call was asked to map.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_mappings(self, source, target, context):
+        self.calls.append([t.table_name for t in source])
+        return MigrationMapping("src", "tgt", 0.9, [
+            TableMapping(t.table_name, t.table_name, [FieldMapping(f.name, f.name) for f in t.fields])
+            for t in source
+        ])
+
+
+def _ddl(tables):
+    return "\n".join(f"CREATE TABLE {name} ({', '.join(f'{c} INT' for c in cols)});" for name, cols in tables.items())
+
+
+def _run(tmp_path, orchestrator, source_tables, **kwargs):
+    (tmp_path / "source.sql").write_text(_ddl(source_tables))
+    return orchestrator.execute_migration_workflow(str(tmp_path / "source.sql"), str(tmp_path / "target.sql"),
+                                                   "CRM migration", str(tmp_path / "out"), **kwargs)
+
+
+def test_rerun_maps_and_rewrites_only_changed_tables(tmp_path):
+    (tmp_path / "target.sql").write_text(_ddl({"a": ["id"], "b": ["id", "x"], "c": ["id"]}))
+    orchestrator = MigrationOrchestrator()
+    orchestrator.mapper = mapper = _RecordingMapper()
+    _run(tmp_path, orchestrator, {"a": ["id"], "b": ["id"], "c": ["id"]})
+    rollback = tmp_path / "out" / "rollback.sql"
+    sections = read_sections(str(rollback))
+    sections["a->a"] = "-- untouched"
+    write_sections(str(rollback), sections.items())
+
+    _run(tmp_path, orchestrator, {"a": ["id"], "b": ["id", "x"]})
+    mapping = _run(tmp_path, orchestrator, {"a": ["id"], "b": ["id", "x"]})
+
+    assert mapper.calls == [["a", "b", "c"], ["b"]]
+    assert [t.source_table for t in mapping.table_mappings] == ["a", "b"]
+    sections = read_sections(str(rollback))
+    assert sections == {"a->a": "-- untouched", "b->b": 'DELETE FROM "b";'}
+    assert '"x"' in read_sections(str(tmp_path / "out" / "migration.sql"))["b->b"]
+    manifest = json.loads((tmp_path / "out" / "manifest.json").read_text())
+    assert set(manifest["tables"]) == {"a->a", "b->b"}
+
+
+def test_full_rebuild_remaps_and_settings_change_regenerates_sql(tmp_path):
+    (tmp_path / "target.sql").write_text(_ddl({"a": ["id"]}))
+    orchestrator = MigrationOrchestrator()
+    orchestrator.mapper = mapper = _RecordingMapper()
+    _run(tmp_path, orchestrator, {"a": ["id"]})
+    _run(tmp_path, orchestrator, {"a": ["id"]}, full_rebuild=True)
+    orchestrator.batch_size = 100
+    _run(tmp_path, orchestrator, {"a": ["id"]})
+    assert mapper.calls == [["a"], ["a"]]
+    assert "batches on" in read_sections(str(tmp_path / "out" / "migration.sql"))["a->a"]
+
+
+def test_rerun_drops_mappings_of_removed_tables_without_remapping(tmp_path):
+    (tmp_path / "target.sql").write_text(_ddl({"a": ["id"], "b": ["id"]}))
+    orchestrator = MigrationOrchestrator()
+    orchestrator.mapper = mapper = _RecordingMapper()
+    _run(tmp_path, orchestrator, {"a": ["id"], "b": ["id"]})
+    mapping = _run(tmp_path, orchestrator, {"a": ["id"]})
+    assert mapper.calls == [["a", "b"]]
+    assert [t.source_table for t in mapping.table_mappings] == ["a"]
+    assert set(read_sections(str(tmp_path / "out" / "migration.sql"))) == {"a->a"}
+    saved = json.loads((tmp_path / "out" / "migration_mapping.json").read_text())
+    assert [t["source_table"] for t in saved["table_mappings"]] == ["a"]
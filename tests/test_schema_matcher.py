@@ -0,0 +1,56 @@
+"""
+Unit tests for the SchemaMatcher pre-matcher and its use by GenAIMappingEngine.
+"""
+
+import json
+from ai_mapping_engine import GenAIMappingEngine
+from models import SchemaField, TableSchema
+from schema_matcher import SchemaMatcher, type_family
+
+SOURCE = [
+    TableSchema("customer", [SchemaField("customer_id", "INT", False, True), SchemaField("email", "VARCHAR(100)"),
+                             SchemaField("created_at", "TIMESTAMP")]),
+    TableSchema("usr", [SchemaField("id", "INT", False, True), SchemaField("nm", "VARCHAR(50)")]),
+]
+TARGET = [
+    TableSchema("customers", [SchemaField("customer_id", "BIGINT", False, True), SchemaField("email", "TEXT"),
+                              SchemaField("created_at", "DATETIME")]),
+    TableSchema("accounts", [SchemaField("account_no", "INT", False, True), SchemaField("full_name", "VARCHAR(50)")]),
+    TableSchema("audit", [SchemaField("event", "TEXT")]),
+]
+
+
+def test_type_family():
+    assert type_family("bigint") == "integer"
+    assert type_family("numeric(10, 2)") == "decimal"
+    assert type_family("timestamp with time zone") == "timestamp"
+    assert type_family("character varying(20)") == "text"
+    assert type_family("INT UNSIGNED") == type_family("int4") == "integer"
+    assert type_family("INTEGER[]") == type_family("int ARRAY") == type_family("varchar(20)[]") == "other"
+    assert type_family("POINT") == type_family("interval day to second") == type_family("TIME") == "other"
+
+
+def test_obvious_tables_are_accepted_and_others_get_candidates():
+    result = SchemaMatcher(top_k=2).match(SOURCE, TARGET)
+    assert [(t.source_table, t.target_table) for t in result.accepted] == [("customer", "customers")]
+    assert [(f.source_field, f.target_field) for f in result.accepted[0].field_mappings] == [
+        ("customer_id", "customer_id"), ("email", "email"), ("created_at", "created_at")]
+    assert list(result.candidates) == ["usr"]
+    assert len(result.candidates["usr"]) == 2
+
+
+def test_engine_sends_only_ambiguous_tables_with_candidates():
+    prompts = []
+
+    class RecordingEngine(GenAIMappingEngine):
+        def _call_ai_for_mappings(self, prompt):
+            prompts.append(json.loads(prompt))
+            return json.dumps({"source_system": "S", "target_system": "T", "confidence_score": 0.7,
+                               "table_mappings": [{"source_table": "usr", "target_table": "accounts",
+                                                   "field_mappings": [{"source_field": "id", "target_field": "account_no"}]}]})
+
+    mapping = RecordingEngine(prematcher=SchemaMatcher(top_k=1)).generate_mappings(SOURCE, TARGET, "ctx")
+    assert [t["table_name"] for t in prompts[0]["source"]] == ["usr"]
+    assert len(prompts[0]["target"]) == 1
+    assert [t.source_table for t in mapping.table_mappings] == ["customer", "usr"]
+    assert mapping.confidence_score == 0.7
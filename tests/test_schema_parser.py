@@ -46,3 +46,106 @@ def test_parse_json_schema():
     assert len(schemas) == 1
     assert schemas[0].table_name == "orders"
     assert schemas[0].fields[0].primary_key is True
+
+def test_parse_sql_file_streams_pg_dump(tmp_path):
+    dump = tmp_path / "dump.sql"
+    dump.write_text("""
+    -- CREATE TABLE commented_out (id int);
+    CREATE FUNCTION f() RETURNS int AS $$ SELECT 1; $$ LANGUAGE sql;
+    CREATE TABLE IF NOT EXISTS public."Line Items" (
+        "item id" bigint,
+        amount numeric(12, 2) NOT NULL,
+        PRIMARY KEY ("item id")
+    );
+    """)
+    analyzer = SchemaAnalyzer()
+    result = analyzer.parse_sql_file(str(dump), chunk_size=16)
+    assert len(result) == 1
+    assert result[0].table_name == "public.Line Items"
+    assert [f.name for f in result[0].fields] == ["item id", "amount"]
+    assert result[0].fields[0].primary_key is True
+    assert result[0].fields[1].datatype == "numeric(12, 2)"
+
+def test_parse_sql_schema_applies_alter_table_constraints():
+    sql_input = """
+    CREATE TABLE public.orders (id integer NOT NULL, customer_id integer);
+    ALTER TABLE ONLY public.orders
+        ADD CONSTRAINT orders_pkey PRIMARY KEY (id);
+    ALTER TABLE ONLY public.orders
+        ADD CONSTRAINT orders_customer_fk FOREIGN KEY (customer_id) REFERENCES public.customers(id);
+    """
+    result = SchemaAnalyzer().parse_sql_schema(sql_input)
+    assert result[0].fields[0].primary_key is True
+    assert result[0].relationships == {"customer_id": "public.customers(id)"}
+
+def test_parse_csv_file_infers_types_from_values(tmp_path):
+    path = tmp_path / "customers.csv"
+    path.write_text(
+        "id,big,huge,amount,active,joined,seen_at,name,score\n"
+        "1,3000000000,12345678901234567890,10.5,true,2024-01-02,2024-01-02 10:00:00,Alice,1e3\n"
+        "2,-4,-999999999999999999,1234.125,no,2024-02-29,2024-03-01T08:30:15Z,,2.5\n"
+    )
+    schema = SchemaAnalyzer().parse_csv_file(str(path))
+    assert schema.table_name == "customers"
+    types = {f.name: f.datatype for f in schema.fields}
+    assert types == {
+        "id": "INT", "big": "BIGINT", "huge": "DECIMAL(20,0)", "amount": "DECIMAL(7,3)", "active": "BOOLEAN", "joined": "DATE",
+        "seen_at": "TIMESTAMP", "name": "VARCHAR(5)", "score": "DOUBLE PRECISION",
+    }
+    nullable = {f.name: f.nullable for f in schema.fields}
+    assert nullable["name"] is True and nullable["id"] is False
+
+def test_parse_csv_schema_respects_row_limit():
+    schema = SchemaAnalyzer().parse_csv_schema("code\n1\n2\nabc", max_rows=2)
+    assert schema.fields[0].datatype == "INT"
+
+def _module_files(root):
+    (root / "billing").mkdir(parents=True)
+    for i in range(30):
+        (root / "billing" / f"m{i:02d}.sql").write_text(
+            "".join(f"CREATE TABLE t{i}_{j} (id INT, ref INT, note TEXT DEFAULT 'a;b');\n" for j in range(5)))
+    (root / "keys.sql").write_text("ALTER TABLE t0_0 ADD PRIMARY KEY (id);\n"
+                                   "ALTER TABLE t29_4 ADD FOREIGN KEY (ref) REFERENCES t0_0(id);\n")
+    (root / "lookup.csv").write_text("code,label\n1,x\n")
+    (root / "README.txt").write_text("not a schema")
+
+def test_parse_files_merges_directories_deterministically(tmp_path):
+    from schema_parser import expand_schema_inputs
+    _module_files(tmp_path)
+    paths = expand_schema_inputs(str(tmp_path))
+    assert [p[len(str(tmp_path)) + 1:] for p in paths[-3:]] == ["billing/m29.sql", "keys.sql", "lookup.csv"]
+    assert expand_schema_inputs(str(tmp_path / "billing" / "m0*.sql")) == paths[:10]
+    with pytest.raises(ValueError):
+        expand_schema_inputs(str(tmp_path / "*.json"))
+
+    inline = SchemaAnalyzer().parse_files(str(tmp_path), workers=1)
+    parallel = SchemaAnalyzer().parse_files([str(tmp_path / "billing"), str(tmp_path / "*.*")], workers=3,
+                                            batch_bytes=200, min_parallel_bytes=0)
+    assert parallel == inline
+    assert [t.table_name for t in inline[:6]] == ["t0_0", "t0_1", "t0_2", "t0_3", "t0_4", "t1_0"]
+    assert len(inline) == 151 and inline[-1].table_name == "lookup"
+    assert inline[0].fields[0].primary_key and inline[149].relationships == {"ref": "t0_0(id)"}
+
+def test_parse_files_parses_single_inputs_and_one_worker_inline(tmp_path, monkeypatch):
+    import schema_parser
+    _module_files(tmp_path)
+    expected = SchemaAnalyzer().parse_files(str(tmp_path), workers=3, batch_bytes=200, min_parallel_bytes=0)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+    monkeypatch.setattr(schema_parser, "ProcessPoolExecutor", no_pool)
+    assert SchemaAnalyzer().parse_files(str(tmp_path), workers=1, min_parallel_bytes=0) == expected
+    dump = str(tmp_path / "billing" / "m03.sql")
+    assert SchemaAnalyzer().parse_files(dump, workers=4, min_parallel_bytes=0) == SchemaAnalyzer().parse_sql_file(dump)
+    assert SchemaAnalyzer().parse_files(str(tmp_path / "lookup.csv"), workers=4, min_parallel_bytes=0)[0].table_name \
+        == "lookup"
+
+def test_orchestrator_accepts_schema_directories(tmp_path):
+    from orchestrator import MigrationOrchestrator
+    _module_files(tmp_path / "source")
+    (tmp_path / "target.sql").write_text("CREATE TABLE t0_0 (id INT PRIMARY KEY);")
+    orchestrator = MigrationOrchestrator(parse_workers=2)
+    orchestrator.execute_migration_workflow(str(tmp_path / "source"), str(tmp_path / "target.sql"), "ctx",
+                                            str(tmp_path / "out"))
+    manifest = (tmp_path / "out" / "manifest.json").read_text()
+    assert '"t29_4"' in manifest
@@ -0,0 +1,196 @@
+"""
+Unit tests for the dialect bulk-load backends.
+"""
+
+import hashlib
+import sqlite3
+import pytest
+from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+from sql_dialects import PostgreSQLDialect, SQLDialect, SQLiteDialect, get_dialect
+from sql_generator import SQLGenerator
+
+ROWS = 20000
+
+
+def _mapping():
+    return MigrationMapping("crm", "erp", 1.0, [
+        TableMapping("customers", "customers", [FieldMapping("id", "id"), FieldMapping("name", "full name", "UPPER(name)")]),
+        TableMapping("orders", "orders", [FieldMapping("id", "id"), FieldMapping("total", "total")]),
+    ])
+
+
+@pytest.fixture
+def databases(tmp_path):
+    source_db, target_db = str(tmp_path / "source.db"), str(tmp_path / "target.db")
+    with sqlite3.connect(source_db) as conn:
+        conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, total REAL)")
+        conn.executemany("INSERT INTO customers VALUES (?, ?)", [(i, f"c{i}") for i in range(ROWS)])
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i * 1.5) for i in range(ROWS)])
+    with sqlite3.connect(target_db) as conn:
+        conn.execute('CREATE TABLE customers (id INTEGER PRIMARY KEY, "full name" TEXT)')
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, total REAL)")
+    return source_db, target_db
+
+
+def test_generic_emits_one_quoted_statement_per_table():
+    sql = SQLGenerator().generate_migration_sql(_mapping())
+    assert sql.split("\n") == [
+        'INSERT INTO "customers" ("id", "full name") SELECT "id", UPPER("name") FROM "customers";',
+        'INSERT INTO "orders" ("id", "total") SELECT "id", "total" FROM "orders";',
+    ]
+    assert SQLDialect().insert_values_sql(_mapping().table_mappings[1], 2) == \
+        'INSERT INTO "orders" ("id", "total") VALUES (?, ?), (?, ?)'
+
+
+def test_sqlite_attach_script_loads_across_database_files(databases):
+    source_db, target_db = databases
+    sql = SQLGenerator(dialect=SQLiteDialect(source_database=source_db)).generate_migration_sql(_mapping())
+    assert 'INSERT INTO "main"."customers"' in sql and 'FROM "source"."customers";' in sql
+    with sqlite3.connect(target_db, isolation_level=None) as conn:
+        conn.executescript(sql)
+        assert conn.execute("SELECT COUNT(*), MAX(\"full name\") FROM customers").fetchone() == (ROWS, "C9999")
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone() == (ROWS,)
+
+
+def test_validation_counts_read_the_attached_source_database(databases):
+    source_db, target_db = databases
+    statements = SQLGenerator(dialect=SQLiteDialect(source_database=source_db)).generate_validation_sql(
+        _mapping()).split("\n")
+    assert statements[1] == ("SELECT 'customers' AS table_name, (SELECT COUNT(*) FROM \"source\".\"customers\") "
+                             "AS source_count, (SELECT COUNT(*) FROM \"main\".\"customers\") AS target_count;")
+    with sqlite3.connect(target_db, isolation_level=None) as conn:
+        counts = [conn.execute(s).fetchone() for s in statements]
+    assert counts[1:3] == [("customers", ROWS, 0), ("orders", ROWS, 0)]
+    mapping = MigrationMapping("crm", "erp", 1.0, [TableMapping("o'brien", "t", [FieldMapping("id", "id")])])
+    assert SQLGenerator().generate_validation_sql(mapping).startswith("SELECT 'o''brien' AS table_name")
+
+
+def test_sqlite_non_full_loads_read_the_attached_source(databases):
+    source_db, target_db = databases
+    mapping = _mapping()
+    mapping.table_mappings[1].strategy = "incremental"
+    source = [TableSchema("customers", [SchemaField("id", "INTEGER", False, True), SchemaField("name", "TEXT")]),
+              TableSchema("orders", [SchemaField("id", "INTEGER", False, True), SchemaField("total", "REAL")])]
+    generator = SQLGenerator(dialect=SQLiteDialect(source_database=source_db))
+    statements = list(generator.iter_migration_sql(mapping, source))
+    first = next(i for i, s in enumerate(statements) if s.startswith("-- orders -> orders: incremental on id"))
+    assert statements[first - 1].startswith("ATTACH DATABASE") and statements[-1] == 'DETACH DATABASE "source";'
+    assert 'SELECT "id", "total" FROM "source"."orders" WHERE "id" <= CAST((SELECT "pending_mark" ' in statements[-4]
+    with sqlite3.connect(target_db, isolation_level=None) as conn:
+        conn.executescript("\n".join(statements))
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone() == (ROWS,)
+    hashed = generator.generate_chunked_migration_sql(mapping, source[:1], fallback="hash", hash_buckets=2)
+    assert 'FROM "source"."orders" WHERE MOD(' in hashed and hashed.count("ATTACH DATABASE") == 2
+
+
+def test_incremental_script_keeps_its_high_water_mark_in_the_target(tmp_path):
+    source_db, target_db = str(tmp_path / "source.db"), str(tmp_path / "target.db")
+    with sqlite3.connect(source_db) as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, body TEXT, updated_at TIMESTAMP)")
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?)",
+                         [(i, f"v1-{i}", f"2024-01-01 00:00:{i:02d}") for i in range(10)])
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, body TEXT, updated_at TIMESTAMP)")
+    mapping = MigrationMapping("a", "b", 1.0, [TableMapping("events", "events", [
+        FieldMapping("id", "id"), FieldMapping("body", "body"), FieldMapping("updated_at", "updated_at")], "incremental")])
+    source = [TableSchema("events", [SchemaField("id", "INTEGER", False, True), SchemaField("body", "TEXT"),
+                                     SchemaField("updated_at", "TIMESTAMP")])]
+    sql = SQLGenerator(dialect=SQLiteDialect(source_database=source_db)).generate_migration_sql(mapping, source)
+
+    def run_pass():
+        with sqlite3.connect(target_db, isolation_level=None) as conn:
+            before = conn.total_changes
+            conn.executescript(sql)
+            marks = conn.execute("SELECT high_mark FROM migration_watermarks").fetchall()
+            return conn.total_changes - before, marks
+
+    # Each pass also writes the pending mark and advances the stored mark (2 changes).
+    assert run_pass() == (10 + 2, [("2024-01-01 00:00:09",)])
+    with sqlite3.connect(target_db) as conn:
+        conn.execute("UPDATE events SET body = 'kept' WHERE id = 0")
+    with sqlite3.connect(source_db) as conn:
+        conn.execute("UPDATE events SET body = 'v2-3', updated_at = '2024-01-01 00:01:00' WHERE id = 3")
+        conn.execute("INSERT INTO events VALUES (10, 'v1-10', '2024-01-01 00:01:01')")
+    assert run_pass() == (2 + 2, [("2024-01-01 00:01:01",)])
+    assert run_pass() == (0 + 2, [("2024-01-01 00:01:01",)])
+    with sqlite3.connect(target_db) as conn:
+        assert conn.execute("SELECT id, body FROM events WHERE id IN (0, 3, 10) ORDER BY id").fetchall() == \
+            [(0, "kept"), (3, "v2-3"), (10, "v1-10")]
+
+
+def test_postgresql_rejects_loads_reading_the_source_from_the_target():
+    mapping = _mapping()
+    mapping.table_mappings[1].strategy = "incremental"
+    source = [TableSchema("orders", [SchemaField("id", "INTEGER", False, True), SchemaField("total", "REAL")])]
+    generator = SQLGenerator(dialect=PostgreSQLDialect())
+    with pytest.raises(ValueError, match="orders -> orders needs an INSERT ... SELECT"):
+        list(generator.iter_migration_sql(mapping, source))
+    with pytest.raises(ValueError, match="postgresql dialect"):
+        generator.plan_partitions(_mapping(), source, partitions=4)
+    mapping.table_mappings[1].strategy = "staging"
+    assert generator.plan_staging(mapping)[0].load_sql.startswith("\\connect :source_db")
+
+
+def test_multi_row_values_copy_between_separate_connections(databases):
+    source_db, target_db = databases
+    generator = SQLGenerator(dialect=get_dialect("sqlite"))
+    source, target = sqlite3.connect(source_db), sqlite3.connect(target_db)
+    try:
+        table_map = _mapping().table_mappings[0]
+        assert generator.dialect.rows_per_statement(table_map, 100000) == 16383
+        assert generator.copy_table(source, target, table_map, rows_per_statement=777) == ROWS
+        assert target.execute("SELECT COUNT(*), MIN(\"full name\") FROM customers").fetchone() == (ROWS, "C0")
+    finally:
+        source.close()
+        target.close()
+
+
+def test_postgresql_exports_and_imports_with_copy():
+    dialect = get_dialect("postgres", export_dir="/tmp/export", copy_format="binary")
+    statements = list(SQLGenerator(dialect=dialect).iter_migration_sql(_mapping()))
+    assert statements[:4] == [
+        "\\connect :source_db",
+        "\\copy (SELECT \"id\", UPPER(\"name\") FROM \"customers\") TO '/tmp/export/customers__customers.bin' WITH (FORMAT binary)",
+        "\\connect :target_db",
+        "\\copy \"customers\" (\"id\", \"full name\") FROM '/tmp/export/customers__customers.bin' WITH (FORMAT binary)",
+    ]
+    assert isinstance(dialect, PostgreSQLDialect) and dialect.placeholder == "%s"
+    with pytest.raises(ValueError):
+        get_dialect("oracle")
+
+
+def test_sqlite_staging_script_builds_keys_and_swaps(databases):
+    source_db, target_db = databases
+    mapping = _mapping()
+    mapping.table_mappings[0].strategy = "staging"
+    target = [TableSchema("customers", [SchemaField("id", "INTEGER", False, True), SchemaField("full name", "TEXT")])]
+    generator = SQLGenerator(dialect=SQLiteDialect(source_database=source_db), run_id="run-1")
+    sql = generator.generate_migration_sql(mapping, target_schema=target)
+    statements = sql.split("\n")
+    assert statements.index('INSERT INTO "main"."customers__staging" ("id", "full name", "migration_run_id") '
+                            'SELECT "id", UPPER("name"), \'run-1\' FROM "source"."customers";') \
+        < next(i for i, s in enumerate(statements) if s.startswith("CREATE UNIQUE INDEX")) \
+        < statements.index('ALTER TABLE "customers__staging" RENAME TO "customers";')
+    with sqlite3.connect(target_db, isolation_level=None) as conn:
+        conn.executescript(sql)
+        assert conn.execute("SELECT COUNT(*) FROM customers WHERE migration_run_id = 'run-1'").fetchone() == (ROWS,)
+        assert [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")] \
+            == ["customers", "orders"]
+
+
+def test_swap_recreates_foreign_keys_of_tables_referencing_the_staged_table():
+    mapping = _mapping()
+    mapping.table_mappings[0].strategy = "staging"
+    target = [TableSchema("customers", [SchemaField("id", "INTEGER", False, True)]),
+              TableSchema("orders", [SchemaField("id", "INTEGER"), SchemaField("customer_id", "INTEGER")],
+                          {"customer_id": "customers(id)"})]
+    generator = SQLGenerator(dialect=PostgreSQLDialect(), run_id="run-1")
+    name = "fk_orders_customer_id_" + hashlib.sha1(b"run-1").hexdigest()[:8]
+    assert generator.plan_staging(mapping, target)[0].swap_sql[3:] == [
+        'DROP TABLE "customers__replaced" CASCADE;',
+        f'ALTER TABLE "orders" ADD CONSTRAINT "{name}" FOREIGN KEY ("customer_id") REFERENCES "customers" ("id");',
+        "COMMIT;",
+    ]
+    assert SQLGenerator().plan_staging(mapping, target[:1])[0].swap_sql[-2:] == \
+        ["COMMIT;", 'DROP TABLE "customers__replaced";']
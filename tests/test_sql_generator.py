@@ -3,8 +3,8 @@ Unit tests for the SQLGenerator class.
 """
 
 import json
-from sql_generator import SQLGenerator
-from models import MigrationMapping, TableMapping, FieldMapping
+from sql_generator import SQLGenerator, balanced_boundaries
+from models import MigrationMapping, TableMapping, FieldMapping, TableSchema, SchemaField
 
 def test_generate_sql_from_sample_json():
     with open("sample_migration_mapping.json", "r") as f:
@@ -38,6 +38,97 @@ def test_generate_sql_from_sample_json():
     print(validation_sql)
     print(rollback_sql)
 
-    assert "INSERT INTO users_new" in migration_sql
-    assert "SELECT COUNT(*) FROM users_old" in validation_sql
-    assert "DELETE FROM users_new" in rollback_sql
+    assert 'INSERT INTO "users_new"' in migration_sql
+    assert '(SELECT COUNT(*) FROM "users_old") AS source_count' in validation_sql
+    assert 'DELETE FROM "users_new";' in rollback_sql
+
+def _users_mapping():
+    return MigrationMapping(
+        source_system="CRM_v1",
+        target_system="CRM_v2",
+        confidence_score=0.9,
+        table_mappings=[
+            TableMapping("users_old", "users_new", [FieldMapping("id", "user_id"), FieldMapping("name", "full_name")]),
+            TableMapping("audit_log", "audit", [FieldMapping("ts", "ts")]),
+        ],
+    )
+
+def test_generate_chunked_migration_sql_uses_keyset_and_rowid():
+    source = [
+        TableSchema("users_old", [SchemaField("id", "INT", primary_key=True), SchemaField("name", "VARCHAR")]),
+        TableSchema("audit_log", [SchemaField("ts", "TIMESTAMP")]),
+    ]
+    plans = SQLGenerator().plan_batches(_users_mapping(), source, batch_size=500)
+    assert [p.mode for p in plans] == ["keyset", "rowid"]
+    assert plans[0].batch_sql.endswith('WHERE "id" > :last_key AND "id" <= :next_key;')
+    assert "LIMIT 500" in plans[0].boundary_sql
+
+    sql = SQLGenerator().generate_chunked_migration_sql(_users_mapping(), source, batch_size=500)
+    assert sql.count("BEGIN;") == sql.count("COMMIT;") == 4
+    assert 'WHERE rowid > :last_key AND rowid <= :next_key;' in sql
+
+def test_generate_chunked_migration_sql_hash_fallback():
+    sql = SQLGenerator().generate_chunked_migration_sql(_users_mapping(), [], fallback="hash", hash_buckets=4)
+    assert sql.count("BEGIN;") == 8
+    assert "MOD(ABS(hashtext(CAST(\"ts\" AS VARCHAR))), 4) = 3;" in sql
+
+def test_generate_migration_sql_incremental_upsert(tmp_path):
+    from watermark_store import WatermarkStore
+    source = [TableSchema("users_old", [SchemaField("id", "INT", primary_key=True), SchemaField("name", "VARCHAR"),
+                                        SchemaField("updated_at", "TIMESTAMP")])]
+    mapping = _users_mapping()
+    mapping.table_mappings[0].strategy = "incremental"
+    store = WatermarkStore(str(tmp_path / "watermarks.json"))
+    first = SQLGenerator().generate_migration_sql(mapping, source, store)
+    stored = """(SELECT "{}" FROM "migration_watermarks" WHERE "table_key" = 'users_old->users_new' AND "watermark_column" = 'updated_at')"""
+    assert (f'"updated_at" <= CAST({stored.format("pending_mark")} AS TIMESTAMP) AND '
+            f'(CAST({stored.format("high_mark")} AS TIMESTAMP) IS NULL OR "updated_at" > ') in first
+    assert 'ON CONFLICT ("user_id") DO UPDATE SET "full_name" = excluded."full_name";' in first
+    assert 'SELECT \'users_old->users_new\', \'updated_at\', CAST(MAX("updated_at") AS VARCHAR) FROM "users_old"' in first
+    assert 'UPDATE "migration_watermarks" SET "high_mark" = "pending_mark" WHERE' in first
+    assert "VALUES (" not in first
+
+    store.set("users_old", "users_new", "updated_at", "2024-01-01 00:00:00")
+    delta = SQLGenerator().generate_migration_sql(mapping, source, WatermarkStore(str(tmp_path / "watermarks.json")))
+    assert ("VALUES ('users_old->users_new', 'updated_at', '2024-01-01 00:00:00') "
+            'ON CONFLICT ("table_key", "watermark_column") DO NOTHING;') in delta
+    assert 'INSERT INTO "audit" ("ts") SELECT "ts" FROM "audit_log";' in delta
+
+    chunked = SQLGenerator().generate_chunked_migration_sql(mapping, source, batch_size=500, watermarks=store)
+    assert "'2024-01-01 00:00:00') ON CONFLICT" in chunked and 'SET "high_mark" = "pending_mark"' in chunked
+    assert "keyset batches" not in chunked
+
+def test_incremental_and_batch_plans_quote_through_the_dialect():
+    from sql_dialects import SQLDialect
+
+    class BacktickDialect(SQLDialect):
+        def quote(self, identifier):
+            return ".".join(f"`{part}`" for part in identifier.split("."))
+
+    source = [TableSchema("users_old", [SchemaField("id", "INT", primary_key=True), SchemaField("name", "VARCHAR")])]
+    mapping = _users_mapping()
+    mapping.table_mappings[0].strategy = "incremental"
+    generator = SQLGenerator(dialect=BacktickDialect())
+    assert generator.plan_incremental(mapping, source)[0].high_mark_sql == "SELECT MAX(`id`) FROM `users_old`;"
+    assert generator.plan_batches(mapping, source)[0].key_column == "`id`"
+
+def test_incremental_watermark_key_must_be_an_integer_type():
+    mapping = _users_mapping()
+    mapping.table_mappings[0].strategy = "incremental"
+    for datatype, planned in (("BIGINT", 1), ("POINT", 0), ("INTERVAL", 0), ("INTEGER[]", 0)):
+        source = [TableSchema("users_old", [SchemaField("id", datatype, primary_key=True), SchemaField("name", "VARCHAR")])]
+        assert len(SQLGenerator().plan_incremental(mapping, source)) == planned, datatype
+
+def test_partition_boundaries_follow_sampled_key_distribution():
+    # 90% of the keys are dense below 1000, the rest spread up to 10^9.
+    keys = list(range(9000)) + [10 ** 5 * i for i in range(1, 1001)]
+    boundaries = balanced_boundaries(keys[::7], 4)
+    bounds = [-1] + boundaries + [max(keys)]
+    sizes = [sum(low < k <= high for k in keys) for low, high in zip(bounds, bounds[1:])]
+    assert len(sizes) == 4 and sum(sizes) == len(keys) and max(sizes) < 1.1 * len(keys) / 4
+
+    source = [TableSchema("users_old", [SchemaField("id", "INT", primary_key=True), SchemaField("name", "VARCHAR")])]
+    plans = SQLGenerator().plan_partitions(_users_mapping(), source, 4, fallback="hash")
+    assert [p.mode for p in plans] == ["range", "hash"]
+    assert SQLGenerator().render_partitions(plans[0], [10, 20])[1].endswith('WHERE "id" > 10 AND "id" <= 20;')
+    assert len(SQLGenerator().render_partitions(plans[1])) == 4
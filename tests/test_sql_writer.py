@@ -0,0 +1,79 @@
+"""
+Unit tests for the streaming SQL artifact writer.
+"""
+
+import gzip
+import os
+import tracemalloc
+from orchestrator import MigrationOrchestrator
+from sql_writer import ArtifactSections, SQLArtifactWriter, artifact_paths, read_artifact_sections
+
+
+def test_split_by_size_and_table_with_gzip(tmp_path):
+    directory = str(tmp_path)
+    with SQLArtifactWriter(directory, "migration.sql", split_bytes=80, compress=True) as writer:
+        writer.begin_table("a->a")
+        for i in range(6):
+            writer.write(f"INSERT INTO a VALUES ({i});")
+        writer.begin_table("b->b")
+        writer.write("DELETE FROM b;")
+    assert [os.path.basename(p) for p in writer.paths] == [f"migration.{i:04d}.sql.gz" for i in range(1, 5)]
+    assert all(len(gzip.open(p, "rt").read()) <= 80 for p in writer.paths)
+    sections = read_artifact_sections(directory, "migration.sql")
+    assert sections["a->a"].split("\n") == [f"INSERT INTO a VALUES ({i});" for i in range(6)]
+    assert sections["b->b"] == "DELETE FROM b;"
+
+    with SQLArtifactWriter(directory, "migration.sql", split_by_table=True) as writer:
+        for key in ("a->a", "b->b", "c->c"):
+            writer.begin_table(key)
+            writer.write(f"-- {key}")
+    assert [os.path.basename(p) for p in artifact_paths(directory, "migration.sql")] == \
+        ["migration.0001.sql", "migration.0002.sql", "migration.0003.sql"]
+
+
+def test_unchanged_sections_are_copied_from_the_replaced_files(tmp_path):
+    directory = str(tmp_path)
+    with SQLArtifactWriter(directory, "migration.sql", split_bytes=60, compress=True) as writer:
+        for key in ("a->a", "b->b"):
+            writer.begin_table(key)
+            for i in range(4):
+                writer.write(f"INSERT INTO {key[0]} VALUES ({i});")
+    before = read_artifact_sections(directory, "migration.sql")
+
+    with ArtifactSections(directory, "migration.sql") as existing, \
+            SQLArtifactWriter(directory, "migration.sql") as writer:
+        for key in ("c->c", "b->b", "a->a"):
+            writer.begin_table(key)
+            if not existing.copy_to(writer, key):
+                writer.write(f"-- new {key}")
+    assert read_artifact_sections(directory, "migration.sql") == dict(before, **{"c->c": "-- new c->c"})
+    assert sorted(os.listdir(directory)) == ["migration.sql"]
+
+
+def test_streaming_keeps_peak_memory_flat(tmp_path):
+    statement = "INSERT INTO t (a, b, c) SELECT a, b, c FROM s WHERE id BETWEEN 1 AND 1000;"
+    tracemalloc.start()
+    try:
+        with SQLArtifactWriter(str(tmp_path), "migration.sql", split_bytes=4 * 1024 * 1024, compress=True) as writer:
+            for _ in range(200000):
+                writer.write(statement)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert writer.bytes_written == 15000000
+    assert peak < 4 * 1024 * 1024
+    assert len(writer.paths) == 4
+
+
+def test_orchestrator_reruns_reuse_split_compressed_sections(tmp_path):
+    (tmp_path / "source.sql").write_text("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(100));")
+    (tmp_path / "target.sql").write_text("CREATE TABLE customers (cust_id INT, full_name VARCHAR(100));")
+    args = (str(tmp_path / "source.sql"), str(tmp_path / "target.sql"), "CRM", str(tmp_path / "out"))
+    MigrationOrchestrator().execute_migration_workflow(*args)
+    assert os.path.exists(tmp_path / "out" / "migration.sql")
+
+    orchestrator = MigrationOrchestrator(split_by_table=True, compress=True)
+    orchestrator.execute_migration_workflow(*args)
+    orchestrator.execute_migration_workflow(*args)
+    assert artifact_paths(str(tmp_path / "out"), "rollback.sql") == [str(tmp_path / "out" / "rollback.0001.sql.gz")]
+    assert read_artifact_sections(str(tmp_path / "out"), "rollback.sql") == {"users->customers": 'DELETE FROM "customers";'}
@@ -0,0 +1,87 @@
+"""
+Unit tests for the transformation expression language.
+"""
+
+import sqlite3
+import pytest
+from instrumentation import RunMetrics
+from models import FieldMapping, TableMapping
+from sql_dialects import PostgreSQLDialect, SQLDialect, SQLiteDialect
+from sql_generator import SQLGenerator
+from transformations import TransformationError, compile_transformation
+
+ROWS = [
+    (" ann ", "Lee", "A", "2024-03-05", 10.25, 7),
+    ("Bob", None, "I", "2023-12-31T23:59:00", -2.5, -7),
+    (None, "Ng", "X", None, None, 2),
+]
+COLUMNS = ("first", "last", "status", "created", "price", "qty")
+EXPRESSIONS = [
+    "UPPER(TRIM(first)) || ' ' || last",
+    "MAP(status, 'A', 'Active', 'I', 'Inactive', 'Unknown')",
+    "FORMAT_DATE(created, '%d/%m/%Y')",
+    "ROUND(price * 1.2, 1)",
+    "qty / 2 + -1",
+    "COALESCE(last, SUBSTR(first, 1, 2), 'n/a')",
+    "TO_TEXT(qty) || LENGTH(REPLACE(\"status\", 'A', 'AA'))",
+]
+
+
+def test_compiles_to_dialect_sql():
+    expression = compile_transformation("ROUND(TO_NUMBER(price), 2)")
+    assert expression.sql(SQLDialect()) == 'ROUND(CAST("price" AS DOUBLE PRECISION), 2)'
+    assert expression.sql(PostgreSQLDialect()) == 'ROUND(CAST(CAST("price" AS DOUBLE PRECISION) AS NUMERIC), 2)'
+    date = compile_transformation("FORMAT_DATE(created, 'Day %d of %m')")
+    assert date.sql(SQLiteDialect()) == "STRFTIME('Day %d of %m', \"created\")"
+    assert date.sql(SQLDialect()) == "TO_CHAR(CAST(\"created\" AS TIMESTAMP), '\"Day \"DD\" of \"MM')"
+    assert compile_transformation("first || last").columns == ["first", "last"]
+    assert compile_transformation("first || last") is compile_transformation("first || last")
+    for bad in ("CAST(x AS INT)", "UPPER(a, b)", "a ||", "FORMAT_DATE(d, '%j')"):
+        with pytest.raises(TransformationError):
+            compile_transformation(bad)
+
+
+def test_generator_never_pastes_unparsed_transformations():
+    metrics = RunMetrics()
+    generator = SQLGenerator(metrics=metrics)
+    fields = [FieldMapping("name", "name", "Convert name to uppercase"),
+              FieldMapping("id", "id", "sql: CAST(id AS INT)")]
+    assert generator.source_expressions(TableMapping("u", "v", fields)) == [
+        '"name" /* invalid transformation ignored: Convert name to uppercase */', "CAST(id AS INT)"]
+    assert metrics.to_dict()["counters"]["invalid_transformations"] == 1
+
+
+def test_python_batches_match_sqlite_results():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE src ({', '.join(COLUMNS)})")
+    conn.executemany(f"INSERT INTO src VALUES ({', '.join('?' * len(COLUMNS))})", ROWS)
+    columns = dict(zip(COLUMNS, zip(*ROWS)))
+    for text in EXPRESSIONS:
+        expression = compile_transformation(text)
+        expected = [row[0] for row in conn.execute(f"SELECT {expression.sql(SQLiteDialect())} FROM src ORDER BY rowid")]
+        assert expression.apply(columns, len(ROWS)) == expected, text
+
+
+def test_loader_applies_transformations_in_python(tmp_path):
+    from data_loader import DataLoader
+    from migration_executor import SQLiteConnectionFactory
+    from models import FieldMapping, MigrationMapping, SchemaField, TableMapping, TableSchema
+
+    source_db = str(tmp_path / "source.db")
+    with sqlite3.connect(source_db) as conn:
+        conn.execute(f"CREATE TABLE src (id INTEGER PRIMARY KEY, {', '.join(COLUMNS)})")
+        conn.executemany(f"INSERT INTO src VALUES ({', '.join('?' * (len(COLUMNS) + 1))})",
+                         [(i,) + ROWS[i % 3] for i in range(100)])
+    fields = [FieldMapping("id", "id")] + [FieldMapping(c, f"t{i}", e) for i, (c, e) in enumerate(zip(COLUMNS, EXPRESSIONS))]
+    mapping = MigrationMapping("a", "b", 1.0, [TableMapping("src", "dst", fields)])
+    schema = [TableSchema("src", [SchemaField("id", "INTEGER", False, True)])]
+    results = {}
+    for mode in ("sql", "python"):
+        target_db = str(tmp_path / f"{mode}.db")
+        with sqlite3.connect(target_db) as conn:
+            conn.execute(f"CREATE TABLE dst (id INTEGER PRIMARY KEY, {', '.join(f't{i}' for i in range(len(EXPRESSIONS)))})")
+        DataLoader(SQLiteConnectionFactory(source_db), SQLiteConnectionFactory(target_db),
+                   batch_size=30, transform=mode).load(mapping, schema)
+        with sqlite3.connect(target_db) as conn:
+            results[mode] = conn.execute("SELECT * FROM dst ORDER BY id").fetchall()
+    assert len(results["python"]) == 100 and results["python"] == results["sql"]
@@ -0,0 +1,465 @@
+"""
+transformations.py
+
+A small expression language for FieldMapping.transformation. Expressions are
+parsed once and cached, then compiled either to a SQL expression in the
+dialect of the load (pushed into the SELECT) or to a column-wise Python
+function applied to whole row batches by the in-process loader.
+
+Syntax::
+
+    UPPER(TRIM(name))
+    first_name || ' ' || last_name
+    MAP(status, 'A', 'Active', 'I', 'Inactive', 'Unknown')
+    FORMAT_DATE(created, '%d/%m/%Y')
+    ROUND(price * 1.2, 2)
+
+Identifiers (bare or "double-quoted") are source columns, strings are
+single-quoted and NULL is the null literal. Operators are ``||``, ``+``,
+``-``, ``*`` and ``/``; NULL propagates through all of them as in SQL.
+
+Hand-written SQL outside the language is only accepted behind an explicit
+marker (``SQL: CAST(x AS INT)``) and is copied into generated scripts as is.
+"""
+
+import math
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up numeric batches
+    np = None
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^']|'')*')
+      | (?P<quoted>"(?:[^"]|"")*")
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op>\|\||[-+*/(),])
+    )""", re.VERBOSE)
+
+# Function name -> (minimum, maximum) number of arguments; None is unbounded.
+FUNCTIONS: Dict[str, Tuple[int, Optional[int]]] = {
+    "UPPER": (1, 1), "LOWER": (1, 1), "TRIM": (1, 1), "LTRIM": (1, 1), "RTRIM": (1, 1),
+    "LENGTH": (1, 1), "SUBSTR": (2, 3), "REPLACE": (3, 3), "COALESCE": (2, None),
+    "ROUND": (1, 2), "TO_INT": (1, 1), "TO_NUMBER": (1, 1), "TO_TEXT": (1, 1),
+    "FORMAT_DATE": (2, 2), "MAP": (3, None),
+}
+_DATE_DIRECTIVES = {"%Y", "%m", "%d", "%H", "%M", "%S"}
+RAW_SQL_PREFIX = "SQL:"
+
+
+class TransformationError(ValueError):
+    """
+    Raised when a transformation is not a valid expression of the language.
+    """
+
+
+def raw_sql(text: str) -> Optional[str]:
+    """
+    Returns the SQL of a transformation marked as hand-written SQL.
+
+    Args:
+        text: Transformation text.
+
+    Returns:
+        The SQL after RAW_SQL_PREFIX, or None when the text is not marked.
+    """
+    text = text.strip()
+    if text[:len(RAW_SQL_PREFIX)].upper() != RAW_SQL_PREFIX:
+        return None
+    return text[len(RAW_SQL_PREFIX):].strip()
+
+
+class Transformation:
+    """
+    A parsed transformation expression with cached compiled forms.
+
+    Attributes:
+        text: Expression source text.
+        tree: Parsed expression as nested tuples: ("column", name),
+            ("literal", value), ("op", operator, left, right), ("neg", operand)
+            or ("call", function, [arguments]).
+        columns: Source columns the expression reads, in order of appearance.
+    """
+
+    __slots__ = ("text", "tree", "columns", "_sql", "_python")
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: Expression source text.
+
+        Raises:
+            TransformationError: If the text does not parse.
+        """
+        self.text = text
+        self.tree = _Parser(text).parse()
+        self.columns = list(dict.fromkeys(_columns(self.tree)))
+        self._sql: Dict[str, str] = {}
+        self._python = None
+
+    def sql(self, dialect) -> str:
+        """
+        Compiles the expression to SQL.
+
+        Args:
+            dialect: SQLDialect quoting identifiers and rendering the
+                functions that differ between databases.
+
+        Returns:
+            SQL expression.
+        """
+        sql = self._sql.get(dialect.name)
+        if sql is None:
+            sql = self._sql[dialect.name] = _to_sql(self.tree, dialect)
+        return sql
+
+    def python(self) -> Callable[[Dict[str, Sequence], int], List]:
+        """
+        Compiles the expression to a column-wise batch function.
+
+        Returns:
+            Function taking a dict of source column name -> values of a batch
+            and the batch size, and returning the list of results.
+        """
+        if self._python is None:
+            self._python = _to_python(self.tree)
+        return self._python
+
+    def apply(self, columns: Dict[str, Sequence], rows: int) -> List:
+        """
+        Evaluates the expression over one batch.
+
+        Args:
+            columns: Source column name -> values of the batch.
+            rows: Number of rows in the batch.
+
+        Returns:
+            List of results, one per row.
+        """
+        return self.python()(columns, rows)
+
+
+@lru_cache(maxsize=4096)
+def compile_transformation(text: str) -> Transformation:
+    """
+    Parses a transformation, reusing the result for repeated expressions.
+
+    Args:
+        text: Expression source text.
+
+    Returns:
+        Transformation instance.
+
+    Raises:
+        TransformationError: If the text does not parse.
+    """
+    return Transformation(text)
+
+
+class _Parser:
+    """
+    Recursive-descent parser: concat > additive > multiplicative > unary > primary.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    def _tokenize(self, text: str) -> List[Tuple[str, str]]:
+        tokens = []
+        position = 0
+        while position < len(text):
+            if text[position:].strip() == "":
+                break
+            match = _TOKEN.match(text, position)
+            if match is None:
+                raise TransformationError(f"Unexpected character {text[position:].strip()[0]!r} in {text!r}")
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        return tokens
+
+    def parse(self):
+        if not self.tokens:
+            raise TransformationError("Empty transformation")
+        tree = self._concat()
+        if self.position != len(self.tokens):
+            raise TransformationError(f"Unexpected {self.tokens[self.position][1]!r} in {self.text!r}")
+        return tree
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else None
+
+    def _take(self, expected: Optional[str] = None) -> Tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise TransformationError(f"Unexpected end of {self.text!r}")
+        token = self.tokens[self.position]
+        if expected is not None and token[1] != expected:
+            raise TransformationError(f"Expected {expected!r} but found {token[1]!r} in {self.text!r}")
+        self.position += 1
+        return token
+
+    def _binary(self, operators, operand):
+        tree = operand()
+        while self._peek() in operators:
+            operator = self._take()[1]
+            tree = ("op", operator, tree, operand())
+        return tree
+
+    def _concat(self):
+        return self._binary(("||",), self._additive)
+
+    def _additive(self):
+        return self._binary(("+", "-"), self._multiplicative)
+
+    def _multiplicative(self):
+        return self._binary(("*", "/"), self._unary)
+
+    def _unary(self):
+        if self._peek() == "-":
+            self._take()
+            return ("neg", self._unary())
+        return self._primary()
+
+    def _primary(self):
+        kind, value = self._take()
+        if kind == "number":
+            return ("literal", float(value) if "." in value else int(value))
+        if kind == "string":
+            return ("literal", value[1:-1].replace("''", "'"))
+        if kind == "quoted":
+            return ("column", value[1:-1].replace('""', '"'))
+        if kind == "name":
+            if value.upper() == "NULL":
+                return ("literal", None)
+            if self._peek() == "(":
+                return self._call(value.upper())
+            return ("column", value)
+        if value == "(":
+            tree = self._concat()
+            self._take(")")
+            return tree
+        raise TransformationError(f"Unexpected {value!r} in {self.text!r}")
+
+    def _call(self, function: str):
+        if function not in FUNCTIONS:
+            raise TransformationError(f"Unknown function {function} in {self.text!r}")
+        self._take("(")
+        arguments = []
+        if self._peek() != ")":
+            arguments.append(self._concat())
+            while self._peek() == ",":
+                self._take()
+                arguments.append(self._concat())
+        self._take(")")
+        low, high = FUNCTIONS[function]
+        if len(arguments) < low or (high is not None and len(arguments) > high):
+            raise TransformationError(f"Wrong number of arguments for {function} in {self.text!r}")
+        if function == "FORMAT_DATE":
+            fmt = arguments[1]
+            if fmt[0] != "literal" or not isinstance(fmt[1], str):
+                raise TransformationError(f"FORMAT_DATE needs a literal format in {self.text!r}")
+            unsupported = set(re.findall(r"%.", fmt[1])) - _DATE_DIRECTIVES
+            if unsupported:
+                raise TransformationError(f"Unsupported date directives {sorted(unsupported)} in {self.text!r}")
+        return ("call", function, arguments)
+
+
+def _columns(tree):
+    """
+    Yields the column names referenced by an expression tree.
+    """
+    if tree[0] == "column":
+        yield tree[1]
+    elif tree[0] == "op":
+        yield from _columns(tree[2])
+        yield from _columns(tree[3])
+    elif tree[0] == "neg":
+        yield from _columns(tree[1])
+    elif tree[0] == "call":
+        for argument in tree[2]:
+            yield from _columns(argument)
+
+
+def _to_sql(tree, dialect) -> str:
+    """
+    Renders an expression tree as SQL in the given dialect.
+    """
+    kind = tree[0]
+    if kind == "column":
+        return dialect.quote(tree[1])
+    if kind == "literal":
+        return dialect.literal(tree[1])
+    if kind == "neg":
+        return f"(-{_to_sql(tree[1], dialect)})"
+    if kind == "op":
+        return f"({_to_sql(tree[2], dialect)} {tree[1]} {_to_sql(tree[3], dialect)})"
+    function, arguments = tree[1], tree[2]
+    args = [_to_sql(a, dialect) for a in arguments]
+    if function in ("TO_INT", "TO_NUMBER", "TO_TEXT"):
+        return dialect.cast_sql(args[0], function[3:].lower())
+    if function == "SUBSTR":
+        return dialect.substr_sql(*args)
+    if function == "ROUND":
+        return dialect.round_sql(args[0], args[1] if len(args) > 1 else "0")
+    if function == "FORMAT_DATE":
+        return dialect.format_date_sql(args[0], arguments[1][1])
+    if function == "MAP":
+        pairs = args[1:] if len(args) % 2 else args[1:-1]
+        whens = " ".join(f"WHEN {pairs[i]} THEN {pairs[i + 1]}" for i in range(0, len(pairs), 2))
+        default = f" ELSE {args[-1]}" if len(args) % 2 == 0 else ""
+        return f"CASE {args[0]} {whens}{default} END"
+    return f"{function}({', '.join(args)})"
+
+
+def _to_python(tree) -> Callable[[Dict[str, Sequence], int], List]:
+    """
+    Compiles an expression tree into nested column-wise batch functions.
+    """
+    kind = tree[0]
+    if kind == "column":
+        name = tree[1]
+        return lambda columns, rows: list(columns[name])
+    if kind == "literal":
+        value = tree[1]
+        return lambda columns, rows: [value] * rows
+    if kind == "neg":
+        operand = _to_python(tree[1])
+        return lambda columns, rows: _arithmetic("-", [0] * rows, operand(columns, rows))
+    if kind == "op":
+        operator, left, right = tree[1], _to_python(tree[2]), _to_python(tree[3])
+        if operator == "||":
+            return lambda columns, rows: [None if a is None or b is None else _text(a) + _text(b)
+                                          for a, b in zip(left(columns, rows), right(columns, rows))]
+        return lambda columns, rows: _arithmetic(operator, left(columns, rows), right(columns, rows))
+    function = tree[1]
+    arguments = [_to_python(a) for a in tree[2]]
+    if function == "FORMAT_DATE":
+        fmt = tree[2][1][1]
+        return lambda columns, rows: [None if v is None else _parse_date(v).strftime(fmt)
+                                      for v in arguments[0](columns, rows)]
+    if function == "MAP":
+        codes = tree[2][1:]
+        if not all(c[0] == "literal" for c in codes):
+            raise TransformationError("MAP codes and values must be literals")
+        values = [c[1] for c in codes]
+        default = values.pop() if len(values) % 2 else None
+        lookup = dict(zip(values[0::2], values[1::2]))
+        return lambda columns, rows: [default if v is None else lookup.get(v, default)
+                                      for v in arguments[0](columns, rows)]
+    if function == "COALESCE":
+        return lambda columns, rows: [next((v for v in values if v is not None), None)
+                                      for values in zip(*(a(columns, rows) for a in arguments))]
+    if function == "ROUND":
+        return lambda columns, rows: _round(arguments[0](columns, rows),
+                                            arguments[1](columns, rows) if len(arguments) > 1 else [0] * rows)
+    scalar = _SCALARS[function]
+    return lambda columns, rows: [None if None in values else scalar(*values)
+                                  for values in zip(*(a(columns, rows) for a in arguments))]
+
+
+def _text(value) -> str:
+    """
+    Converts a value to text the way SQL casts do.
+    """
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_int(value) -> int:
+    return int(value) if isinstance(value, (int, float)) else int(float(value))
+
+
+def _substr(value, start, length=None) -> str:
+    text = _text(value)
+    begin = max(int(start) - 1, 0)
+    return text[begin:] if length is None else text[begin:begin + max(int(length), 0)]
+
+
+_SCALARS: Dict[str, Callable] = {
+    "UPPER": lambda v: _text(v).upper(),
+    "LOWER": lambda v: _text(v).lower(),
+    "TRIM": lambda v: _text(v).strip(" "),
+    "LTRIM": lambda v: _text(v).lstrip(" "),
+    "RTRIM": lambda v: _text(v).rstrip(" "),
+    "LENGTH": lambda v: len(_text(v)),
+    "SUBSTR": _substr,
+    "REPLACE": lambda v, old, new: _text(v).replace(_text(old), _text(new)),
+    "TO_INT": _to_int,
+    "TO_NUMBER": float,
+    "TO_TEXT": _text,
+}
+
+
+def _parse_date(value):
+    """
+    Reads an ISO-8601 date or timestamp.
+    """
+    if isinstance(value, (date, datetime)):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _numeric_batch(values) -> bool:
+    return all(type(v) in (int, float) for v in values)
+
+
+def _arithmetic(operator: str, left: List, right: List) -> List:
+    """
+    Applies an arithmetic operator to two columns with SQL semantics:
+    NULL propagates and dividing integers truncates toward zero.
+    """
+    if np is not None and left and _numeric_batch(left) and _numeric_batch(right):
+        integers = all(type(v) is int for v in left) and all(type(v) is int for v in right)
+        a = np.asarray(left, dtype=np.int64 if integers else np.float64)
+        b = np.asarray(right, dtype=a.dtype)
+        if operator == "/":
+            if not b.all():
+                return [_apply(operator, x, y) for x, y in zip(left, right)]
+            result = np.trunc(a / b).astype(np.int64) if integers else a / b
+        else:
+            result = {"+": np.add, "-": np.subtract, "*": np.multiply}[operator](a, b)
+        return result.tolist()
+    return [_apply(operator, x, y) for x, y in zip(left, right)]
+
+
+def _apply(operator: str, x, y):
+    """
+    Applies an arithmetic operator to two values with SQL semantics.
+    """
+    if x is None or y is None:
+        return None
+    if operator == "+":
+        return x + y
+    if operator == "-":
+        return x - y
+    if operator == "*":
+        return x * y
+    if not y:
+        return None
+    if isinstance(x, int) and isinstance(y, int):
+        return int(x / y)
+    return x / y
+
+
+def _round(values: List, digits: List) -> List:
+    """
+    Rounds half away from zero like SQL ROUND, vectorised when possible.
+    """
+    if np is not None and values and _numeric_batch(values) and len(set(digits)) == 1 and None not in digits:
+        scale = 10.0 ** int(digits[0])
+        a = np.asarray(values, dtype=np.float64)
+        return (np.sign(a) * np.floor(np.abs(a) * scale + 0.5) / scale).tolist()
+    results = []
+    for value, places in zip(values, digits):
+        if value is None or places is None:
+            results.append(None)
+            continue
+        scale = 10.0 ** int(places)
+        results.append(math.copysign(math.floor(abs(float(value)) * scale + 0.5) / scale, value))
+    return results
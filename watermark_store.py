@@ -0,0 +1,86 @@
+"""
+watermark_store.py
+
+Persists the high-water marks of incremental table loads in a JSON state file
+kept next to the migration outputs.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Dict
+
+WATERMARK_FILE = "watermarks.json"
+
+
+class WatermarkStore:
+    """
+    Reads and writes per-table high-water marks.
+
+    Marks are keyed by ``source_table->target_table`` and remember the
+    watermark column they were taken on; a mark taken on a different column
+    is ignored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the JSON state file, or a directory holding it.
+        """
+        self.path = os.path.join(path, WATERMARK_FILE) if os.path.isdir(path) else path
+        self._lock = threading.Lock()
+        self._marks: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._marks = json.load(f)
+
+    def get(self, source_table: str, target_table: str, column: str):
+        """
+        Returns the last high-water mark of a table load.
+
+        Args:
+            source_table: Source table name.
+            target_table: Target table name.
+            column: Watermark column the mark must have been taken on.
+
+        Returns:
+            The stored mark, or None when the table was never loaded.
+        """
+        with self._lock:
+            entry = self._marks.get(self._key(source_table, target_table))
+        if entry is None or entry.get("column") != column:
+            return None
+        return entry.get("value")
+
+    def set(self, source_table: str, target_table: str, column: str, value):
+        """
+        Records a new high-water mark and saves the state file.
+
+        Args:
+            source_table: Source table name.
+            target_table: Target table name.
+            column: Watermark column.
+            value: Highest watermark value loaded.
+        """
+        with self._lock:
+            self._marks[self._key(source_table, target_table)] = {"column": column, "value": value}
+            self._save()
+
+    def _key(self, source_table: str, target_table: str) -> str:
+        """
+        Builds the state file key of a table load.
+        """
+        return f"{source_table}->{target_table}"
+
+    def _save(self):
+        """
+        Writes the state file atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._marks, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+